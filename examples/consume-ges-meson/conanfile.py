@@ -103,6 +103,9 @@ class ExampleConsumeGesMeson(ConanFile):
             writer.write("\n")
             writer.write(f"export GST_PLUGIN_PATH={joinedPluginPaths}\n")
             writer.write(f"export GST_PLUGIN_SCANNER={gstPluginScannerPath}\n")
+            # A registry of our own, so that it is not rescanned whenever another program uses other plugin paths.
+            # Use `gst-conan registry` to generate it ahead of time instead (see the gst-conan readme).
+            writer.write('export GST_REGISTRY=${GST_REGISTRY:-$thisFolder/gst-registry.bin}' + "\n")
             writer.write(f"export LD_LIBRARY_PATH={joinedLibPaths}:$LD_LIBRARY_PATH\n")
             writer.write("\n")
             writer.write(f"exec $thisFolder/consume-ges \"$@\"\n")
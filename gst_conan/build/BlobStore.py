@@ -0,0 +1,148 @@
+# The same exact file exists next to each `conanfile.py` within this repo.
+# We are waiting for a Conan bug to get fixed:  https://github.com/conan-io/conan/issues/3591
+
+from collections import OrderedDict as odict
+
+import concurrent.futures
+import errno
+import hashlib
+import os
+import stat
+import uuid
+
+class BlobStore:
+    '''
+    A content-addressed store of packaged files, which deduplicates identical files across package folders (build types,
+    revisions, users and channels).  Each distinct file is kept once as a "blob", and every package folder which contains
+    it holds a hardlink to the blob.  Blobs are named after the sha256 of their content and their permission bits (since
+    hardlinks share permissions), and are never modified.
+
+    The store needs no index:  the link count of a blob tells whether any package folder still refers to it, so `gc`
+    deletes the blobs whose only link is the store itself (e.g. after `conan remove`).
+
+    The store must be on the same file system as the package folders.  Files which cannot be linked are left alone.
+
+    self.folder = The folder of the store.
+    '''
+
+    def __init__(self, folder:str):
+        self.folder = folder
+
+    def blobFile(self, sha:str, mode:int) -> str:
+        '''
+        Gets the file of a blob.
+        :param sha: The sha256 of the content (hex digits).
+        :param mode: The permission bits.
+        :return: The absolute file path.
+        '''
+        return os.path.join(self.folder, sha[:2], f"{sha}-{stat.S_IMODE(mode):04o}")
+
+    def gc(self, dryRun:bool=False) -> tuple:
+        '''
+        Deletes the blobs which no package folder refers to anymore.
+        :param dryRun: If true, nothing is deleted.
+        :return: A tuple with the number of blobs and the number of bytes which were (or would be) reclaimed.
+        '''
+        count = 0
+        size = 0
+        if not os.path.isdir(self.folder):
+            return (count, size)
+
+        for subFolder in sorted(os.listdir(self.folder)):
+            subFolder = os.path.join(self.folder, subFolder)
+            if not os.path.isdir(subFolder):
+                continue
+            for item in os.listdir(subFolder):
+                blobFile = os.path.join(subFolder, item)
+                info = os.lstat(blobFile)
+                if info.st_nlink == 1:
+                    count += 1
+                    size += info.st_size
+                    if not dryRun:
+                        os.remove(blobFile)
+
+        return (count, size)
+
+    def store(self, file:str, sha:str=None) -> bool:
+        '''
+        Replaces a file with a hardlink to its blob, adding the blob if it is new.
+        :param file: A regular file.  Links are ignored.
+        :param sha: The sha256 of the file, if it is already known (see `PackageManifest`).
+        :return: True if the file was already in the store (so its space is saved), or false if it was added to the store
+        or could not be stored.
+        '''
+        info = os.lstat(file)
+        if not stat.S_ISREG(info.st_mode):
+            return False
+
+        blobFile = self.blobFile(sha or BlobStore.hashFile(file), info.st_mode)
+        os.makedirs(os.path.dirname(blobFile), exist_ok=True)
+
+        # `gc` may delete the blob between the check and the link, so try again from scratch.
+        for attempt in range(3):
+            if os.path.exists(blobFile):
+                try:
+                    if os.path.samefile(blobFile, file):
+                        return True
+                    temporaryFile = f"{file}.{uuid.uuid4().hex}.tmp"
+                    os.link(blobFile, temporaryFile)
+                    os.replace(temporaryFile, file)
+                    return True
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    if e.errno in (errno.EXDEV, errno.EMLINK, errno.EPERM):
+                        return False
+                    raise
+            else:
+                try:
+                    os.link(file, blobFile)
+                    return False
+                except FileExistsError:
+                    continue
+                except OSError as e:
+                    if e.errno in (errno.EXDEV, errno.EMLINK, errno.EPERM):
+                        return False
+                    raise
+
+        return False
+
+    def storeTree(self, folder:str, workers:int=8, hashes:dict=None) -> odict:
+        '''
+        Stores all regular files under a folder (see `store`).
+        :param folder: The folder, typically a conan package folder.
+        :param workers: The number of files which are hashed at the same time.
+        :param hashes: The sha256 of the files which were already hashed, keyed by file.  The other files are hashed.
+        :return: The statistics:  "files" (the number of files), "deduplicated" (the number of files which were already
+        in the store) and "savedBytes" (the size of those files).
+        '''
+        files = []
+        for root, folders, names in os.walk(folder):
+            for name in names:
+                files.append(os.path.join(root, name))
+
+        output = odict([("files", 0), ("deduplicated", 0), ("savedBytes", 0)])
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            shas = [hashes.get(file) if hashes else None for file in files]
+            for file, deduplicated in zip(files, executor.map(self.store, files, shas)):
+                output["files"] += 1
+                if deduplicated:
+                    output["deduplicated"] += 1
+                    output["savedBytes"] += os.lstat(file).st_size
+
+        return output
+
+    @staticmethod
+    def hashFile(file:str) -> str:
+        '''
+        :param file: A file.
+        :return: The sha256 of its content (hex digits).
+        '''
+        sha = hashlib.sha256()
+        with open(file, "rb") as reader:
+            while True:
+                chunk = reader.read(1024 * 1024)
+                if not chunk:
+                    break
+                sha.update(chunk)
+        return sha.hexdigest()
@@ -1,11 +1,20 @@
 from . import base
 from . import build
+from . import ccache
 from . import configuration
+from . import profiling
+from . import registry as pluginRegistry
+from . import scheduling
+from . import sources
 
+from   collections import OrderedDict as odict
+import concurrent.futures
+import json
 import os
 import shlex
 import shutil
 import subprocess
+import tempfile
 
 def copy_exports_workaround() -> None:
     '''
@@ -29,13 +38,15 @@ def copy_exports_workaround() -> None:
         shutil.copytree(srcFolder1, destFolder1, symlinks=True)
         shutil.copytree(srcFolder2, destFolder2, symlinks=True)
 
-def createWithDocker(dockerRecipeId:str, createArgs:str) -> None:
+def createWithDocker(dockerRecipeId:str, createArgs:str, mountFolders:list=None) -> None:
     '''
     Implements `conan create` when the "--docker" flag is specified.
     :param dockerRecipeId: Identifies the docker image (and container) to be used.  Specifically this is the name of a
     folder under `gst-conan/distros` to be used for building.
     :param createArgs: The command-line arguments that are to be forwarded to the docker container.  This includes
     the 'create' verb and everything that comes after it, but it does not include the "--docker xxx" part.
+    :param mountFolders: Extra folders (such as the ccache folder) which are mounted into the container at the same
+    path.  The conan storage folder is always mounted.
     :return: Nothing.
     '''
 
@@ -69,17 +80,36 @@ def createWithDocker(dockerRecipeId:str, createArgs:str) -> None:
 
     os.makedirs(conanStorageFolder, exist_ok=True)
 
+    mounts = f"--mount type=bind,src={conanStorageFolder},dst={conanStorageFolder}"
+    for folder in mountFolders or []:
+        folder = os.path.abspath(os.path.expanduser(folder))
+        if not (folder + os.sep).startswith(conanStorageFolder.rstrip(os.sep) + os.sep):
+            os.makedirs(folder, exist_ok=True)
+            mounts += f" --mount type=bind,src={folder},dst={folder}"
+
     base.execute(
-        f"docker run --runtime=nvidia --mount type=bind,src={conanStorageFolder},dst={conanStorageFolder} {dockerImageTag} " \
+        f"docker run --runtime=nvidia {mounts} {dockerImageTag} " \
             + shlex.quote(gstConanCmd) )
 
     print("[END] Docker run (building conan packages)")
 
 def createWithoutDocker(packagesFolder:str, revision:str, version:str,
-                        build_type:str, user:str, channel:str, extraArgs:list) -> None:
+                        build_type:str, user:str, channel:str, extraArgs:list, jobs:int=1,
+                        cores:int=None, memoryMb:int=None, planOnly:bool=False, force:bool=False,
+                        resume:bool=False, gitMirrors:bool=True, offline:bool=False,
+                        shallow:bool=False, prefetchJobs:int=4, ccacheFolder:str=None, incremental:bool=False,
+                        workspaceFolder:str=None, packageNames:list=None, mesonProfile:str="default",
+                        copyBackend:str="auto", dedup:bool=False, splitDebug:bool=False) -> None:
     '''
     Implements `conan create` for all packages when the command is used without the "--docker" flag.
     Throws on error.
+
+    The output of each `conan create` is printed line by line with the name of the package (see `base.AsyncRunner`),
+    and saved under `.gst-conan/logs` in the conan storage folder, in a log file per package.
+
+    The wall time, CPU time and peak memory of each package, of each phase of its recipe and of each command it executed
+    are recorded (see `gst_conan.profiling`).  At the end, a report of the slowest ones is printed, and the profile is
+    saved under `.gst-conan/profiles` along with a trace which can be loaded in chrome://tracing.
     :param packagesFolder:  The folder which contains the conanfiles for all packages.
     :param revision: The revision to pull from all Gstreamer repos.  This can be a branch name, a sha, or a tag.
     :param version: The version of Gstreamer being packaged, and part of the conan package id.
@@ -87,6 +117,39 @@ def createWithoutDocker(packagesFolder:str, revision:str, version:str,
     :param user: The user which is part of the conan package id.
     :param channel: The channel which is part of the conan package id.
     :param extraArgs:  A list of extra arguments to be passed to conan over the command line.
+    :param jobs:  The maximum number of packages which are created at the same time.  A package is only created after
+    all of the packages it requires (see the `requirements` function of each conanfile) have been created.
+    :param cores: The number of cores shared by all of the package builds.  Defaults to all cores of the machine.
+    :param memoryMb: The memory (in megabytes) shared by all of the package builds.  Defaults to all physical memory.
+    :param planOnly:  If true, the build plan is printed but nothing is built.
+    :param force:  If true, every package is created even if the build plan considers it up to date.
+    :param resume:  If true, packages which the journal of the previous run (with the same version, user, channel and
+    build_type) shows as completed with the same inputs hash are not created again.
+    :param gitMirrors:  If true, the recipes clone the upstream repos through a cache of bare git mirrors which is kept
+    in the gst-conan state folder (see `gst_conan.sources`).
+    :param offline:  If true, the git mirrors are not refreshed, so the mirrors are the only source of the upstream
+    repos.  Requires `gitMirrors`.
+    :param shallow:  If true, the recipes only fetch the tip of the revision (and of the submodules) rather than the
+    full history.  This also allows the revision to be a sha.
+    :param prefetchJobs:  The number of upstream repos which are fetched at the same time in the background, so that
+    the sources of each package are ready by the time its recipe needs them.  If 0, each recipe fetches its own sources.
+    :param ccacheFolder:  If given, the package builds compile through ccache, with this cache folder (see
+    `gst_conan.ccache`), and the hits and misses of each package are printed at the end.
+    :param incremental:  If true (developer mode), the repo and the meson build folder of each package are kept in a
+    workspace outside of the conan cache, so that each build only runs ninja on what has changed since the previous
+    build (see `build.workspaceFolders`).  Every package is built regardless of the build plan, and the binaries are not
+    recorded in the build stamps, since they may come from modified sources.
+    :param workspaceFolder:  The workspace of the incremental mode.  Defaults to the "workspace" folder in the gst-conan
+    state folder.
+    :param packageNames:  If given, only these packages are created.  The others are assumed to be up to date.
+    :param mesonProfile:  The profile of meson options for all packages (see `build.mesonDefinitions`).  The "minimal"
+    profile does not build the plugins, tests, examples and docs which are not packaged.
+    :param copyBackend:  The preferred method to copy the build output into the package folders (see
+    `build.CopyBackend`).  Cheaper methods are tried first with "auto".
+    :param dedup:  If true, the packaged files are deduplicated across all package folders through a blob store kept in
+    the gst-conan state folder (see `build.BlobStore`).  Use `gc` to reclaim the blobs which are no longer used.
+    :param splitDebug:  If true, the debug information of the packaged binaries is moved into separate files, which are
+    exported as a companion "<package>-debug" package (see `build.splitDebugSymbols`).
     :return: Nothing.
     '''
 
@@ -97,13 +160,384 @@ def createWithoutDocker(packagesFolder:str, revision:str, version:str,
     if extraArgs != None or len(extraArgs) > 0:
         xargs = subprocess.list2cmdline(extraArgs)
 
+    graph = scheduling.DependencyGraph.load(packagesFolder, config.packages.keys())
+
+    if offline and not gitMirrors:
+        raise Exception("The offline mode requires the git mirrors.")
+
+    for packageName in packageNames or []:
+        if packageName not in graph.packageNames:
+            raise Exception(f"Unknown package:  {packageName}")
+
+    profiles = {"default", "minimal"}
+    for packageInfo in config.packages.values():
+        profiles.update(packageInfo.mesonOptions.keys())
+    if mesonProfile not in profiles:
+        raise Exception(f"Unknown meson option profile:  {mesonProfile}  (choices: {', '.join(sorted(profiles))})")
+
+    build.CopyBackend(copyBackend)  # validates the name
+
+    if ccacheFolder != None and not ccache.isInstalled():
+        raise Exception("The compiler cache requires ccache, which is not installed.")
+
+    storageFolder = os.path.expanduser(build.conanStorageFolder())
+    mirrorsFolder = os.path.join(build.gstConanStateFolder(storageFolder), "git-mirrors") if gitMirrors else None
+
+    # Decide which packages are already up to date in the conan cache.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(graph.packageNames)) as executor:
+        shas = executor.map(lambda name: sources.revisionSha(build.gitRepoUrl(name), revision, mirrorsFolder, offline),
+                            graph.packageNames)
+        packageSettings = {name: odict([("revision", sha)]) for name, sha in zip(graph.packageNames, shas)}
+
+    settings = odict([("version", version), ("user", user), ("channel", channel), ("build_type", build_type),
+                      ("mesonProfile", mesonProfile), ("splitDebug", splitDebug), ("extraArgs", extraArgs)])
+
+    plan = scheduling.BuildPlan(graph, os.path.join(build.gstConanStateFolder(storageFolder), "stamps"),
+        lambda name: build.conanPackageFolders(storageFolder, name, version, user, channel, build_type))
+    plan.compute(packagesFolder, settings, packageSettings, force or incremental)
+    if packageNames:
+        for packageName in graph.packageNames:
+            if packageName not in packageNames:
+                plan.markSkipped(packageName, "not selected")
+
+    # The journal records the progress of this run, so that a failed run can be resumed.
+    journal = scheduling.Journal.load(os.path.join(build.gstConanStateFolder(storageFolder), "journals",
+                                                   f"{version}@{user}_{channel}-{build_type}.json"), resume)
+
+    if resume:
+        print(f"Resuming from:  {plan.resume(journal)}")
+
+    print("Build plan:")
+    plan.print()
+
+    if planOnly:
+        return
+
+    # Scratch files of this run, shared with the recipes.  The ninja builds of all packages share a budget of cores and
+    # memory.
+    runFolder = tempfile.mkdtemp(prefix="gst-conan-")
+    budget = scheduling.JobBudget.create(os.path.join(runFolder, "job-budget.json"), cores, memoryMb)
+
     env = os.environ.copy()
     env['GST_CONAN_REVISION'] = revision
+    env['GST_CONAN_JOB_BUDGET'] = budget.ledgerFile
+    env['GST_CONAN_GIT_MIRRORS'] = mirrorsFolder or ""
+    env['GST_CONAN_OFFLINE'] = "1" if offline else "0"
+    env['GST_CONAN_SHALLOW'] = "1" if shallow else "0"
+    env['GST_CONAN_STAGING'] = ""
+    env['GST_CONAN_MESON_PROFILE'] = mesonProfile
+    env['GST_CONAN_COPY_BACKEND'] = copyBackend
+    env['GST_CONAN_BLOB_STORE'] = os.path.join(build.gstConanStateFolder(storageFolder), "blobs") if dedup else ""
+    env['GST_CONAN_DEBUG_SYMBOLS'] = os.path.join(runFolder, "debug-symbols") if splitDebug else ""
+    env['GST_CONAN_CCACHE'] = ""
+    env['GST_CONAN_WORKSPACE'] = ""
+    if incremental:
+        workspaceFolder = workspaceFolder or os.path.join(build.gstConanStateFolder(storageFolder), "workspace")
+        env['GST_CONAN_WORKSPACE'] = os.path.abspath(workspaceFolder)
+        print(f"Workspace:  {env['GST_CONAN_WORKSPACE']}")
+    env['GST_CONAN_CCACHE_REPORTS'] = os.path.join(runFolder, "ccache-reports")
+    env['GST_CONAN_PROFILE'] = os.path.join(runFolder, "profile.jsonl")
+    if ccacheFolder != None:
+        os.makedirs(ccacheFolder, exist_ok=True)
+        env['GST_CONAN_CCACHE'] = os.path.abspath(ccacheFolder)
+
+    # Fetch the sources of the packages to be built in the background, in the order in which they are needed.  The
+    # recipes take the staged repos from here (see `build.doConanSource`).
+    # The staged repos are only taken if they are at the commit which the build plan was computed for (a repo staged by
+    # an earlier run may be at another commit).
+    stagingFolder = os.path.join(build.gstConanStateFolder(storageFolder), "staging")
+    expectedShas = odict((name, settings["revision"]) for name, settings in packageSettings.items()
+                         if sources.isSha(settings["revision"]))
+    env['GST_CONAN_SHAS'] = json.dumps(expectedShas)
+    prefetchExecutor = None
+    prefetches = []
+    stageFolders = []
+    if prefetchJobs > 0 and not incremental:
+        env['GST_CONAN_STAGING'] = stagingFolder
+        prefetchExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=prefetchJobs)
+        for packageName in graph.topologicalOrder():
+            if plan.entries[packageName]["action"] == "build":
+                stageFolders.append(sources.stageFolder(stagingFolder, packageName, revision, shallow))
+                prefetches.append(prefetchExecutor.submit(sources.stage, build.gitRepoUrl(packageName), revision,
+                    stageFolders[-1], mirrorsFolder, offline, shallow, expectedShas.get(packageName)))
+
+    def createPackage(packageName:str) -> None:
+        entry = plan.entries[packageName]
+        if entry["action"] == "skip":
+            print(f"[SKIP] {packageName} ({entry['reason']})")
+            # Only packages whose binaries match the plan are completed, so that `--resume` creates the others.
+            if plan.isUpToDate(packageName):
+                journal.markCompleted(packageName, entry["hash"])
+            else:
+                journal.markSkipped(packageName, entry["hash"], entry["reason"])
+            return
 
-    for packageName, packageInfo in config.packages.items():
         packageFolder = os.path.join(packagesFolder, packageName)
         cmd = f"conan create {packageFolder} {packageName}/{version}@{user}/{channel} --build missing -s build_type={build_type} {xargs}"
-        base.execute(cmd, env=env)
+        print(f"[BEGIN] {packageName}")
+        journal.markStarted(packageName, entry["hash"])
+        if incremental:
+            plan.forget(packageName)
+        budget.expect(packageName, config.packages[packageName].buildWeight())
+        try:
+            runner.run(cmd, packageName, env=env)
+
+            # The debug symbols which the package step split out of the binaries become a package of their own, so
+            # that consumers only download them to debug (see `build.splitDebugSymbols`).
+            debugFolder = os.path.join(env['GST_CONAN_DEBUG_SYMBOLS'], packageName) if splitDebug else None
+            if debugFolder != None and os.path.isdir(debugFolder):
+                debugReference = build.debugPackageReference(packageName, version, user, channel)
+                runner.run(f"conan export-pkg {os.path.join(packagesFolder, 'debug-symbols')} {debugReference} "
+                           f"-s build_type={build_type} --package-folder {debugFolder} --force",
+                           f"{packageName}-debug", env=env)
+                shutil.rmtree(debugFolder, ignore_errors=True)
+        except Exception as e:
+            journal.markFailed(packageName, entry["hash"], str(e))
+            raise
+        finally:
+            budget.release(packageName)
+        if not incremental:
+            plan.recordCreated(packageName)
+        journal.markCompleted(packageName, entry["hash"])
+        print(f"[END] {packageName}")
+
+    # The output of the `conan create` commands is streamed with a prefix per package (so that concurrent packages can be
+    # told apart), and kept in a log file per package.
+    logFolder = os.path.join(build.gstConanStateFolder(storageFolder), "logs",
+                             f"{version}@{user}_{channel}-{build_type}")
+    shutil.rmtree(logFolder, ignore_errors=True)
+    runner = base.AsyncRunner(logFolder, profileFile=env['GST_CONAN_PROFILE'])
+    runner.start()
+
+    try:
+        scheduling.Scheduler(graph, jobs).run(createPackage)
+    finally:
+        runner.stop()
+        print(f"The logs of each package are in:  {logFolder}")
+        ccache.printReports(env['GST_CONAN_CCACHE_REPORTS'])
+        printProfile(profiling.load(env['GST_CONAN_PROFILE']),
+                     os.path.join(build.gstConanStateFolder(storageFolder), "profiles",
+                                  f"{version}@{user}_{channel}-{build_type}"))
+        shutil.rmtree(runFolder, ignore_errors=True)
+        if prefetchExecutor != None:
+            # A failed prefetch is not an error by itself, since the recipe then clones the repo on its own.
+            for prefetch in prefetches:
+                prefetch.cancel()
+            prefetchExecutor.shutdown(wait=True)
+
+        # Repos which were staged but not used (e.g. because conan already had the sources, or the run failed) are not
+        # kept around for a later run.
+        for stageFolder in stageFolders:
+            with base.fileLock(stageFolder + ".lock"):
+                shutil.rmtree(stageFolder, ignore_errors=True)
+
+def deploy(version:str, user:str, channel:str, build_type:str, deployFolder:str, hardlinks:bool=False,
+           withRegistry:bool=True) -> None:
+    '''
+    Deploys the packages of the local conan cache as a single tree:  one "bin", one "lib" and one "plugins" folder, made
+    of links into the package folders (see `build.linkFarm`).  The dynamic linker and the plugin loader then search one
+    folder each, rather than one per package.
+
+    The deploy folder also gets "paths.json" (the folders of the tree, and the package folder of each package) and
+    "activate.sh", which sets the environment variables of a program using the tree.
+    :param version:  The version of the packages.
+    :param user:  The conan user.
+    :param channel:  The conan channel.
+    :param build_type:  The conan build_type setting.
+    :param deployFolder:  The folder of the tree.
+    :param hardlinks:  If true, the files are hardlinked rather than symlinked.
+    :param withRegistry:  If true, the plugin registry of the tree is generated as well (see `gst_conan.registry`).
+    :return: Nothing.
+    '''
+    storageFolder = os.path.expanduser(build.conanStorageFolder())
+    packageFolders = findPackageFolders(storageFolder, version, user, channel, build_type)
+    deployFolder = os.path.abspath(deployFolder)
+
+    count = build.linkFarm(list(packageFolders.values()), deployFolder, ["bin", "lib", "plugins"], hardlinks)
+    print(f"Linked {count} files from {len(packageFolders)} packages into {deployFolder}")
+
+    registryFile = os.path.join(deployFolder, "gst-registry.bin")
+    if withRegistry:
+        if pluginRegistry.generate([deployFolder], registryFile):
+            print(f"Generated the plugin registry:  {registryFile}")
+    elif os.path.isfile(registryFile):
+        os.remove(registryFile)
+
+    paths = odict()
+    for subFolder in ["bin", "lib", "plugins"]:
+        paths[subFolder] = os.path.join(deployFolder, subFolder)
+    paths["registry"] = registryFile if withRegistry else None
+    paths["packages"] = packageFolders
+    with open(os.path.join(deployFolder, "paths.json"), "w") as writer:
+        json.dump(paths, writer, indent=4)
+
+    # The script locates the tree relative to itself, so the tree can be moved (unless it uses hardlinks across file
+    # systems, which is not possible anyway).  The registry records the absolute paths of the plugins, so it is only
+    # used as it is in the folder where it was generated (see `pluginRegistry.generate`).  Elsewhere, gstreamer updates
+    # it on the first start.
+    with open(os.path.join(deployFolder, "activate.sh"), "w") as writer:
+        writer.write("#!/bin/bash\n")
+        writer.write("# Source this file to use the gstreamer packages deployed in this folder.\n")
+        writer.write('deployFolder="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null && pwd )"\n')
+        writer.write("\n")
+        writer.write('export PATH="$deployFolder/bin:$PATH"\n')
+        writer.write('export LD_LIBRARY_PATH="$deployFolder/lib${LD_LIBRARY_PATH:+:$LD_LIBRARY_PATH}"\n')
+        writer.write('export GST_PLUGIN_PATH="$deployFolder/plugins"\n')
+        writer.write('export GST_PLUGIN_SYSTEM_PATH=""\n')
+        writer.write('export GST_PLUGIN_SCANNER="$deployFolder/bin/gst-plugin-scanner"\n')
+        if withRegistry:
+            writer.write('export GST_REGISTRY="$deployFolder/gst-registry.bin"\n')
+            writer.write(f'if [ "$deployFolder" == {shlex.quote(deployFolder)} ]; then\n')
+            writer.write('    export GST_REGISTRY_UPDATE=no\n')
+            writer.write('else\n')
+            writer.write('    unset GST_REGISTRY_UPDATE\n')
+            writer.write('fi\n')
+    os.chmod(os.path.join(deployFolder, "activate.sh"), 0o755)
+
+    print(f"To use it:  source {os.path.join(deployFolder, 'activate.sh')}")
+
+def findPackageFolders(storageFolder:str, version:str, user:str, channel:str, build_type:str) -> odict:
+    '''
+    Finds the package folder of each gstreamer package in the local conan cache.  When a package has several binary
+    packages for the build_type (e.g. with different options), the most recent one is used.
+    :param storageFolder:  The conan storage folder.
+    :param version:  The version of the packages.
+    :param user:  The conan user.
+    :param channel:  The conan channel.
+    :param build_type:  The conan build_type setting.
+    :return: The package folders keyed by package name, in the order of the configuration.  Packages which were not
+    created are left out.
+    '''
+    output = odict()
+    for packageName in configuration.getCurrent().packages.keys():
+        folders = build.conanPackageFolders(storageFolder, packageName, version, user, channel, build_type)
+        if len(folders) > 0:
+            output[packageName] = max(folders, key=os.path.getmtime)
+
+    if len(output) == 0:
+        base.raiseError(f"No package was found for {version}@{user}/{channel} ({build_type}) in {storageFolder}")
+
+    return output
+
+def gc(dryRun:bool=False) -> None:
+    '''
+    Reclaims the disk space of the blob store (see `build.BlobStore`) by deleting the blobs which no conan package folder
+    refers to anymore, such as after `conan remove`.
+    :param dryRun:  If true, the blobs are only counted.
+    :return: Nothing.
+    '''
+    blobStore = build.BlobStore(os.path.join(build.gstConanStateFolder(), "blobs"))
+    count, size = blobStore.gc(dryRun)
+
+    verb = "Would reclaim" if dryRun else "Reclaimed"
+    print(f"{verb} {count} blobs ({size / (1024 * 1024):.1f} MB) from {blobStore.folder}")
+
+def pkgConfig(names:list, path:list=None, cflags:bool=False, libs:bool=False, static:bool=False,
+              variable:str=None) -> None:
+    '''
+    Prints the flags of pkg-config packages, like `pkg-config` does (see `build.PkgConfigResolver`).
+    :param names:  The names of the packages.
+    :param path:  The folders where the *.pc files are looked up before PKG_CONFIG_PATH.
+    :param cflags:  If true, the compiler flags are printed.
+    :param libs:  If true, the link flags are printed.
+    :param static:  If true, the private requirements and libs are included.
+    :param variable:  If given, the value of this variable of the package is printed instead.
+    :return: Nothing.
+    '''
+    resolver = build.PkgConfigResolver.fromEnvironment(path)
+
+    if variable != None:
+        if len(names) != 1:
+            base.raiseError("Exactly one package is expected along with a variable.")
+        print(resolver.variable(names[0], variable) or "")
+        return
+
+    flags = []
+    if cflags:
+        flags += resolver.cflags(names)
+    if libs:
+        flags += resolver.libs(names, static)
+    if not cflags and not libs:
+        resolver.requiredFiles(names, static)  # only checks that the packages exist
+
+    print(" ".join(shlex.quote(flag) for flag in flags))
+
+def printProfile(entries:list, profileFolder:str) -> None:
+    '''
+    Prints the report of the profile of a `create` run, and saves the profile (see `gst_conan.profiling`).
+    :param entries: The entries of the profile.
+    :param profileFolder: The folder where the profile and its trace are saved (replacing those of the previous run).
+    :return: Nothing.
+    '''
+    if len(entries) == 0:
+        return
+
+    print(profiling.report(entries))
+    profileFile, traceFile = profiling.writeReports(entries, profileFolder)
+    print(f"The profile is in:  {profileFile}  (trace:  {traceFile})")
+
+def profileBuild(version:str, user:str, channel:str, build_type:str, top:int=20, saveFile:str=None,
+                 compareFile:str=None) -> None:
+    '''
+    Prints where the ninja builds of the packages in the local conan cache spent their time (see
+    `gst_conan.profiling.buildReport`), from the timings kept in the manifest of each package folder.
+    :param version:  The version of the packages.
+    :param user:  The conan user.
+    :param channel:  The conan channel.
+    :param build_type:  The conan build_type setting.
+    :param top:  The number of steps and folders which are listed.
+    :param saveFile:  If given, the timings are saved to this file, so that a later run can be compared with them.
+    :param compareFile:  If given, the timings are compared with those saved to this file by an earlier run.
+    :return: Nothing.
+    '''
+    storageFolder = os.path.expanduser(build.conanStorageFolder())
+
+    summaries = odict()
+    for packageName, packageFolder in findPackageFolders(storageFolder, version, user, channel, build_type).items():
+        manifest = build.PackageManifest.load(packageFolder)
+        if manifest == None or manifest.buildProfile == None:
+            print(f"No ninja timings for {packageName} in {packageFolder}")
+            continue
+        summaries[packageName] = manifest.buildProfile
+
+    if compareFile != None:
+        print(profiling.compareBuilds(base.loadJsonObject(compareFile), summaries, top))
+    else:
+        print(profiling.buildReport(summaries, top))
+
+    if saveFile != None:
+        os.makedirs(os.path.dirname(os.path.abspath(saveFile)), exist_ok=True)
+        with open(saveFile, "w") as writer:
+            json.dump(summaries, writer, indent=4)
+        print(f"The timings are saved in:  {saveFile}")
+
+def registry(version:str, user:str, channel:str, build_type:str, registryFile:str=None, force:bool=False) -> None:
+    '''
+    Generates the plugin registry of the packages in the local conan cache (see `gst_conan.registry`), and prints the
+    environment variables which make a consumer use it.
+    :param version:  The version of the packages.
+    :param user:  The conan user.
+    :param channel:  The conan channel.
+    :param build_type:  The conan build_type setting.
+    :param registryFile:  The registry file.  Defaults to a file in the gst-conan state folder.
+    :param force:  If true, the registry is generated even if it is up to date.
+    :return: Nothing.
+    '''
+    storageFolder = os.path.expanduser(build.conanStorageFolder())
+    packageFolders = list(findPackageFolders(storageFolder, version, user, channel, build_type).values())
+
+    if registryFile == None:
+        registryFile = os.path.join(build.gstConanStateFolder(storageFolder), "registries",
+                                    f"{version}@{user}_{channel}-{build_type}.bin")
+    registryFile = os.path.abspath(registryFile)
+
+    if pluginRegistry.generate(packageFolders, registryFile, force):
+        print(f"Generated the plugin registry:  {registryFile}")
+    else:
+        print(f"The plugin registry is up to date:  {registryFile}")
+
+    for name, value in pluginRegistry.runtimeEnvironment(packageFolders, registryFile).items():
+        print(f"export {name}={shlex.quote(value)}")
 
 def setup(distro:str) -> None:
     '''
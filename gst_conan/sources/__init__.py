@@ -0,0 +1,297 @@
+'''
+Fetching of the upstream git repos, optionally through a local cache of bare mirrors.
+
+The mirror of a repo is a bare clone of its branches and tags (see `MIRROR_REFSPECS`) stored under a "mirrors folder".
+Mirrors are created on first use and refreshed incrementally with `git fetch --prune`.  Clones are redirected to the mirrors with `url.<mirror>.insteadOf=<url>`
+configuration, which git also applies to the clones of submodules, so the clone keeps the upstream url as its origin.
+'''
+
+from .. import base
+
+import os
+import posixpath
+import re
+import shutil
+import urllib.parse
+
+# The refs which the mirrors fetch.  Unlike `git clone --mirror`, this leaves out refs such as the pull requests of
+# GitHub ("refs/pull/*"), which would make the mirrors much larger and each refresh slower.
+MIRROR_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+# The file which marks a complete staging folder.
+STAGED_MARKER = ".gst-conan-staged"
+
+def clone(url:str, revision:str, destFolder:str, mirrorsFolder:str=None, offline:bool=False,
+          shallow:bool=False) -> None:
+    '''
+    Clones a repo (and its submodules, recursively) and checks out the given revision.
+    :param url: The url of the repo.
+    :param revision: The branch name or tag to check out.  When `shallow` is true, this may also be a sha.
+    :param destFolder: The folder where the repo is cloned.  It must not exist yet.
+    :param mirrorsFolder: The folder which holds the mirrors.  If None, the repo is cloned directly from `url`.
+    :param offline: If true, the mirrors are not refreshed, so the clone only uses data which is already in the
+    mirrors.  Throws if a mirror does not exist.  Ignored if `mirrorsFolder` is None.
+    :param shallow: If true, only the requested revision is fetched (with a depth of 1), and the submodules are fetched
+    the same way.  See `shallowClone`.
+    :return: Nothing.  Throws on error.
+    '''
+    configArgs = ""
+
+    if mirrorsFolder != None:
+        mirrors = mirrorRecursively(url, revision, mirrorsFolder, offline)
+
+        # Submodules are cloned from local paths, which newer versions of git only allow when asked explicitly.  Git
+        # ignores the depth of local clones unless they use a "file://" url.
+        configArgs = "-c protocol.file.allow=always -c uploadpack.allowAnySHA1InWant=true "
+        for mirroredUrl, mirror in mirrors.items():
+            mirrorUrl = "file://" + mirror if shallow else mirror
+            configArgs += f"-c url.{mirrorUrl}.insteadOf={mirroredUrl} "
+
+    if shallow:
+        shallowClone(url, revision, destFolder, configArgs)
+    else:
+        base.execute(f"git {configArgs}clone --recurse-submodules {url} -b {revision} {destFolder}")
+
+def isSha(revision:str) -> bool:
+    '''
+    :param revision: A revision.
+    :return: True if the revision is the full sha of a commit (rather than a branch name or a tag).
+    '''
+    return re.fullmatch(r"[0-9a-f]{40}", revision) != None
+
+def mirrorFolder(url:str, mirrorsFolder:str) -> str:
+    '''
+    Gets the folder of the mirror of a repo.
+    :param url: The url of the repo.
+    :param mirrorsFolder: The folder which holds the mirrors.
+    :return: The folder of the mirror (which may or may not exist).
+    '''
+    name = re.sub(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", "", url).strip("/")
+    name = re.sub(r"[^a-zA-Z0-9._-]+", "_", name)
+    if not name.endswith(".git"):
+        name += ".git"
+
+    return os.path.join(mirrorsFolder, name)
+
+def mirrorRecursively(url:str, revision:str, mirrorsFolder:str, offline:bool=False) -> dict:
+    '''
+    Ensures a repo is mirrored, along with the submodules (recursively) which it uses at the given revision.
+    :param url: The url of the repo.
+    :param revision: The revision (a branch name, tag or sha) whose submodules are mirrored.
+    :param mirrorsFolder: The folder which holds the mirrors.
+    :param offline: If true, the mirrors are not refreshed.
+    :return: A dictionary where each key is a url and each value is the folder of its mirror.
+    '''
+    output = {}
+
+    mirror = updateMirror(url, mirrorsFolder, offline)
+    output[url] = mirror
+
+    for path, submoduleUrl in submodules(mirror, revision, url):
+        submoduleSha = base.evaluate(f"git --git-dir={mirror} rev-parse {revision}:{path}", verbose=False)
+        output.update(mirrorRecursively(submoduleUrl, submoduleSha, mirrorsFolder, offline))
+
+    return output
+
+def revisionSha(url:str, revision:str, mirrorsFolder:str=None, offline:bool=False) -> str:
+    '''
+    Determines which commit a revision currently refers to.
+    :param url: The url of the repo.
+    :param revision: A branch name, a tag, or a sha.
+    :param mirrorsFolder: The folder which holds the mirrors.  Only used if `offline` is true.
+    :param offline: If true, the revision is looked up in the mirror rather than asking the remote.
+    :return: The sha, or `revision` itself if it cannot be resolved (for example when the remote does not advertise a
+    sha, or cannot be reached).
+    '''
+    if offline and mirrorsFolder != None:
+        mirror = mirrorFolder(url, mirrorsFolder)
+        sha = base.evaluate(f"git --git-dir={mirror} rev-parse --verify --quiet {revision}^{{commit}}",
+                            throwable=False, verbose=False)
+        return sha if sha else revision
+
+    spew = base.evaluate(f"git ls-remote {url} {revision} {revision}^{{}}", throwable=False, verbose=False)
+    if not spew:
+        return revision
+
+    # Prefer the peeled commit of an annotated tag (listed with a "^{}" suffix).
+    lines = spew.splitlines()
+    lines.sort(key=lambda line: not line.endswith("^{}"))
+    return lines[0].split()[0]
+
+def shallowClone(url:str, revision:str, destFolder:str, configArgs:str="") -> None:
+    '''
+    Clones only the tip of a single revision (a depth of 1) and checks it out, then fetches the submodules the same way.
+    If the remote refuses to serve the revision directly (for example a sha which is not advertised), the full history
+    is fetched instead.  Likewise, the submodules fall back to a full fetch.
+    :param url: The url of the repo.
+    :param revision: The branch name, tag, or sha to check out.
+    :param destFolder: The folder where the repo is cloned.  It must not exist yet.
+    :param configArgs: Extra "-c name=value" arguments for every git command.
+    :return: Nothing.  Throws on error.
+    '''
+    git = f"git {configArgs}-C {destFolder}"
+
+    os.makedirs(destFolder)
+    base.execute(f"{git} init --quiet")
+    base.execute(f"{git} remote add origin {url}")
+
+    if 0 == base.execute(f"{git} fetch --depth 1 origin {revision}", throwable=False):
+        base.execute(f"{git} checkout --quiet --detach FETCH_HEAD")
+    else:
+        print(f"The shallow fetch of {revision} failed.  Fetching the full history instead.")
+        base.execute(f"{git} fetch --tags origin")
+        if 0 != base.execute(f"{git} checkout --quiet --detach {revision}", throwable=False):
+            base.execute(f"{git} checkout --quiet --detach origin/{revision}")
+
+    if 0 != base.execute(f"{git} submodule update --init --recursive --depth 1", throwable=False):
+        print("The shallow fetch of the submodules failed.  Fetching their full history instead.")
+        base.execute(f"{git} submodule update --init --recursive")
+
+def stage(url:str, revision:str, stageFolder:str, mirrorsFolder:str=None, offline:bool=False,
+          shallow:bool=False, expectedSha:str=None) -> str:
+    '''
+    Clones a repo into a staging folder ahead of time, so that it can be taken later with `takeStaged`.  Does nothing
+    if the staging folder is already complete.  A lock prevents another process (or thread) from staging or taking the
+    same folder at the same time, so whoever comes second simply waits for the first.
+    :param url: The url of the repo.
+    :param revision: The revision to check out.
+    :param stageFolder: The staging folder (see `stageFolder`).
+    :param mirrorsFolder: See `clone`.
+    :param offline: See `clone`.
+    :param shallow: See `clone`.
+    :param expectedSha: If given, a complete staging folder is cloned again unless its checkout is at this sha.  This
+    discards repos staged by an earlier run when a branch has moved since.
+    :return: The staging folder.
+    '''
+    markerFile = os.path.join(stageFolder, STAGED_MARKER)
+
+    with base.fileLock(stageFolder + ".lock"):
+        if os.path.isfile(markerFile):
+            if expectedSha == None:
+                return stageFolder
+            with open(markerFile, "r") as reader:
+                if reader.read().strip() == expectedSha:
+                    return stageFolder
+
+        shutil.rmtree(stageFolder, ignore_errors=True)
+        repoFolder = os.path.join(stageFolder, "repo")
+        clone(url, revision, repoFolder, mirrorsFolder, offline, shallow)
+        sha = base.evaluate(f"git -C {repoFolder} rev-parse HEAD", verbose=False).strip()
+        with open(markerFile, "w") as writer:
+            writer.write(sha + "\n")
+
+    return stageFolder
+
+def stageFolder(stagingFolder:str, packageName:str, revision:str, shallow:bool=False) -> str:
+    '''
+    Gets the folder where the repo of a package is staged (see `stage`).
+    :param stagingFolder: The folder which holds all staged repos.
+    :param packageName: The name of the package.
+    :param revision: The revision which is checked out.
+    :param shallow: Whether the repo is a shallow clone.
+    :return: The folder (which may or may not exist).
+    '''
+    name = re.sub(r"[^a-zA-Z0-9._-]+", "_", f"{packageName}@{revision}")
+    if shallow:
+        name += "-shallow"
+
+    return os.path.join(stagingFolder, name)
+
+def submodules(repoFolder:str, revision:str, url:str) -> list:
+    '''
+    Reads the `.gitmodules` file of a repo at the given revision.
+    :param repoFolder: The folder of the repo (bare or not).
+    :param revision: The revision.
+    :param url: The url of the repo, which is used to resolve relative submodule urls.
+    :return: A list of (path, url) tuples.
+    '''
+    if not base.evaluate(f"git -C {repoFolder} ls-tree --name-only {revision} .gitmodules", verbose=False):
+        return []
+
+    spew = base.evaluate(f"git -C {repoFolder} config --blob {revision}:.gitmodules --get-regexp "
+                         r"'^submodule\..*\.(path|url)$'", throwable=False, verbose=False)
+    if not spew:
+        return []
+
+    paths = {}
+    urls = {}
+    for line in spew.splitlines():
+        key, value = line.split(" ", 1)
+        name, field = key[len("submodule."):].rsplit(".", 1)
+        if field == "path":
+            paths[name] = value
+        else:
+            if value.startswith("./") or value.startswith("../"):
+                value = _resolveRelativeUrl(url, value)
+            urls[name] = value
+
+    output = []
+    for name, path in paths.items():
+        if name in urls:
+            output.append((path, urls[name]))
+    return output
+
+def takeStaged(stageFolder:str, destFolder:str) -> bool:
+    '''
+    Moves a staged repo to its final location.  Waits if the repo is still being staged.  The move is a rename when both
+    folders are on the same file system.
+    :param stageFolder: The staging folder (see `stage`).
+    :param destFolder: The folder where the repo is moved.  It must not exist yet.
+    :return: True if the staged repo was moved, or false if there was no complete staged repo.
+    '''
+    with base.fileLock(stageFolder + ".lock"):
+        if not os.path.isfile(os.path.join(stageFolder, STAGED_MARKER)):
+            return False
+
+        shutil.move(os.path.join(stageFolder, "repo"), destFolder)
+        shutil.rmtree(stageFolder, ignore_errors=True)
+
+    return True
+
+def updateMirror(url:str, mirrorsFolder:str, offline:bool=False) -> str:
+    '''
+    Creates the mirror of a repo, or refreshes it with `git fetch`.  A lock prevents concurrent processes from updating
+    the same mirror at the same time.
+    :param url: The url of the repo.
+    :param mirrorsFolder: The folder which holds the mirrors.
+    :param offline: If true, an existing mirror is used as-is, and a missing mirror is an error.
+    :return: The folder of the mirror.
+    '''
+    mirror = mirrorFolder(url, mirrorsFolder)
+
+    with base.fileLock(mirror + ".lock"):
+        # Mirrors which were created with `git clone --mirror` hold every ref of the remote, so they are created again.
+        if os.path.isdir(mirror) and not offline and \
+                base.evaluate(f"git --git-dir={mirror} config --get remote.origin.mirror", throwable=False,
+                              verbose=False) == "true":
+            print(f"Creating the mirror of {url} again, with only its branches and tags.")
+            shutil.rmtree(mirror)
+
+        if os.path.isdir(mirror):
+            if not offline:
+                base.execute(f"git --git-dir={mirror} fetch --prune origin")
+        elif offline:
+            raise Exception(f"The git mirror cache does not contain {url} (offline mode):  {mirror}")
+        else:
+            tempFolder = mirror + ".tmp"
+            shutil.rmtree(tempFolder, ignore_errors=True)
+            base.execute(f"git clone --bare {url} {tempFolder}")
+            base.execute(f"git --git-dir={tempFolder} config --replace-all remote.origin.fetch {MIRROR_REFSPECS[0]}")
+            for refspec in MIRROR_REFSPECS[1:]:
+                base.execute(f"git --git-dir={tempFolder} config --add remote.origin.fetch {refspec}")
+            # The clone only has the tags which are reachable from the branches.
+            base.execute(f"git --git-dir={tempFolder} fetch --prune origin")
+            os.rename(tempFolder, mirror)
+
+    return mirror
+
+def _resolveRelativeUrl(url:str, relativeUrl:str) -> str:
+    '''
+    Resolves a relative submodule url (such as "../common.git") against the url of the superproject, like git does.
+    '''
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme and parts.netloc + parts.path:
+        path = posixpath.normpath(posixpath.join(parts.path.rstrip("/"), relativeUrl))
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc, path, "", ""))
+
+    return posixpath.normpath(posixpath.join(url.rstrip("/"), relativeUrl))
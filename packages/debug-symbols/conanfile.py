@@ -0,0 +1,28 @@
+from conans import ConanFile
+
+# ----------------
+# Implement the ConanFile
+# ----------------
+class DebugSymbolsConan(ConanFile):
+    '''
+    The debug symbols which `gst-conan create --split-debug` moves out of the binaries of a package (see
+    `gst_conan.build.splitDebugSymbols`).  There is no source or build:  `gst-conan create` runs `conan export-pkg`
+    with the folder of the debug files, under the reference "<package>-debug/<version>@<user>/<channel>" (see
+    `gst_conan.build.debugPackageReference`).  The name comes from that reference, so this recipe serves every package.
+    '''
+    license = "LGPL"
+    url = ["https://github.com/Panopto/gst-conan"]
+    description = "Debug symbols of a GStreamer package, laid out by build id"
+    settings = {
+        "os": ["Linux"],
+        "compiler": None,
+        "build_type": None,
+        "arch": None
+    }
+    options = {}
+    default_options = None
+    build_policy = "never"
+
+    def package_info(self):
+        # For `set debug-file-directory` in gdb.
+        self.user_info.debug_file_directory = self.package_folder
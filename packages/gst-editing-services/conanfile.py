@@ -1,4 +1,4 @@
-from conans import ConanFile, Meson
+from conans import ConanFile
 
 import os
 import shutil
@@ -10,7 +10,7 @@ if sys.version_info[0] < 3:
 # Import helper methods under gst_conan
 # ----------------
 sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
-import gst_conan
+import gst_conan.build
 
 # ----------------
 # Implement the ConanFile
@@ -47,9 +47,7 @@ class GstEditingServicesConan(ConanFile):
             self.deps_cpp_info["gst-plugins-good"].rootpath
         ]
 
-        meson = Meson(self)
-        meson.configure(source_folder=self.name, build_folder="build", pkg_config_paths=pcPaths)
-        meson.build()
+        gst_conan.build.doConanBuild(self, self.packageInfo, pcPaths)
 
     def build_requirements(self):
         self.build_requires(f"gst-plugins-bad/{self.version}@{self.user}/{self.channel}")
@@ -81,6 +79,4 @@ class GstEditingServicesConan(ConanFile):
         self.requires(f"gst-plugins-base/{self.version}@{self.user}/{self.channel}")
 
     def source(self):
-        # This is what actually belongs here.
-        self.run(f"git clone --recurse-submodules https://github.com/gstreamer/{self.name}.git -b {self.gstRevision}")
-        self.run(f"cd {self.name}")
\ No newline at end of file
+        gst_conan.build.doConanSource(self)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from conans import ConanFile, Meson, tools
+from conans import ConanFile, tools
 
 import os
 import sys
@@ -9,7 +9,7 @@ if sys.version_info[0] < 3:
 # Import helper methods under gst_conan
 # ----------------
 sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
-import gst_conan
+import gst_conan.build
 
 
 ffmpeg_wrap_src = """project('FFmpeg', 'c', 'cpp')
@@ -76,9 +76,7 @@ class GstLibav(ConanFile):
             self.deps_cpp_info["gst-plugins-base"].rootpath
         ]
 
-        meson = Meson(self)
-        meson.configure(source_folder=self.name, build_folder="build", pkg_config_paths=pcPaths)
-        meson.build()
+        gst_conan.build.doConanBuild(self, self.packageInfo, pcPaths)
 
     def configure(self):
         # Environment variables that only exist when `conan` is called through gst-conan
@@ -105,9 +103,7 @@ class GstLibav(ConanFile):
         self.requires(f"gst-plugins-base/{self.version}@{self.user}/{self.channel}")
 
     def source(self):
-        # This is what actually belongs here.
-        self.run(f"git clone --recurse-submodules https://github.com/gstreamer/{self.name}.git -b {self.gstRevision}")
-        self.run(f"cd {self.name}")
+        gst_conan.build.doConanSource(self)
         # workaround to accept generated pkgconfig files
         tools.mkdir(f"{self.name}/subprojects/FFmpeg")
         tools.save(f"{self.name}/subprojects/FFmpeg/meson.build", ffmpeg_wrap_src.format(
@@ -9,6 +9,10 @@ class PackageInfo:
 
     self.executables = A list of executable files.
 
+    self.mesonOptions = A tree of meson option profiles, where each keyed entry is:
+        key = The name of the profile (see `gst_conan.build.mesonDefinitions`).
+        value = The meson options (passed to meson as `-Dname=value`) keyed by option name.
+
     self.pkgconfigs = A tree of information about pkg-config files, where each keyed entry is:
         key = The name of the pkg-config file without the '.pc' extension.
         value.lib = The name of the static library without the '.so' or '.dll' extension.
@@ -20,6 +24,8 @@ class PackageInfo:
         value.fedoras = The list of fedora *.rpm packages that must be installed so that the plugin may be built.
         value.lib = If provided, overrides the default library name without the '.a' or '.lib' extension.
             If not provided, this value defaults to f"libgst{key}"
+        value.mesonOption = If provided, overrides the name of the meson option which enables the plugin.  If not
+            provided, this value defaults to the key.
         value.optional = If provided, determines whether the plugin is optional.  Defaults to false.
 
     self.sharedlibs = A list of shared lib files which not already listed within self.pkgconfigs.  File names are listed
@@ -33,6 +39,7 @@ class PackageInfo:
             raise Exception("The parameter must be a dictionary.")
 
         self.executables = []
+        self.mesonOptions = odict()
         self.pkgconfigs = odict()
         self.plugins = odict()
         self.sharedlibs = []
@@ -40,3 +47,15 @@ class PackageInfo:
 
         for key, val in dictionary.items():
             self.__dict__[key] = val
+
+    def buildWeight(self) -> int:
+        '''
+        Estimates the relative size of the package build from the number of plugins and libraries which it produces.
+        This is used to divide the cores between package builds which run at the same time.
+        :return: A positive number.  Larger numbers indicate larger builds.
+        '''
+        output = 1
+        for items in (self.plugins, self.pkgconfigs, self.sharedlibs, self.staticlibs, self.executables):
+            if items:
+                output += len(items)
+        return output
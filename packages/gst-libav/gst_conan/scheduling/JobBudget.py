@@ -0,0 +1,147 @@
+from .. import base
+
+from   collections import OrderedDict as odict
+import json
+import os
+
+class JobBudget:
+    '''
+    A budget of cores and memory which is shared by all of the package builds that run at the same time.
+
+    The budget lives in a json "ledger" file so that it can be shared between `gst-conan` and the `conan` processes
+    which it spawns.  Every package which competes for the budget holds a lease with a weight (the relative size of its
+    build) and a number of jobs (the `-j` value given to ninja).  `gst-conan` registers a package with zero jobs when
+    it starts `conan create` for it, which reserves the package's fair share until its build actually starts.  Leases
+    held by processes which no longer exist are discarded.
+
+    The capacity of the budget is the number of cores, or the number of jobs which fit in memory, whichever is smaller.
+    '''
+
+    # A conservative estimate of the memory used by one compile job.
+    MEMORY_PER_JOB_MB = 512
+
+    def __init__(self, ledgerFile:str):
+        self.ledgerFile = ledgerFile
+
+    def acquire(self, packageName:str, weight:int) -> int:
+        '''
+        Starts (or resizes) the build of a package.  The package receives its fair share of the budget, limited to the
+        jobs which are not already held by other builds.  The result is always at least 1.
+        :param packageName: The package being built.
+        :param weight: The relative size of the package build.  Only used if the package is not already registered.
+        :return: The number of jobs which the build may run.
+        '''
+        with base.fileLock(self.ledgerFile + ".lock"):
+            ledger = self._load()
+            lease = ledger["leases"].setdefault(packageName, odict([("pid", os.getpid()), ("weight", weight),
+                                                                    ("jobs", 0)]))
+            lease["pid"] = os.getpid()
+            lease["jobs"] = max(lease["jobs"], JobBudget._share(ledger, packageName))
+            self._save(ledger)
+            return lease["jobs"]
+
+    def capacity(self) -> int:
+        '''
+        :return: The total number of jobs which can run at the same time.
+        '''
+        with base.fileLock(self.ledgerFile + ".lock"):
+            return JobBudget._capacity(self._load())
+
+    @staticmethod
+    def create(ledgerFile:str, cores:int=None, memoryMb:int=None) -> 'JobBudget':
+        '''
+        Creates a new (empty) budget.
+        :param ledgerFile: The json file where the budget is stored.
+        :param cores: The number of cores in the budget.  Defaults to the number of cores on the machine.
+        :param memoryMb: The memory (in megabytes) in the budget.  Defaults to the physical memory of the machine.
+        :return: The budget.
+        '''
+        if cores == None:
+            cores = os.cpu_count() or 1
+
+        if memoryMb == None:
+            memoryMb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+        output = JobBudget(ledgerFile)
+
+        with base.fileLock(ledgerFile + ".lock"):
+            output._save(odict([("cores", cores), ("memoryMb", memoryMb), ("leases", odict())]))
+
+        return output
+
+    def expect(self, packageName:str, weight:int) -> None:
+        '''
+        Registers a package whose build will start soon, so that builds which start earlier leave room for it.
+        :param packageName: The package.
+        :param weight: The relative size of the package build.
+        :return: Nothing.
+        '''
+        with base.fileLock(self.ledgerFile + ".lock"):
+            ledger = self._load()
+            ledger["leases"][packageName] = odict([("pid", os.getpid()), ("weight", weight), ("jobs", 0)])
+            self._save(ledger)
+
+    def fairShare(self, packageName:str) -> int:
+        '''
+        Determines the number of jobs which the package would receive if it called `acquire` right now.  Nothing is
+        modified.  Builds use this to find out whether they should grow after other builds have finished.
+        :param packageName: The package.
+        :return: The number of jobs.
+        '''
+        with base.fileLock(self.ledgerFile + ".lock"):
+            return JobBudget._share(self._load(), packageName)
+
+    def release(self, packageName:str) -> None:
+        '''
+        Returns the jobs held by the package to the budget.  Does nothing if the package does not hold a lease.
+        :param packageName: The package.
+        :return: Nothing.
+        '''
+        with base.fileLock(self.ledgerFile + ".lock"):
+            ledger = self._load()
+            if ledger["leases"].pop(packageName, None) != None:
+                self._save(ledger)
+
+    @staticmethod
+    def _capacity(ledger:odict) -> int:
+        return max(1, min(ledger["cores"], ledger["memoryMb"] // JobBudget.MEMORY_PER_JOB_MB))
+
+    def _load(self) -> odict:
+        output = base.loadJsonObject(self.ledgerFile)
+
+        # Discard the leases of processes which have died.
+        for packageName, lease in list(output["leases"].items()):
+            try:
+                os.kill(lease["pid"], 0)
+            except ProcessLookupError:
+                del output["leases"][packageName]
+            except PermissionError:
+                pass
+
+        return output
+
+    def _save(self, ledger:odict) -> None:
+        tempFile = self.ledgerFile + ".tmp"
+        with open(tempFile, "w") as writer:
+            json.dump(ledger, writer, indent=4)
+        os.replace(tempFile, self.ledgerFile)
+
+    @staticmethod
+    def _share(ledger:odict, packageName:str) -> int:
+        capacity = JobBudget._capacity(ledger)
+        leases = ledger["leases"]
+
+        used = 0
+        totalWeight = 0
+        for name, lease in leases.items():
+            totalWeight += lease["weight"]
+            if name != packageName:
+                used += lease["jobs"]
+
+        lease = leases.get(packageName)
+        if lease == None or totalWeight == 0:
+            fair = capacity
+        else:
+            fair = capacity * lease["weight"] // totalWeight
+
+        return max(1, min(fair, capacity - used))
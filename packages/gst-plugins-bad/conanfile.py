@@ -1,4 +1,4 @@
-from conans import ConanFile, Meson
+from conans import ConanFile
 
 import os
 import sys
@@ -9,7 +9,7 @@ if sys.version_info[0] < 3:
 # Import helper methods under gst_conan
 # ----------------
 sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
-import gst_conan
+import gst_conan.build
 
 # ----------------
 # Implement the ConanFile
@@ -49,17 +49,7 @@ class GstPluginsBadConan(ConanFile):
         # * 0001-disable-webrtc-example.patch
         #   * fixes https://gitlab.freedesktop.org/gstreamer/gst-plugins-bad/issues/867
         # ---------------------------
-        repoFolder = os.path.join(self.build_folder, self.name)
-        gst_conan.base.execute("git config user.email gst_conan@panopto.com", workingFolder=repoFolder)
-        gst_conan.base.execute("git config user.name  gst_conan", workingFolder=repoFolder)
-
-        patchFolder = os.path.join(self.build_folder, "patches")
-        if os.path.isdir(patchFolder):
-            for file in os.listdir(patchFolder):
-                patchPath = os.path.join(patchFolder, file)
-                if file.endswith(".patch") and os.path.isfile(patchPath):
-                    self.output.info(f"Applying patch {file}")
-                    gst_conan.base.execute(f"git am {patchPath}", workingFolder=repoFolder)
+        gst_conan.build.applyPatches(self, gst_conan.build.repoFolder(self), os.path.join(self.build_folder, "patches"))
 
         # ---------------------------
         # Build as usual
@@ -69,9 +59,7 @@ class GstPluginsBadConan(ConanFile):
             self.deps_cpp_info["gst-plugins-base"].rootpath
         ]
 
-        meson = Meson(self)
-        meson.configure(source_folder=self.name, build_folder="build", pkg_config_paths=pcPaths)
-        meson.build()
+        gst_conan.build.doConanBuild(self, self.packageInfo, pcPaths)
 
     def configure(self):
         # Environment variables that only exist when `conan` is called through gst-conan
@@ -97,6 +85,4 @@ class GstPluginsBadConan(ConanFile):
         self.requires(f"gst-plugins-base/{self.version}@{self.user}/{self.channel}")
 
     def source(self):
-        # Clone
-        self.run(f"git clone --recurse-submodules https://github.com/gstreamer/{self.name}.git -b {self.gstRevision}")
-        self.run(f"cd {self.name}")
+        gst_conan.build.doConanSource(self)
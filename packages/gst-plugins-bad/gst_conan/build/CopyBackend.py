@@ -0,0 +1,132 @@
+# The same exact file exists next to each `conanfile.py` within this repo.
+# We are waiting for a Conan bug to get fixed:  https://github.com/conan-io/conan/issues/3591
+
+from collections import OrderedDict as odict
+
+import errno
+import fcntl
+import os
+import shutil
+import threading
+
+class CopyBackend:
+    '''
+    Copies files with the cheapest method which works.  The methods are tried in this order:
+    * "reflink"  A copy-on-write clone (the FICLONE ioctl), which shares the data blocks until either file is modified.
+        Requires a file system such as btrfs or xfs, and both files on the same file system.
+    * "hardlink"  A second name for the same file.  This is only used where it is safe, i.e. when the source file is
+        never modified in place afterwards (see `allowHardlinks`).  Requires both files on the same file system.
+    * "copy_file_range"  A copy done by the kernel (and possibly offloaded to the storage), without passing the data
+        through user space.  Requires python 3.8.
+    * "copy"  A plain copy with `shutil.copy2`.
+
+    Like `shutil.copy2(follow_symlinks=False)`, links are copied as links, and the permission bits and timestamps are
+    copied along with the data.
+
+    self.methods = The methods to be tried, in order.
+
+    self.counts = The number of files copied by each method, keyed by method name.
+    '''
+
+    METHODS = ["reflink", "hardlink", "copy_file_range", "copy"]
+
+    # From <linux/fs.h>
+    FICLONE = 0x40049409
+
+    # Errors which mean that a method is not supported for a pair of files (so the next method is tried).
+    UNSUPPORTED_ERRORS = {errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS, errno.EPERM,
+                          getattr(errno, "EOPNOTSUPP", errno.ENOTSUP), errno.ENOTSUP}
+
+    def __init__(self, preferred:str="auto", allowHardlinks:bool=True):
+        '''
+        :param preferred: The first method to try ("auto" is the same as "reflink").  The methods after it are still
+        tried when it does not work.
+        :param allowHardlinks: If false, the "hardlink" method is skipped.
+        '''
+        if preferred == "auto":
+            preferred = CopyBackend.METHODS[0]
+        if preferred not in CopyBackend.METHODS:
+            raise Exception(f"Unknown copy backend:  {preferred}  (choices: auto, {', '.join(CopyBackend.METHODS)})")
+
+        self.methods = CopyBackend.METHODS[CopyBackend.METHODS.index(preferred):]
+        if not allowHardlinks and "hardlink" in self.methods:
+            self.methods.remove("hardlink")
+        if not hasattr(os, "copy_file_range") and "copy_file_range" in self.methods:
+            self.methods.remove("copy_file_range")
+
+        self.counts = odict([(method, 0) for method in self.methods + ["symlink"]])
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fromEnvironment() -> 'CopyBackend':
+        '''
+        Creates the backend configured by `gst-conan create`.  GST_CONAN_COPY_BACKEND holds the preferred method
+        (defaults to "auto").  Hardlinks are not used in incremental mode (when GST_CONAN_WORKSPACE is set), since ninja
+        may then rewrite the build output in place.
+        :return: The backend.
+        '''
+        return CopyBackend(os.getenv("GST_CONAN_COPY_BACKEND") or "auto",
+                           allowHardlinks=not os.getenv("GST_CONAN_WORKSPACE"))
+
+    def copy(self, srcFile:str, destFile:str) -> str:
+        '''
+        Copies a file.  An existing destination file is replaced (it is never written through, since it may share its
+        data with another file).
+        :param srcFile: The source file.
+        :param destFile: The destination file.  Its folder must exist.
+        :return: The method which was used.
+        '''
+        if os.path.lexists(destFile):
+            os.remove(destFile)
+
+        if os.path.islink(srcFile):
+            os.symlink(os.readlink(srcFile), destFile)
+            self._count("symlink")
+            return "symlink"
+
+        for method in self.methods:
+            try:
+                if method == "reflink":
+                    self._reflink(srcFile, destFile)
+                elif method == "hardlink":
+                    os.link(srcFile, destFile)
+                elif method == "copy_file_range":
+                    self._copyFileRange(srcFile, destFile)
+                else:
+                    shutil.copy2(srcFile, destFile, follow_symlinks=False)
+            except OSError as e:
+                if method == "copy" or e.errno not in CopyBackend.UNSUPPORTED_ERRORS:
+                    raise
+                if os.path.lexists(destFile):
+                    os.remove(destFile)
+                continue
+
+            self._count(method)
+            return method
+
+    def report(self) -> str:
+        '''
+        :return: A human-readable summary of the methods used so far, such as "12 reflink, 3 symlink".
+        '''
+        with self._lock:
+            used = [f"{count} {method}" for method, count in self.counts.items() if count > 0]
+        return ", ".join(used) if len(used) > 0 else "nothing copied"
+
+    def _copyFileRange(self, srcFile:str, destFile:str) -> None:
+        with open(srcFile, "rb") as src, open(destFile, "wb") as dest:
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        shutil.copystat(srcFile, destFile)
+
+    def _count(self, method:str) -> None:
+        with self._lock:
+            self.counts[method] += 1
+
+    def _reflink(self, srcFile:str, destFile:str) -> None:
+        with open(srcFile, "rb") as src, open(destFile, "wb") as dest:
+            fcntl.ioctl(dest.fileno(), CopyBackend.FICLONE, src.fileno())
+        shutil.copystat(srcFile, destFile)
@@ -0,0 +1,155 @@
+# The same exact file exists next to each `conanfile.py` within this repo.
+# We are waiting for a Conan bug to get fixed:  https://github.com/conan-io/conan/issues/3591
+
+from .BlobStore import BlobStore
+
+from collections import OrderedDict as odict
+
+import concurrent.futures
+import contextlib
+import json
+import os
+import time
+
+class PackageManifest:
+    '''
+    The record of what the package step (see `doConanPackage`) put into a package folder, saved as
+    "gst-conan-manifest.json" at the root of the package folder.  Diffing the manifests of two releases shows where the
+    packages grew, and the hashes allow a package folder to be verified (or cached) without hashing it again.
+
+    self.buildFolder = The build tree which the files were copied from.
+
+    self.files = The packaged files keyed by path (relative to the package folder, sorted).  Each entry has the "size"
+        in bytes, the "sha256" of the content (null for links), the "source" file in the build tree (relative to
+        `self.buildFolder`, or null when it is not known, e.g. for headers copied by the recipe) and the "symlink" target
+        (null unless the file is a link).
+
+    self.phases = The duration (in seconds) of each phase of the package step, in order.
+
+    self.debugFiles = The debug file of each binary whose debug information was split (see `splitDebugSymbols`), keyed
+        by the path of the binary in the package folder, with the path of the debug file in the debug package.  Empty
+        unless the package was created with `--split-debug`.
+
+    self.debugPackage = The reference of the debug package (see `debugPackageReference`), or None.
+
+    self.buildProfile = The timings of the ninja build which produced the build tree (see
+        `gst_conan.profiling.ninjaSummary`), or None if they are not known.
+    '''
+
+    FILENAME = "gst-conan-manifest.json"
+
+    def __init__(self, buildFolder:str=None):
+        self.buildFolder = buildFolder
+        self.files = odict()
+        self.phases = odict()
+        self.debugFiles = odict()
+        self.debugPackage = None
+        self.buildProfile = None
+        self._sources = {}
+
+    def addSource(self, destFile:str, srcFile:str) -> None:
+        '''
+        Records where a packaged file comes from.
+        :param destFile: The absolute path of the file in the package folder.
+        :param srcFile: The absolute path of the file in the build tree.
+        :return: Nothing.
+        '''
+        self._sources[os.path.abspath(destFile)] = srcFile
+
+    def hashes(self, packageFolder:str) -> dict:
+        '''
+        :param packageFolder: The package folder which was scanned.
+        :return: The sha256 of every regular file, keyed by absolute path (see `BlobStore.storeTree`).
+        '''
+        return {os.path.join(packageFolder, relPath): entry["sha256"]
+                for relPath, entry in self.files.items() if entry["sha256"] != None}
+
+    @contextlib.contextmanager
+    def phase(self, name:str):
+        '''
+        Measures the duration of a phase, such as `with manifest.phase("copy"): ...`.  The duration is recorded even if
+        the phase throws.
+        :param name: The name of the phase.
+        '''
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0) + time.monotonic() - start, 3)
+
+    def save(self, packageFolder:str) -> str:
+        '''
+        Writes the manifest into a package folder.
+        :param packageFolder: The package folder.
+        :return: The manifest file.
+        '''
+        manifestFile = os.path.join(packageFolder, PackageManifest.FILENAME)
+        output = odict()
+        output["buildFolder"] = self.buildFolder
+        output["fileCount"] = len(self.files)
+        output["totalSize"] = sum(entry["size"] for entry in self.files.values())
+        output["phases"] = self.phases
+        output["debugFiles"] = self.debugFiles
+        output["debugPackage"] = self.debugPackage
+        output["buildProfile"] = self.buildProfile
+        output["files"] = self.files
+
+        with open(manifestFile, "w") as writer:
+            json.dump(output, writer, indent=4)
+
+        return manifestFile
+
+    def scan(self, packageFolder:str, workers:int=8) -> None:
+        '''
+        Lists (and hashes, in parallel) every file of a package folder into `self.files`.  The manifest file itself is
+        not listed.
+        :param packageFolder: The package folder.
+        :param workers: The number of files which are hashed at the same time.
+        :return: Nothing.
+        '''
+        files = []
+        for root, folders, names in os.walk(packageFolder):
+            for name in names:
+                file = os.path.join(root, name)
+                if os.path.relpath(file, packageFolder) != PackageManifest.FILENAME:
+                    files.append(file)
+        files.sort()
+
+        def describe(file:str) -> odict:
+            entry = odict()
+            entry["size"] = os.lstat(file).st_size
+            isLink = os.path.islink(file)
+            entry["sha256"] = None if isLink else BlobStore.hashFile(file)
+            source = self._sources.get(os.path.abspath(file))
+            if source != None and self.buildFolder != None:
+                source = os.path.relpath(source, self.buildFolder)
+            entry["source"] = source
+            entry["symlink"] = os.readlink(file) if isLink else None
+            return entry
+
+        self.files = odict()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for file, entry in zip(files, executor.map(describe, files)):
+                self.files[os.path.relpath(file, packageFolder)] = entry
+
+    @staticmethod
+    def load(packageFolder:str) -> 'PackageManifest':
+        '''
+        Reads the manifest of a package folder.
+        :param packageFolder: The package folder.
+        :return: The manifest, or None if the package folder has no manifest.
+        '''
+        manifestFile = os.path.join(packageFolder, PackageManifest.FILENAME)
+        if not os.path.isfile(manifestFile):
+            return None
+
+        with open(manifestFile) as reader:
+            data = json.load(reader, object_pairs_hook=odict)
+
+        output = PackageManifest(data.get("buildFolder"))
+        output.phases = data.get("phases", odict())
+        output.debugFiles = data.get("debugFiles", odict())
+        output.debugPackage = data.get("debugPackage")
+        output.buildProfile = data.get("buildProfile")
+        output.files = data.get("files", odict())
+        return output
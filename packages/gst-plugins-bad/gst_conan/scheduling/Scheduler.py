@@ -0,0 +1,66 @@
+from .DependencyGraph import DependencyGraph
+
+from   collections import OrderedDict as odict
+import concurrent.futures
+import sys
+import traceback
+
+class Scheduler:
+    '''
+    Runs a task for every package of a dependency graph.  A package's task is started as soon as the tasks of all of
+    its requirements have succeeded, and at most `jobs` tasks run at the same time.
+
+    When a task fails, no further tasks are started.  The tasks which are already running are allowed to finish, and
+    then an exception is raised which lists every failure.
+    '''
+
+    def __init__(self, graph:DependencyGraph, jobs:int=1):
+        if jobs < 1:
+            raise Exception(f"The number of jobs must be at least 1 (not {jobs}).")
+
+        self.graph = graph
+        self.jobs = jobs
+
+    def run(self, task) -> None:
+        '''
+        Runs the task for every package in the graph.  Throws on error.
+        :param task: A callable which receives the package name.  It signals failure by raising an exception.
+        :return: Nothing.
+        '''
+        order = self.graph.topologicalOrder()
+
+        succeeded = set()
+        failures = odict()
+        running = {}
+        pending = list(order)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while True:
+                # Start everything which is ready (and which fits within the job limit).
+                if len(failures) == 0:
+                    for packageName in list(pending):
+                        if len(running) >= self.jobs:
+                            break
+                        if all(r in succeeded for r in self.graph.requirements[packageName]):
+                            pending.remove(packageName)
+                            running[executor.submit(task, packageName)] = packageName
+
+                if len(running) == 0:
+                    break
+
+                done, _ = concurrent.futures.wait(running.keys(), return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    packageName = running.pop(future)
+                    try:
+                        future.result()
+                        succeeded.add(packageName)
+                    except Exception as e:
+                        print(f"[FAILED] {packageName}", file=sys.stderr)
+                        traceback.print_exc()
+                        failures[packageName] = e
+
+        if len(failures) > 0:
+            message = "Failed to create:  " + ", ".join(failures.keys())
+            if len(pending) > 0:
+                message += ".  Not started:  " + ", ".join(pending)
+            raise Exception(message)
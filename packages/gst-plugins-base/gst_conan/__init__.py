@@ -1,3 +1,2 @@
 from . import base
-from . import build
-from . import commands
\ No newline at end of file
+from . import configuration
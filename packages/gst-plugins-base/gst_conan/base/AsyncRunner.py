@@ -0,0 +1,211 @@
+from .CommandResult import CommandResult
+from .. import profiling
+
+from   collections import deque
+import datetime
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+class AsyncRunner:
+    '''
+    Executes commands on an asyncio event loop, so that the output of several long-running commands (such as concurrent
+    `conan create` commands) is streamed line by line as it is produced.  Each line is printed with a timestamp and the
+    name of its command (e.g. "12:34:56 [gst-plugins-bad] ..."), and appended to the log file of that name.  The output
+    is never buffered as a whole:  only the last lines of each command are kept (see `CommandResult.output`).
+
+    The event loop runs in a background thread between `start` and `stop`, and `run` may be called from any thread.
+    Each command is waited for with `os.wait4`, so that its resource usage is known (see `gst_conan.profiling`).
+
+    Each command runs in a session (and process group) of its own, so that a command which times out is killed along
+    with the processes which it started (such as ninja and the compilers), which would otherwise keep its output pipes
+    open.  Since Ctrl-C then no longer reaches the commands, `stop` interrupts those which are still running.
+
+    The `asyncio` module is imported by the methods which use it, since importing it takes longer than the rest of the
+    `gst-conan` command's startup.
+
+    Fields:
+    * self.logFolder  The folder of the log files ("<name>.log"), or None to only print the output.
+    * self.tailLines  The number of lines kept at the end of the output of each command.
+    * self.profileFile  The file where the resource usage of each command is recorded (see `gst_conan.profiling`), or
+        None for GST_CONAN_PROFILE.
+    '''
+
+    # Lines which are longer are split, so that a command which never prints a newline does not fill the memory.
+    LINE_LIMIT = 64 * 1024
+
+    # How long the output of a command which timed out is still read once its process group is killed.
+    KILL_GRACE_SECONDS = 5
+
+    def __init__(self, logFolder:str=None, tailLines:int=50, profileFile:str=None):
+        self.logFolder = logFolder
+        self.tailLines = tailLines
+        self.profileFile = profileFile
+        self._loop = None
+        self._thread = None
+        self._consoleLock = threading.Lock()
+        self._running = set()
+
+    def run(self, cmd, name:str, cwd:str=None, env:dict=None, timeout:float=None,
+            throwable:bool=True) -> CommandResult:
+        '''
+        Executes a command on the event loop and waits for it (see `runAsync`).
+        :param throwable: If true, an exception is thrown if the command fails or times out (see
+        `CommandResult.check`).
+        :return: The result of the command.
+        '''
+        import asyncio
+
+        if self._loop == None:
+            raise Exception("The AsyncRunner must be started before running commands.")
+
+        result = asyncio.run_coroutine_threadsafe(self.runAsync(cmd, name, cwd, env, timeout), self._loop).result()
+        if throwable:
+            result.check(timeout)
+        return result
+
+    async def runAsync(self, cmd, name:str, cwd:str=None, env:dict=None, timeout:float=None) -> CommandResult:
+        '''
+        Executes a command and streams its standard output and standard error.
+        :param cmd: The command, either as a shell command string (which is lexed) or as a list of arguments.
+        :param name: The name which prefixes the lines of the command, and names its log file.
+        :param cwd: The working folder of the command.
+        :param env: The environment variables.  If None, the default environment variables are used (from os.environ).
+        :param timeout: The number of seconds after which the command is killed.  No limit if None.
+        :return: The result of the command, where `output` holds the last lines of its output.
+        '''
+        import asyncio
+
+        args = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+        logFile = None
+        if self.logFolder != None:
+            os.makedirs(self.logFolder, exist_ok=True)
+            logFile = open(os.path.join(self.logFolder, f"{name}.log"), "a", encoding="utf-8")
+
+        tail = deque(maxlen=self.tailLines)
+        loop = asyncio.get_event_loop()
+        startTime = time.time()
+        start = time.monotonic()
+        timedOut = False
+        try:
+            self._emit(name, f"$ {cmd if isinstance(cmd, str) else ' '.join(shlex.quote(arg) for arg in cmd)}",
+                       False, logFile, tail)
+
+            # The process is waited for with `os.wait4` (rather than by asyncio) to get its resource usage.
+            process = subprocess.Popen(args, cwd=cwd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, start_new_session=True)
+            self._running.add(process.pid)
+            pumps = asyncio.gather(self._pump(process.stdout, name, False, logFile, tail),
+                                   self._pump(process.stderr, name, True, logFile, tail))
+            waiter = loop.run_in_executor(None, os.wait4, process.pid, 0)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            except asyncio.TimeoutError:
+                timedOut = True
+                AsyncRunner._signalGroup(process.pid, signal.SIGKILL)
+            pid, status, rusage = await waiter
+            self._running.discard(process.pid)
+            process.returncode = CommandResult.exitCodeOf(status)
+
+            if timedOut:
+                # A process which left the process group may still hold the pipes open:  its output is not waited for.
+                try:
+                    await asyncio.wait_for(pumps, AsyncRunner.KILL_GRACE_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await pumps
+
+            if timedOut:
+                self._emit(name, f"Killed after {timeout} seconds", True, logFile, tail)
+        finally:
+            if logFile != None:
+                logFile.close()
+
+        result = CommandResult(cmd, cwd, process.returncode, time.monotonic() - start, "\n".join(tail), timedOut,
+                               startTime, rusage)
+        profiling.record(result.profileEntry(name, name, "create"), self.profileFile)
+        return result
+
+    def start(self) -> None:
+        '''
+        Starts the event loop in a background thread.
+        :return: Nothing.
+        '''
+        import asyncio
+
+        self._loop = asyncio.new_event_loop()
+
+        def loopThread() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=loopThread, name="AsyncRunner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''
+        Interrupts (with SIGINT) the process groups of the commands which are still running, such as after Ctrl-C or
+        after another command failed, and stops the event loop.
+        :return: Nothing.
+        '''
+        if self._loop == None:
+            return
+
+        for pid in list(self._running):
+            AsyncRunner._signalGroup(pid, signal.SIGINT)
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def _emit(self, name:str, line:str, isError:bool, logFile, tail:deque) -> None:
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        with self._consoleLock:
+            console = sys.stderr if isError else sys.stdout
+            console.write(f"{timestamp} [{name}] {line}\n")
+            console.flush()
+        if logFile != None:
+            logFile.write(f"{timestamp} {line}\n")
+            logFile.flush()
+        tail.append(line)
+
+    async def _pump(self, pipe, name:str, isError:bool, logFile, tail:deque) -> None:
+        import asyncio
+
+        stream = asyncio.StreamReader(limit=AsyncRunner.LINE_LIMIT)
+        transport, _ = await asyncio.get_event_loop().connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream),
+                                                                         pipe)
+        try:
+            pending = b""
+            while True:
+                chunk = await stream.read(AsyncRunner.LINE_LIMIT)
+                if not chunk:
+                    break
+
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                if len(pending) >= AsyncRunner.LINE_LIMIT:
+                    lines.append(pending)
+                    pending = b""
+
+                for line in lines:
+                    self._emit(name, line.decode("utf-8", errors="replace").rstrip("\r"), isError, logFile, tail)
+
+            if len(pending) > 0:
+                self._emit(name, pending.decode("utf-8", errors="replace").rstrip("\r"), isError, logFile, tail)
+        finally:
+            transport.close()
+
+    @staticmethod
+    def _signalGroup(pid:int, signalNumber:int) -> None:
+        try:
+            os.killpg(pid, signalNumber)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,116 @@
+# The same exact file exists next to each `conanfile.py` within this repo.
+# We are waiting for a Conan bug to get fixed:  https://github.com/conan-io/conan/issues/3591
+
+from collections import OrderedDict as odict
+
+import fnmatch
+import os
+import re
+
+class BuildTreeIndex:
+    '''
+    An in-memory index of the files in a build tree, so that the many lookups of the package step (see `doConanPackage`)
+    do not each walk the whole tree again.  The tree is scanned once with `os.scandir`.  Like `findFiles`, links to files
+    count as files and links to folders are followed.
+
+    self.folder = The root of the build tree.
+
+    self.files = The paths of all files, relative to `self.folder`.
+
+    self.byName = The relative paths of all files, keyed by file name.
+
+    self.sharedObjects = The names of the shared objects (`*.so` and `*.so.<version>` files), keyed by relative folder.
+
+    self.sharedObjectsByStem = The relative folders which contain shared objects, keyed by the part of the file name
+        before ".so".
+    '''
+
+    # Shared objects, and the part of the file name before ".so" as the first group.
+    SHARED_OBJECT_PATTERN = re.compile(r"(.+)\.so(\.[0-9\.]*\d+)?")
+
+    # Shared objects with a version number after the ".so".
+    VERSIONED_PATTERN = re.compile(r".+\.so\.[0-9\.]*\d+")
+
+    def __init__(self, folder:str):
+        self.folder = folder
+        self.files = []
+        self.byName = {}
+        self.sharedObjects = odict()
+        self.sharedObjectsByStem = {}
+
+        pending = [""]
+        while len(pending) > 0:
+            relFolder = pending.pop()
+            with os.scandir(os.path.join(folder, relFolder)) as entries:
+                for entry in entries:
+                    relPath = os.path.join(relFolder, entry.name) if relFolder else entry.name
+                    if entry.is_file():
+                        self._add(relFolder, entry.name, relPath)
+                    elif entry.is_dir():
+                        pending.append(relPath)
+
+        for names in self.sharedObjects.values():
+            names.sort()
+
+    def findFiles(self, pattern:str, recursive:bool=True) -> list:
+        '''
+        Finds the files whose name matches a pattern.
+        :param pattern: The pattern to find.  See the python function: `fnmatch.fnmatch`
+        :param recursive: If false, only the files directly in `self.folder` are found.
+        :return: The list of files, relative to `self.folder`.
+        '''
+        if _isLiteral(pattern):
+            output = list(self.byName.get(pattern, []))
+        else:
+            output = []
+            for name in fnmatch.filter(self.byName.keys(), pattern):
+                output += self.byName[name]
+
+        if not recursive:
+            output = [file for file in output if os.path.dirname(file) == ""]
+
+        return output
+
+    def findSharedObjects(self, pattern:str, recursive:bool=True) -> odict:
+        '''
+        Finds the shared objects whose name (before the ".so") matches a pattern, in the same way as
+        `findSharedObjectGroups`.
+        :param pattern: The wildcard filename pattern for the prefix of the file (before the `.so`).
+        :param recursive: If false, only the files directly in `self.folder` are found.
+        :return: The sorted lists of matching file names, keyed by relative folder.
+        '''
+        pattern0 = pattern + ".so"
+        pattern1 = pattern + ".so.*"
+
+        if _isLiteral(pattern):
+            relFolders = self.sharedObjectsByStem.get(pattern, [])
+        else:
+            relFolders = self.sharedObjects.keys()
+
+        output = odict()
+        for relFolder in relFolders:
+            if relFolder != "" and not recursive:
+                continue
+
+            names = [name for name in self.sharedObjects[relFolder]
+                     if fnmatch.fnmatch(name, pattern0)
+                        or (fnmatch.fnmatch(name, pattern1) and BuildTreeIndex.VERSIONED_PATTERN.fullmatch(name))]
+            if len(names) > 0:
+                output[relFolder] = names
+
+        return output
+
+    def _add(self, relFolder:str, name:str, relPath:str) -> None:
+        self.files.append(relPath)
+        self.byName.setdefault(name, []).append(relPath)
+
+        match = BuildTreeIndex.SHARED_OBJECT_PATTERN.fullmatch(name)
+        if match != None:
+            names = self.sharedObjects.setdefault(relFolder, [])
+            names.append(name)
+            folders = self.sharedObjectsByStem.setdefault(match.group(1), [])
+            if relFolder not in folders:
+                folders.append(relFolder)
+
+def _isLiteral(pattern:str) -> bool:
+    return not any(char in pattern for char in "*?[")
@@ -4,6 +4,8 @@
 from collections import OrderedDict as odict
 
 import os
+import re
+import threading
 
 class PkgConfigFile:
     '''
@@ -32,9 +34,33 @@ class PkgConfigFile:
         Cflags applies here.
 
     Variables:
-    * self.variables
+    * self.variables  The variables defined by the file, in order.  Their values are kept unexpanded, so they can be
+        modified before `save` (see `resolve` for their values).
+
+    Other fields:
+    * self.filename  The file which was loaded, if any.  It defines the `pcfiledir` variable.
+    * self.otherKeywords  The keyword fields which pkg-config does not know about (they are ignored by pkg-config, but
+        written back by `save`).
     '''
 
+    # The keyword fields, mapped to their attribute names.
+    KEYWORDS = odict([("Name", "name"), ("Description", "description"), ("URL", "url"), ("Version", "version"),
+                      ("Requires", "requires"), ("Requires.private", "requiresPrivate"), ("Conflicts", "conflicts"),
+                      ("Cflags", "cflags"), ("Libs", "libs"), ("Libs.private", "libsPrivate")])
+
+    # A line which defines a variable ("name=value") or a keyword field ("Keyword: value").
+    LINE_PATTERN = re.compile(r"([A-Za-z0-9_.]+)\s*([:=])(.*)")
+
+    # A variable reference ("${name}") or an escaped dollar sign ("$$").
+    REFERENCE_PATTERN = re.compile(r"\$\$|\$\{([^}]*)\}")
+
+    # The operators of the version constraints in `Requires` fields.
+    VERSION_OPERATORS = {"=", "<", ">", "<=", ">=", "!="}
+
+    # The files loaded by `fromFile`, keyed by path, along with their modification time and size.
+    _cache = {}
+    _cacheLock = threading.Lock()
+
     def __init__(self):
         # Keyword fields
         self.name = None
@@ -47,10 +73,13 @@ class PkgConfigFile:
         self.cflags = None
         self.libs = None
         self.libsPrivate = None
+        self.otherKeywords = odict()
 
         # Variables
         self.variables = odict()
 
+        self.filename = None
+
     def ensureRequires(self, requirement) -> None:
         '''
         Ensures the requirement is part of self.requires
@@ -79,64 +108,92 @@ class PkgConfigFile:
         elif requirement not in self.requiresPrivate:
             self.requiresPrivate += (" " + requirement)
 
-    def load(self, filename:str):
+    def load(self, filename:str) -> None:
+        '''
+        Parses a pkg-config file.  Like pkg-config, a "#" starts a comment (unless it is escaped as "\\#"), and a line
+        which ends with a backslash continues on the next line.
+        :param filename: The pkg-config file.
+        :return: Nothing.
+        '''
+        self.filename = filename
+
         with open(filename, "r") as reader:
+            pending = ""
             for rawLine in reader:
-                line = rawLine.strip()
-                if len(line) > 0 and not line.startswith("#"):
-                    iColon = line.find(":")
-                    iEquals = line.find("=")
-
-                    lineIsKeyword = False # if not a keyword, then it's a variable
-
-                    if iColon == 0 or iEquals == 1:
-                        raise Exception(f"Pkg-config line starts with ':' or '=' character:  {rawLine}")
-
-                    if iColon == -1 and iEquals == -1:
-                        raise Exception(f"Pkg-config line could not be interpreted:  {rawLine}")
-                    elif iColon == -1:
-                        lineIsKeyword = False
-                    elif iEquals == -1:
-                        lineIsKeyword = True
-                    else:
-                        lineIsKeyword = iColon < iEquals
-
-                    if lineIsKeyword:
-                        key = line[0:iColon]
-                        value = line[iColon+1:].strip()
-                    else:
-                        key = line[0:iEquals]
-                        value = line[iEquals+1:]
-
-                    if lineIsKeyword:
-                        # FIXME:  Remove comments at end of `value` string.
-
-                        if key=="Name":
-                            self.name = value
-                        elif key=="Description":
-                            self.description = value
-                        elif key=="URL":
-                            self.url = value
-                        elif key=="Version":
-                            self.version = value
-                        elif key=="Requires":
-                            self.requires = value
-                        elif key=="Requires.private":
-                            self.requiresPrivate = value
-                        elif key=="Conflicts":
-                            self.conflicts = value
-                        elif key=="Cflags":
-                            self.cflags = value
-                        elif key=="Libs":
-                            self.libs = value
-                        elif key=="Libs.private":
-                            self.libsPrivate = value
-                        else:
-                            raise Exception(f"Pkg-config line starts with unrecognized keyword:  {rawLine}")
-                    else:
-                        # FIXME:  Remove comments at end of `value` string.
-                        # See implementation of `os.path.expandvars` for hints about parsing the line.
-                        self.variables[key] = value
+                rawLine = rawLine.rstrip("\r\n")
+                if rawLine.endswith("\\"):
+                    pending += rawLine[:-1]
+                    continue
+                line = pending + rawLine
+                pending = ""
+
+                line = PkgConfigFile._removeComment(line).strip()
+                if len(line) == 0:
+                    continue
+
+                match = PkgConfigFile.LINE_PATTERN.match(line)
+                if match == None:
+                    raise Exception(f"Pkg-config line could not be interpreted:  {rawLine}")
+
+                key, separator, value = match.group(1), match.group(2), match.group(3).strip()
+                if separator == "=":
+                    self.variables[key] = value
+                elif key in PkgConfigFile.KEYWORDS:
+                    setattr(self, PkgConfigFile.KEYWORDS[key], value)
+                else:
+                    self.otherKeywords[key] = value
+
+    def requiredNames(self, private:bool=False) -> list:
+        '''
+        Lists the names of the packages which are required by this one, without their version constraints.
+        :param private: If true, `Requires.private` is listed rather than `Requires`.
+        :return: The list of package names, in order.
+        '''
+        value = self.resolve(self.requiresPrivate if private else self.requires)
+        if value == None:
+            return []
+
+        output = []
+        skipVersion = False
+        for token in value.replace(",", " ").split():
+            if skipVersion:
+                skipVersion = False
+            elif token in PkgConfigFile.VERSION_OPERATORS:
+                skipVersion = True
+            else:
+                output.append(token)
+
+        return output
+
+    def resolve(self, value:str, overrides:dict=None) -> str:
+        '''
+        Expands the variable references of a value, such as the value of a keyword field.  Variables are only
+        expanded when they are referenced, and each variable is expanded once.
+        :param value: The value, which may reference variables as "${name}".  None is returned as is.
+        :param overrides: The values of variables which override the variables of the file (like the
+        `--define-variable` option of pkg-config).  They are not expanded.
+        :return: The expanded value.
+        '''
+        if value == None:
+            return None
+
+        resolved = dict(overrides) if overrides else {}
+        if "pcfiledir" not in self.variables and "pcfiledir" not in resolved and self.filename != None:
+            resolved["pcfiledir"] = os.path.dirname(os.path.abspath(self.filename))
+
+        return self._expand(value, resolved, [])
+
+    def variable(self, name:str, overrides:dict=None) -> str:
+        '''
+        :param name: The name of a variable.
+        :param overrides: See `resolve`.
+        :return: The expanded value of the variable, or None if it is not defined.
+        '''
+        if overrides and name in overrides:
+            return overrides[name]
+        if name not in self.variables:
+            return None
+        return self.resolve(self.variables[name], overrides)
 
     def save(self, filename:str):
         # ensure the parent folder exists
@@ -147,28 +204,71 @@ class PkgConfigFile:
         with open(filename, "w") as writer:
             # write variables
             for key, value in self.variables.items():
-                writer.write(f"{key}={value}\n")
+                writer.write(f"{key}={PkgConfigFile._escape(value)}\n")
 
             writer.write("\n")
 
             # write keywords
-            if self.name != None:
-                writer.write(f"Name: {self.name}\n")
-            if self.description != None:
-                writer.write(f"Description: {self.description}\n")
-            if self.url != None:
-                writer.write(f"URL: {self.url}\n")
-            if self.version != None:
-                writer.write(f"Version: {self.version}\n")
-            if self.requires != None:
-                writer.write(f"Requires: {self.requires}\n")
-            if self.requiresPrivate != None:
-                writer.write(f"Requires.private: {self.requiresPrivate}\n")
-            if self.conflicts != None:
-                writer.write(f"Conflicts: {self.conflicts}\n")
-            if self.cflags != None:
-                writer.write(f"Cflags: {self.cflags}\n")
-            if self.libs != None:
-                writer.write(f"Libs: {self.libs}\n")
-            if self.libsPrivate != None:
-                writer.write(f"Libs.private: {self.libsPrivate}\n")
+            for keyword, attribute in PkgConfigFile.KEYWORDS.items():
+                value = getattr(self, attribute)
+                if value != None:
+                    writer.write(f"{keyword}: {PkgConfigFile._escape(value)}\n")
+            for keyword, value in self.otherKeywords.items():
+                writer.write(f"{keyword}: {PkgConfigFile._escape(value)}\n")
+
+    def _expand(self, value:str, resolved:dict, stack:list) -> str:
+        def replace(match) -> str:
+            name = match.group(1)
+            if name == None:
+                return "$"
+            if name not in resolved:
+                if name not in self.variables:
+                    raise Exception(f"Variable '{name}' is not defined in {self.filename}")
+                if name in stack:
+                    raise Exception(f"Variable '{name}' is defined in terms of itself in {self.filename}")
+                resolved[name] = self._expand(self.variables[name], resolved, stack + [name])
+            return resolved[name]
+
+        return PkgConfigFile.REFERENCE_PATTERN.sub(replace, value)
+
+    @staticmethod
+    def fromFile(filename:str) -> 'PkgConfigFile':
+        '''
+        Loads a pkg-config file, or reuses the object which was loaded from it before if the file has not changed since
+        (according to its modification time and size).  The object is shared, so it must not be modified.
+        :param filename: The pkg-config file.
+        :return: The parsed file.
+        '''
+        filename = os.path.abspath(filename)
+        info = os.stat(filename)
+        key = (info.st_mtime_ns, info.st_size)
+
+        with PkgConfigFile._cacheLock:
+            cached = PkgConfigFile._cache.get(filename)
+        if cached != None and cached[0] == key:
+            return cached[1]
+
+        output = PkgConfigFile()
+        output.load(filename)
+        with PkgConfigFile._cacheLock:
+            PkgConfigFile._cache[filename] = (key, output)
+        return output
+
+    @staticmethod
+    def _escape(value:str) -> str:
+        return value.replace("#", "\\#")
+
+    @staticmethod
+    def _removeComment(line:str) -> str:
+        output = ""
+        i = 0
+        while i < len(line):
+            if line[i] == "\\" and line[i+1:i+2] == "#":
+                output += "#"
+                i += 2
+            elif line[i] == "#":
+                break
+            else:
+                output += line[i]
+                i += 1
+        return output
@@ -0,0 +1,169 @@
+# The same exact file exists next to each `conanfile.py` within this repo.
+# We are waiting for a Conan bug to get fixed:  https://github.com/conan-io/conan/issues/3591
+
+from .PkgConfigFile import PkgConfigFile
+from .. import base
+
+from collections import OrderedDict as odict
+
+import os
+import shlex
+
+class PkgConfigResolver:
+    '''
+    Evaluates the effective `Cflags` and `Libs` of packages like `pkg-config --cflags --libs` does, following the
+    `Requires` chains across a search path of folders (such as the package folders of the gstreamer conan packages).
+    The files are parsed once (see `PkgConfigFile.fromFile`), so that many queries do not spawn many processes.
+
+    self.path = The folders where the `*.pc` files are looked up, in order.
+
+    self.overrides = The values of variables which override those of every file (like `--define-variable`).
+    '''
+
+    def __init__(self, path:list, overrides:dict=None):
+        self.path = list(path)
+        self.overrides = overrides if overrides != None else {}
+
+    def cflags(self, names:list) -> list:
+        '''
+        :param names: The names of the packages (the `*.pc` file names without the extension).
+        :return: The compiler flags of the packages and of all of the packages they require (publicly or privately, as
+        pkg-config does), without duplicates.
+        '''
+        flags = []
+        for pcFile in self.requiredFiles(names, True):
+            flags += self._split(pcFile, pcFile.cflags)
+
+        return _unique(flags, keepLast=False)
+
+    def find(self, name:str) -> PkgConfigFile:
+        '''
+        Finds the file of a package in the search path.  Throws if there is none.
+        :param name: The name of the package.
+        :return: The parsed file.
+        '''
+        for folder in self.path:
+            pcFilename = os.path.join(folder, f"{name}.pc")
+            if os.path.isfile(pcFilename):
+                return PkgConfigFile.fromFile(pcFilename)
+
+        raise Exception(f"Package '{name}' was not found in the pkg-config search path:  {os.pathsep.join(self.path)}")
+
+    def libs(self, names:list, static:bool=False) -> list:
+        '''
+        :param names: The names of the packages (the `*.pc` file names without the extension).
+        :param static: If true, the private requirements and `Libs.private` are included, for static linking.
+        :return: The link flags of the packages and of all of the packages they require, in link order.  Each library
+        is listed once, after every library which needs it.
+        '''
+        flags = []
+        for pcFile in self.requiredFiles(names, static):
+            flags += self._split(pcFile, pcFile.libs)
+            if static:
+                flags += self._split(pcFile, pcFile.libsPrivate)
+
+        return _unique(flags, keepLast=True)
+
+    def requiredFiles(self, names:list, private:bool) -> list:
+        '''
+        Lists the files of packages and of the packages they require (recursively).
+        :param names: The names of the packages.
+        :param private: If true, `Requires.private` is followed along with `Requires`.
+        :return: The parsed files, each package before the packages it requires.
+        '''
+        visited = set()
+        postOrder = []
+
+        def visit(name:str, stack:list) -> None:
+            if name in visited:
+                return
+            if name in stack:
+                raise Exception(f"The pkg-config requirements are circular:  {' -> '.join(stack + [name])}")
+
+            pcFile = self.find(name)
+            for requiredName in pcFile.requiredNames() + (pcFile.requiredNames(True) if private else []):
+                visit(requiredName, stack + [name])
+
+            visited.add(name)
+            postOrder.append(pcFile)
+
+        for name in names:
+            visit(name, [])
+
+        return list(reversed(postOrder))
+
+    def structuredFlags(self, names:list, static:bool=False) -> odict:
+        '''
+        Sorts the flags of `cflags` and `libs` by kind, as build systems (and conan's `cpp_info`) expect them.
+        :param names: The names of the packages.
+        :param static: See `libs`.
+        :return: The "includeDirs", "defines" and other "cflags", and the "libDirs", "libs" (the names given to "-l")
+        and other "linkFlags", each as a list.
+        '''
+        output = odict([("includeDirs", []), ("defines", []), ("cflags", []),
+                        ("libDirs", []), ("libs", []), ("linkFlags", [])])
+
+        for flag in self.cflags(names):
+            if flag.startswith("-I") and len(flag) > 2:
+                output["includeDirs"].append(flag[2:])
+            elif flag.startswith("-D") and len(flag) > 2:
+                output["defines"].append(flag[2:])
+            else:
+                output["cflags"].append(flag)
+
+        for flag in self.libs(names, static):
+            if flag.startswith("-L") and len(flag) > 2:
+                output["libDirs"].append(flag[2:])
+            elif flag.startswith("-l") and len(flag) > 2:
+                output["libs"].append(flag[2:])
+            else:
+                output["linkFlags"].append(flag)
+
+        return output
+
+    def variable(self, name:str, variableName:str) -> str:
+        '''
+        :param name: The name of a package.
+        :param variableName: The name of a variable of its file.
+        :return: The expanded value of the variable, or None if it is not defined.
+        '''
+        return self.find(name).variable(variableName, self.overrides)
+
+    def _split(self, pcFile:PkgConfigFile, value:str) -> list:
+        value = pcFile.resolve(value, self.overrides)
+        return shlex.split(value) if value else []
+
+    @staticmethod
+    def fromEnvironment(extraFolders:list=None, systemPath:bool=False) -> 'PkgConfigResolver':
+        '''
+        Creates a resolver whose search path is the given folders followed by PKG_CONFIG_PATH.
+        :param extraFolders: The folders which are searched first.
+        :param systemPath: If true, the default search path of pkg-config is searched last (see `systemPath`).
+        :return: The resolver.
+        '''
+        path = list(extraFolders) if extraFolders else []
+        path += [folder for folder in os.getenv("PKG_CONFIG_PATH", "").split(os.pathsep) if folder]
+        if systemPath:
+            path += PkgConfigResolver.systemPath()
+        return PkgConfigResolver(path)
+
+    @staticmethod
+    def systemPath() -> list:
+        '''
+        :return: The default search path of the pkg-config installed on this machine (where the *.pc files of the
+        system packages are), or an empty list if pkg-config is not installed.
+        '''
+        output = base.evaluate("pkg-config --variable pc_path pkg-config", throwable=False, verbose=False)
+        return [folder for folder in output.split(os.pathsep) if folder] if output else []
+
+def _unique(flags:list, keepLast:bool) -> list:
+    # Libraries ("-l") are kept at their last occurrence so they come after the libraries which need them.  Other flags
+    # (such as "-I" and "-L") are kept at their first occurrence.
+    output = []
+    for i, flag in enumerate(flags):
+        if keepLast and flag.startswith("-l"):
+            if flag not in flags[i+1:]:
+                output.append(flag)
+        elif flag not in output:
+            output.append(flag)
+    return output
@@ -1,36 +1,119 @@
 from   collections import OrderedDict as odict
-from   conans import ConanFile
+import concurrent.futures
 import fnmatch
 import glob
+import json
 import os
 import re
+import shlex
 import shutil
+import signal
+import subprocess
 import sys
+import time
 import traceback
+import typing
 
+from .BlobStore import BlobStore
+from .BuildTreeIndex import BuildTreeIndex
+from .CopyBackend import CopyBackend
+from .CopyPlan import CopyPlan
+from .PackageManifest import PackageManifest
 from .PkgConfigFile import PkgConfigFile
+from .PkgConfigResolver import PkgConfigResolver
 
 from .. import base
+from .. import ccache
 from .. import configuration
-
-def conanBuildTypes() -> list:
+from .. import profiling
+from .. import scheduling
+from .. import sources
+
+# conan is imported by the functions which run within a recipe, rather than here, so that the `gst-conan` command
+# starts quickly.
+if typing.TYPE_CHECKING:
+    from conans import ConanFile
+
+# The output of the conan commands which were already executed (see `_probeConan`).
+_conanProbes = {}
+
+# The variables of the pkg-config files which are rewritten for the layout of the package folders (see
+# `doConanPackage`).  The first three are always defined, and the others are only rewritten if the file defines them.
+PC_VARIABLES = odict([("exec_prefix", "${prefix}"),
+                      ("libdir", "${prefix}/lib"),
+                      ("includedir", "${prefix}/include"),
+                      ("pluginsdir", "${prefix}/plugins"),
+                      ("toolsdir", "${prefix}/bin"),
+                      ("datarootdir", "${prefix}/data"),
+                      ("datadir", "${prefix}/data"),
+                      ("girdir", "${prefix}/data/gir-1.0"),
+                      ("typelibdir", "${libdir}/girepository-1.0")])
+
+def applyPatches(conanfile:'ConanFile', repoFolder:str, patchFolder:str) -> None:
+    '''
+    Applies the patches of a package (in the order of their file names) to its repo with `git am`.  Patches which are
+    already applied (for example in a workspace which is reused by incremental builds) are skipped.
+    :param conanfile: The conanfile at the time when the `build` function is being called.
+    :param repoFolder: The repo (see `repoFolder`).
+    :param patchFolder: The folder with the "*.patch" files.  Nothing is done if it does not exist.
+    :return: Nothing.
+    '''
+    if not os.path.isdir(patchFolder):
+        return
+
+    base.execute("git config user.email gst_conan@panopto.com", workingFolder=repoFolder)
+    base.execute("git config user.name  gst_conan", workingFolder=repoFolder)
+
+    for file in sorted(os.listdir(patchFolder)):
+        patchPath = os.path.join(patchFolder, file)
+        if file.endswith(".patch") and os.path.isfile(patchPath):
+            if 0 == base.execute(f"git apply --reverse --check --quiet {patchPath}", throwable=False, verbose=False,
+                                 workingFolder=repoFolder):
+                conanfile.output.info(f"Patch {file} is already applied")
+                continue
+            conanfile.output.info(f"Applying patch {file}")
+            base.execute(f"git am {patchPath}", workingFolder=repoFolder)
+
+def conanPackageFolders(storageFolder:str, packageName:str, version:str, user:str, channel:str,
+                        build_type:str) -> list:
     '''
-    These are the conan build types that we allow.
-    :return: The list of types allowed.
+    Finds the binary packages within the local conan cache which were built for the given reference and build_type.
+    :param storageFolder: The conan storage folder (see `conanStorageFolder`).
+    :param packageName: The name of the conan package.
+    :param version: The version of the conan package.
+    :param user: The conan user.
+    :param channel: The conan channel.
+    :param build_type: The conan build_type setting.
+    :return: The list of package folders (sorted).
     '''
-    return ["Debug", "Release"]
+    output = []
+
+    packagesFolder = os.path.join(storageFolder, packageName, version, user, channel, "package")
+    if not os.path.isdir(packagesFolder):
+        return output
+
+    for packageId in sorted(os.listdir(packagesFolder)):
+        conaninfoFile = os.path.join(packagesFolder, packageId, "conaninfo.txt")
+        if os.path.isfile(conaninfoFile):
+            for line in base.readNonEmptyLines(conaninfoFile):
+                if line.strip() == f"build_type={build_type}":
+                    output.append(os.path.join(packagesFolder, packageId))
+                    break
+
+    return output
 
 def conanVersion() -> str:
     # Here we don't use conans.__version__ because the library version may be different than the version on the path.
-    spew = base.evaluate("conan --version")
+    spew = _probeConan("conan --version")
     idx = spew.rfind(" ")+1
     output = spew[idx:]
     return output
 
 def conanStorageFolder() -> str:
-    return base.evaluate("conan config get storage.path")
+    return _probeConan("conan config get storage.path")
 
-def copyFiles(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True) -> list:
+def copyFiles(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True, index:BuildTreeIndex=None,
+              plan:CopyPlan=None) -> list:
     '''
     Copies files having a specified pattern within the source folder.  This function exists because I had problems using
     `self.copy` inside the conanfile.
@@ -39,12 +122,14 @@ def copyFiles(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True) ->
     :param destFolder: The destination folder (where files are copied to).
     :param keepPath:  If true, the relative path underneath `srcFolder` will be preserved for the copy into `destFolder`.
     If false, the files are copied directly under destFolder.
+    :param index: If given, the files are looked up in this index of `srcFolder` rather than by walking the folder.
+    :param plan: If given, the copies are added to this plan rather than executed right away.
     :return: The list of copied files relative to the `destFolder`.
     '''
 
     output = []
 
-    files = findFiles(pattern, srcFolder)
+    files = findFiles(pattern, srcFolder, index=index)
 
     for file in files:
         srcFile = os.path.join(srcFolder, file)
@@ -56,21 +141,16 @@ def copyFiles(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True) ->
 
         output.append(destFile)
 
-        destFile = os.path.join(destFolder, destFile)
-
-        parentFolder = os.path.dirname(destFile)
-        if parentFolder != None and len(parentFolder) > 0:
-            os.makedirs(parentFolder, exist_ok=True)
-
-        shutil.copy2(srcFile, destFile, follow_symlinks=False)
+        _copyFile(srcFile, os.path.join(destFolder, destFile), plan)
 
     return output
 
-def copyOneFile(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True) -> str:
+def copyOneFile(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True, index:BuildTreeIndex=None,
+                plan:CopyPlan=None) -> str:
     '''
     This is the same as `copyFile` except it throws if the number of files copied is not exactly one.
     '''
-    output = copyFiles(pattern, srcFolder, destFolder, keepPath)
+    output = copyFiles(pattern, srcFolder, destFolder, keepPath, index, plan)
     if len(output) == 0:
         raise Exception(f"Failed to find {pattern} within folder: {srcFolder}")
 
@@ -79,14 +159,15 @@ def copyOneFile(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True)
 
     return output[0]
 
-def copyOneSharedObjectFileGroup(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True) -> list:
+def copyOneSharedObjectFileGroup(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True,
+                                 index:BuildTreeIndex=None, plan:CopyPlan=None) -> list:
     '''
     The same as `copySharedObjectFileGroups` except there must be exactly one group, otherwise it throws.
     '''
 
     output = []
 
-    groups = findSharedObjectGroups(pattern, srcFolder)
+    groups = findSharedObjectGroups(pattern, srcFolder, index=index)
 
     if len(groups) == 0:
         raise Exception(f"Failed to find {pattern} within folder: {srcFolder}")
@@ -105,17 +186,12 @@ def copyOneSharedObjectFileGroup(pattern:str, srcFolder:str, destFolder:str, kee
 
             output.append(destFile)
 
-            destFile = os.path.join(destFolder, destFile)
-
-            parentFolder = os.path.dirname(destFile)
-            if parentFolder != None and len(parentFolder) > 0:
-                os.makedirs(parentFolder, exist_ok=True)
-
-            shutil.copy2(srcFile, destFile, follow_symlinks=False)
+            _copyFile(srcFile, os.path.join(destFolder, destFile), plan)
 
     return output
 
-def copySharedObjectFileGroups(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True) -> list:
+def copySharedObjectFileGroups(pattern:str, srcFolder:str, destFolder:str, keepPath:bool=True,
+                               index:BuildTreeIndex=None, plan:CopyPlan=None) -> list:
     '''
     Each *.so file can have multiple companions with a version number appended after the `.so` suffix.  The companions
     can be files or links to files.  For example:
@@ -134,14 +210,16 @@ def copySharedObjectFileGroups(pattern:str, srcFolder:str, destFolder:str, keepP
     :param destFolder: The destination folder (where files are copied to).
     :param keepPath:  If true, the relative path underneath `srcFolder` will be preserved for the copy into `destFolder`.
     If false, the files are copied directly under destFolder.
+    :param index: If given, the files are looked up in this index of `srcFolder` rather than by walking the folder.
+    :param plan: If given, the copies are added to this plan rather than executed right away.
     :return: The list of copied files relative to the `destFolder`.
     '''
     output = []
 
-    groups = findSharedObjectGroups(pattern, srcFolder)
+    groups = findSharedObjectGroups(pattern, srcFolder, index=index)
 
     for group in groups:
-        for file in groups:
+        for file in group:
             srcFile = os.path.join(srcFolder, file)
 
             if keepPath:
@@ -151,17 +229,12 @@ def copySharedObjectFileGroups(pattern:str, srcFolder:str, destFolder:str, keepP
 
             output.append(destFile)
 
-            destFile = os.path.join(destFolder, destFile)
-
-            parentFolder = os.path.dirname(destFile)
-            if parentFolder != None and len(parentFolder) > 0:
-                os.makedirs(parentFolder, exist_ok=True)
-
-            shutil.copy2(srcFile, destFile, follow_symlinks=False)
+            _copyFile(srcFile, os.path.join(destFolder, destFile), plan)
 
     return output
 
-def copytree(srcFolder:str, destFolder:str, includeSubfolders:bool=True, onlyNewerSources:bool=True, ignoreFolders:set=None):
+def copytree(srcFolder:str, destFolder:str, includeSubfolders:bool=True, onlyNewerSources:bool=True, ignoreFolders:set=None,
+             backend:CopyBackend=None):
     '''
     Copy elements under `srcFolder` to under `destFolder`.
     :param srcFolder: The source folder.
@@ -169,8 +242,12 @@ def copytree(srcFolder:str, destFolder:str, includeSubfolders:bool=True, onlyNew
     :param includeSubfolders:  If true, subfolders are also copied (with full contents).
     :param onlyNewerSources:  If true, a file is only copied if it does not exist at the destination location, or if the
     file at the destination location is older than the file to be copied.
+    :param backend: The backend which copies each file.  Defaults to the one configured by `gst-conan create` (see
+    `CopyBackend.fromEnvironment`).
     :return: None
     '''
+    if backend == None:
+        backend = CopyBackend.fromEnvironment()
 
     if not os.path.isdir(srcFolder):
         raise Exception("The source folder is not valid.")
@@ -182,34 +259,92 @@ def copytree(srcFolder:str, destFolder:str, includeSubfolders:bool=True, onlyNew
         dest = os.path.join(destFolder, item)
         if os.path.isdir(src):
             if includeSubfolders and (ignoreFolders == None or not (item in ignoreFolders)):
-                copytree(src, dest)
+                copytree(src, dest, backend=backend)
         else:
             doCopy = True
             if onlyNewerSources and os.path.isfile(dest):
                 doCopy = os.path.getmtime(src) > os.path.getmtime(dest)
             if doCopy:
-                shutil.copy2(src, dest)
+                backend.copy(src, dest)
 
-def dockerfileChoices() -> list:
+def debugPackageReference(packageName:str, version:str, user:str, channel:str) -> str:
     '''
-    The list of choices for docker containers which can be used to build the conan packages.  This is basically
-    the list of folders under `gst-conan/distros` (where each folder contains a dockerfile).
-    :return:
+    Gets the reference of the companion package which holds the split debug symbols of a package (see
+    `splitDebugSymbols`).  Consumers only install it to debug.
+    :param packageName: The name of the conan package.
+    :param version: The version of the conan package.
+    :param user: The conan user.
+    :param channel: The conan channel.
+    :return: The conan reference, such as "gstreamer-debug/1.14.4@panopto/stable".
     '''
-    distrosFolder = base.gstConanDistrosFolder()
-
-    output = list(set(glob.glob(distrosFolder + "/*/Dockerfile")))
-    for i, dockerfile in enumerate(output):
-        output[i] = os.path.basename(os.path.dirname(dockerfile))
-
-    output.sort()
-
-    return output
+    return f"{packageName}-debug/{version}@{user}/{channel}"
 
-def doConanPackage(conanfile:ConanFile, packageInfo:configuration.PackageInfo, buildOutputFolder:str) -> None:
+def doConanBuild(conanfile:'ConanFile', packageInfo:configuration.PackageInfo, pkgConfigPaths:list=None) -> None:
+    '''
+    This is typically called from the conanfile during the `build` function.  Runs meson on the source folder (which
+    is named after the package) to configure the "build" folder, and then runs ninja.
+
+    When the package is created through `gst-conan create`, the number of ninja jobs is taken from the job budget which
+    is shared with the other package builds running at the same time (see `gst_conan.scheduling.JobBudget`).  If
+    GST_CONAN_CCACHE is set, the compilers are wrapped by ccache with that cache folder, and the hits and misses of this
+    build are reported to the folder given by GST_CONAN_CCACHE_REPORTS (see `gst_conan.ccache`).
+
+    If GST_CONAN_WORKSPACE is set (incremental mode), the source folder and the meson build folder are kept in that
+    workspace rather than in the conan cache (see `workspaceFolders`), and are linked into the conan build folder.  The
+    build folder is only configured once, so later builds just run ninja, which rebuilds what has changed.
+    :param conanfile: The conanfile at the time when the `build` function is being called.
+    :param packageInfo: The package information.
+    :param pkgConfigPaths: The folders where meson will look for pkg-config files (typically the root folders of the
+    required packages).
+    :return: Nothing.
+    '''
+    from conans import tools
+
+    baseFolder = conanfile.build_folder
+    folders = workspaceFolders(conanfile)
+    if folders != None:
+        baseFolder = os.path.dirname(folders[0])
+        for link, target in [(conanfile.name, folders[0]), ("build", folders[1])]:
+            link = os.path.join(conanfile.build_folder, link)
+            if os.path.islink(link):
+                os.remove(link)
+            elif os.path.isdir(link):
+                shutil.rmtree(link)
+            os.makedirs(target, exist_ok=True)
+            os.symlink(target, link)
+
+    ccacheFolder = os.getenv("GST_CONAN_CCACHE") or None
+    if ccacheFolder == None:
+        _mesonBuild(conanfile, packageInfo, pkgConfigPaths)
+        return
+
+    statsLog = os.path.join(conanfile.build_folder, "ccache-stats.log")
+    if os.path.exists(statsLog):
+        os.remove(statsLog)
+    before = ccache.readStats(ccacheFolder)
+
+    with tools.environment_append(ccache.environment(ccacheFolder, baseFolder, statsLog)):
+        _mesonBuild(conanfile, packageInfo, pkgConfigPaths)
+
+    reportsFolder = os.getenv("GST_CONAN_CCACHE_REPORTS")
+    if reportsFolder:
+        ccache.writeReport(reportsFolder, conanfile.name, before, statsLog, ccacheFolder)
+
+@profiling.recipePhase("package")
+def doConanPackage(conanfile:'ConanFile', packageInfo:configuration.PackageInfo, buildOutputFolder:str) -> None:
     '''
     This is typically called from the conanfile during from the `package` function.  This method executes most of the
     logic around copying build output, but it does not copy header files.  The caller must do that.
+
+    If GST_CONAN_DEBUG_SYMBOLS is set, the debug information of the packaged binaries is moved into separate files under
+    that folder, out of the package (see `splitDebugSymbols`).
+
+    If GST_CONAN_BLOB_STORE is set, the packaged files are then replaced by hardlinks into that blob store, so that
+    identical files are only stored once across package folders (see `BlobStore`).  The headers are included only if
+    the caller copies them beforehand.
+
+    Finally, the package folder gets a manifest of its files, with their hashes and sources, the duration of each phase
+    of this method, and the timings of the steps of the ninja build (see `PackageManifest`).
     :param conanfile: The conanfile at the time whent the `package` function is being called.
     :param packageInfo: The package information.
     :param buildOutputFolder: The folder where build output can be found.
@@ -231,21 +366,38 @@ def doConanPackage(conanfile:ConanFile, packageInfo:configuration.PackageInfo, b
         extLib = ".a"
         extSo = ".so"
 
+        # Scan the build output once for all of the lookups below.  The copies are collected in a plan, and executed
+        # in parallel at the end.  Lookups which fail are reported together with the failed copies.
+        manifest = PackageManifest(buildOutputFolder)
+        with manifest.phase("index"):
+            index = BuildTreeIndex(buildOutputFolder)
+        plan = CopyPlan()
+        lookupStart = time.monotonic()
+
+        def planCopy(copyFunction, *args, **kwargs) -> bool:
+            try:
+                copyFunction(*args, index=index, plan=plan, **kwargs)
+                return True
+            except Exception as e:
+                plan.addError(str(e))
+                return False
+
         # Copy executables to 'bin' folder
         for exe in packageInfo.executables:
-            copyOneFile(f"{exe}{extExe}",
-                        srcFolder=buildOutputFolder,
-                        destFolder=os.path.join(conanfile.package_folder, "bin"),
-                        keepPath=False)
+            planCopy(copyOneFile, f"{exe}{extExe}",
+                     srcFolder=buildOutputFolder,
+                     destFolder=os.path.join(conanfile.package_folder, "bin"),
+                     keepPath=False)
 
         # Copy static libs to 'lib' folder
         for lib in packageInfo.staticlibs:
-            copyOneFile(f"{lib}{extLib}",
-                        srcFolder=buildOutputFolder,
-                        destFolder=os.path.join(conanfile.package_folder, "lib"),
-                        keepPath=False)
+            planCopy(copyOneFile, f"{lib}{extLib}",
+                     srcFolder=buildOutputFolder,
+                     destFolder=os.path.join(conanfile.package_folder, "lib"),
+                     keepPath=False)
 
         # Copy plugins to 'plugins' folder
+        missingPlugins = False
         if packageInfo.plugins:
             for pluginName, pluginInfo in packageInfo.plugins.items():
                 if pluginInfo.get("optional"):
@@ -262,17 +414,18 @@ def doConanPackage(conanfile:ConanFile, packageInfo:configuration.PackageInfo, b
 
                     destFolder = os.path.join(conanfile.package_folder, "plugins")
 
-                    try:
-                        if conanfile.settings.os == "Linux":
-                            copyOneSharedObjectFileGroup(lib, buildOutputFolder, destFolder, keepPath=False)
-                        else:
-                            copyOneFile(f"{lib}{extSo}", buildOutputFolder, destFolder, keepPath=False)
-                    except Exception:
+                    if conanfile.settings.os == "Linux":
+                        found = planCopy(copyOneSharedObjectFileGroup, lib, buildOutputFolder, destFolder, keepPath=False)
+                    else:
+                        found = planCopy(copyOneFile, f"{lib}{extSo}", buildOutputFolder, destFolder, keepPath=False)
+
+                    if not found:
                         conanfile.output.error(f"Failed to find the file {lib}{extSo}.")
-                        conanfile.output.error(f"You may need to install some packages on your machine.")
-                        conanfile.output.error(f"Look for machine setup instructions:  https://github.com/Panopto/gst-conan")
-                        innerException = sys.exc_info()[0]
-                        raise Exception(f"Failed to find the file {lib}{extSo}.") from innerException
+                        missingPlugins = True
+
+        if missingPlugins:
+            conanfile.output.error(f"You may need to install some packages on your machine.")
+            conanfile.output.error(f"Look for machine setup instructions:  https://github.com/Panopto/gst-conan")
 
         # Start a list of sharedlibs to be copied.
         if packageInfo.sharedlibs:
@@ -296,60 +449,100 @@ def doConanPackage(conanfile:ConanFile, packageInfo:configuration.PackageInfo, b
 
                 gir = pcInfo.get("gir")
                 if gir != None:
-                    copyOneFile(f"{gir}.gir", buildOutputFolder, destGirFolder, keepPath=False)
-                    copyOneFile(f"{gir}.typelib", buildOutputFolder, destTypelibFolder, keepPath=False)
+                    planCopy(copyOneFile, f"{gir}.gir", buildOutputFolder, destGirFolder, keepPath=False)
+                    planCopy(copyOneFile, f"{gir}.typelib", buildOutputFolder, destTypelibFolder, keepPath=False)
+
+                srcPcFile = os.path.join(srcPcFolder, f"{pcName}.pc")
+                if not os.path.isfile(srcPcFile):
+                    plan.addError(f"Failed to find {pcName}.pc within folder: {srcPcFolder}")
+                    continue
 
                 # Copy the original pkg-config file
-                shutil.copy2(src=os.path.join( srcPcFolder, f"{pcName}.pc"),
-                             dst=os.path.join(destPcFolder, f"{pcName}.pc"))
+                plan.add(srcPcFile, os.path.join(destPcFolder, f"{pcName}.pc"))
 
                 # Load the pkg-config file, modify, and save
                 pcFile = PkgConfigFile()
-                pcFile.load(os.path.join(srcPcFolder, f"{pcName}.pc"))
+                pcFile.load(srcPcFile)
 
                 pcFile.variables["prefix"] = conanfile.package_folder
-                pcFile.variables["exec_prefix"] = "${prefix}"
-                pcFile.variables["libdir"] = "${prefix}/lib"
-                pcFile.variables["includedir"] = "${prefix}/include"
-
-                if pcFile.variables.get("pluginsdir"):
-                    pcFile.variables["pluginsdir"] = "${prefix}/plugins"
-
-                if pcFile.variables.get("toolsdir"):
-                    pcFile.variables["toolsdir"] = "${prefix}/bin"
-
-                if pcFile.variables.get("datarootdir"):
-                    pcFile.variables["datarootdir"] = "${prefix}/data"
-
-                if pcFile.variables.get("datadir"):
-                    pcFile.variables["datadir"] = "${prefix}/data"
-
-                if pcFile.variables.get("girdir"):
-                    pcFile.variables["girdir"] = "${prefix}/data/gir-1.0"
-
-                if pcFile.variables.get("typelibdir"):
-                    pcFile.variables["typelibdir"] = "${libdir}/girepository-1.0"
+                for name, value in PC_VARIABLES.items():
+                    if name in ("exec_prefix", "libdir", "includedir") or pcFile.variables.get(name):
+                        pcFile.variables[name] = value
 
                 # This is where conan's cmake generator expects the *.pc files to be.
                 pcFile.save(os.path.join(conanfile.package_folder, f"{pcName}.pc"))
+                manifest.addSource(os.path.join(conanfile.package_folder, f"{pcName}.pc"), srcPcFile)
 
         # Copy shared libs to 'lib' folder
         for lib in sharedlibs:
             if conanfile.settings.os == "Linux":
-                copyOneSharedObjectFileGroup(lib,
-                                             srcFolder=buildOutputFolder,
-                                             destFolder=os.path.join(conanfile.package_folder, "lib"),
-                                             keepPath=False)
+                planCopy(copyOneSharedObjectFileGroup, lib,
+                         srcFolder=buildOutputFolder,
+                         destFolder=os.path.join(conanfile.package_folder, "lib"),
+                         keepPath=False)
             else:
-                copyOneFile(f"{lib}{extSo}",
-                            srcFolder=buildOutputFolder,
-                            destFolder=os.path.join(conanfile.package_folder, "lib"),
-                            keepPath=False)
+                planCopy(copyOneFile, f"{lib}{extSo}",
+                         srcFolder=buildOutputFolder,
+                         destFolder=os.path.join(conanfile.package_folder, "lib"),
+                         keepPath=False)
+
+        manifest.phases["lookup"] = round(time.monotonic() - lookupStart, 3)
+
+        with manifest.phase("copy"):
+            plan.execute()
+        conanfile.output.info(f"Copied {len(plan.copies)} files ({plan.backend.report()}).")
+        for destFile, srcFile in plan.copies.items():
+            manifest.addSource(destFile, srcFile)
+
+        # Resolve the flags of the pkg-config files, so that consumers do not need to run pkg-config.
+        if packageInfo.pkgconfigs:
+            with manifest.phase("flags"):
+                dependencyFolders = [conanfile.deps_cpp_info[name].rootpath for name in conanfile.deps_cpp_info.deps]
+                try:
+                    pkgConfigFlags(conanfile.package_folder, list(packageInfo.pkgconfigs.keys()), dependencyFolders)
+                except Exception as e:
+                    conanfile.output.warn(f"The pkg-config flags were not resolved:  {e}")
+
+        # Move the debug information out of the packaged binaries, into the companion debug package (see
+        # `splitDebugSymbols`), which `gst-conan create` exports once this package is created.
+        debugSymbolsFolder = os.getenv("GST_CONAN_DEBUG_SYMBOLS")
+        if debugSymbolsFolder:
+            debugFolder = os.path.join(debugSymbolsFolder, conanfile.name)
+            with manifest.phase("split-debug"):
+                manifest.debugFiles = splitDebugSymbols(conanfile.package_folder, debugFolder)
+            manifest.debugPackage = debugPackageReference(conanfile.name, conanfile.version, conanfile.user,
+                                                          conanfile.channel)
+            conanfile.output.info(f"Split the debug symbols of {len(manifest.debugFiles)} files into "
+                                  f"{manifest.debugPackage}.")
+
+        with manifest.phase("hash"):
+            manifest.scan(conanfile.package_folder)
+
+        # Deduplicate the package folder against the other package folders (see `BlobStore`).  The content does not
+        # change, so the hashes of the manifest are reused.
+        blobStoreFolder = os.getenv("GST_CONAN_BLOB_STORE")
+        if blobStoreFolder:
+            with manifest.phase("dedup"):
+                stats = BlobStore(blobStoreFolder).storeTree(conanfile.package_folder,
+                                                             hashes=manifest.hashes(conanfile.package_folder))
+            conanfile.output.info(f"Deduplicated {stats['deduplicated']} of {stats['files']} files "
+                                  f"({stats['savedBytes'] / (1024 * 1024):.1f} MB) in the blob store.")
+
+        # Keep the timings of the ninja build, which would otherwise be lost with the build folder.
+        with manifest.phase("build-profile"):
+            try:
+                manifest.buildProfile = profiling.ninjaSummary(buildOutputFolder)
+            except Exception as e:
+                conanfile.output.warn(f"The ninja log was not summarized:  {e}")
+
+        manifest.save(conanfile.package_folder)
+        conanfile.output.info(f"Packaged {len(manifest.files)} files in " +
+                              ", ".join(f"{name} {seconds:.2f}s" for name, seconds in manifest.phases.items()))
     except:
         conanfile.output.error(traceback.format_exc())
         raise
 
-def doConanPackageInfo(conanfile:ConanFile, packageInfo:configuration.PackageInfo) -> None:
+def doConanPackageInfo(conanfile:'ConanFile', packageInfo:configuration.PackageInfo) -> None:
     '''
     This is typically called from the conanfile during from the `package_info` function.  This method executes
     all of the logic around attaching user_info and cpp_info to the conan package.
@@ -391,19 +584,95 @@ def doConanPackageInfo(conanfile:ConanFile, packageInfo:configuration.PackageInf
         if packageInfo.plugins and len(packageInfo.plugins) > 0:
             conanfile.user_info.plugins = os.path.join(conanfile.cpp_info.rootpath, "plugins")
 
+        # The flags which the package step resolved from the pkg-config files (see `pkgConfigFlags`).
+        flagsFile = os.path.join(conanfile.cpp_info.rootpath, "gst-conan-flags.json")
+        flags = base.loadJsonObject(flagsFile, False)
+        if flags != None:
+            cppInfo = flags["cppInfo"]
+            for folder in cppInfo.get("includeDirs", []):
+                if folder not in conanfile.cpp_info.includedirs:
+                    conanfile.cpp_info.includedirs.append(folder)
+            for folder in cppInfo.get("libDirs", []):
+                if folder not in conanfile.cpp_info.libdirs:
+                    conanfile.cpp_info.libdirs.append(folder)
+            conanfile.cpp_info.defines += cppInfo.get("defines", [])
+            conanfile.cpp_info.cflags += cppInfo.get("cflags", [])
+            conanfile.cpp_info.cxxflags += cppInfo.get("cflags", [])
+
+            # The libs of the package are already in `cpp_info.libs`, so only the system libs are added (as flags).
+            ownLibs = [lib[3:] if lib.startswith("lib") else lib for lib in conanfile.cpp_info.libs]
+            linkFlags = [f"-l{lib}" for lib in cppInfo.get("libs", []) if f"{lib}{extSo}" not in ownLibs]
+            linkFlags += cppInfo.get("linkFlags", [])
+            conanfile.cpp_info.sharedlinkflags += linkFlags
+            conanfile.cpp_info.exelinkflags += linkFlags
+
+            conanfile.user_info.flags = flagsFile
+
     except:
         conanfile.output.error(traceback.format_exc())
         raise
 
-def findFiles(pattern:str, folder:str, recursive:bool=True, prefix=None) -> list:
+@profiling.recipePhase("source")
+def doConanSource(conanfile:'ConanFile') -> None:
+    '''
+    This is typically called from the conanfile during the `source` function.  Clones the upstream repo of the package
+    (with submodules) into a folder named after the package, and checks out `conanfile.gstRevision`.
+
+    When the package is created through `gst-conan create`, the clone goes through the git mirror cache (see
+    `gst_conan.sources`), which is located by the GST_CONAN_GIT_MIRRORS environment variable.  If GST_CONAN_OFFLINE
+    is "1" then the mirrors are not refreshed, so the clone does not use the network.  If GST_CONAN_SHALLOW is "1"
+    then only the tip of the revision is fetched (see `gst_conan.sources.shallowClone`).
+
+    If GST_CONAN_STAGING is set, `gst-conan create` prefetches the repos of all packages into that folder while other
+    packages are compiling.  The staged repo is then moved into place (waiting for the prefetch to finish if needed)
+    instead of being cloned again, provided that it is at the commit given for this package by GST_CONAN_SHAS (a json
+    object of the shas which `gst-conan create` resolved).  Otherwise it is staged again.
+
+    If GST_CONAN_WORKSPACE is set (incremental mode), the repo is cloned into the workspace instead (see
+    `workspaceFolders`), unless it is already there, and it is linked into the source folder.  The repo in the workspace
+    belongs to the developer, so it is never updated or reset.
+    :param conanfile: The conanfile at the time when the `source` function is being called.
+    :return: Nothing.
+    '''
+    mirrorsFolder = os.getenv("GST_CONAN_GIT_MIRRORS") or None
+    offline = os.getenv("GST_CONAN_OFFLINE") == "1"
+    shallow = os.getenv("GST_CONAN_SHALLOW") == "1"
+    stagingFolder = os.getenv("GST_CONAN_STAGING") or None
+
+    url = gitRepoUrl(conanfile.name)
+    destFolder = os.path.join(conanfile.source_folder, conanfile.name)
+
+    folders = workspaceFolders(conanfile)
+    if folders != None:
+        if not os.path.isdir(folders[0]):
+            sources.clone(url, conanfile.gstRevision, folders[0], mirrorsFolder, offline, shallow)
+        if os.path.islink(destFolder):
+            os.remove(destFolder)
+        os.symlink(folders[0], destFolder)
+        return
+
+    if stagingFolder != None:
+        stageFolder = sources.stageFolder(stagingFolder, conanfile.name, conanfile.gstRevision, shallow)
+        expectedSha = json.loads(os.getenv("GST_CONAN_SHAS") or "{}").get(conanfile.name)
+        sources.stage(url, conanfile.gstRevision, stageFolder, mirrorsFolder, offline, shallow, expectedSha)
+        if sources.takeStaged(stageFolder, destFolder):
+            return
+
+    sources.clone(url, conanfile.gstRevision, destFolder, mirrorsFolder, offline, shallow)
+
+def findFiles(pattern:str, folder:str, recursive:bool=True, prefix=None, index:BuildTreeIndex=None) -> list:
     '''
     Find a file from the given folder having the given pattern.
     :param pattern: The pattern to find.  See the python function: `fnmatch.fnmatch`
     :param folder: The folder inside which to search.  Results will be relative to this folder.
     :param recursive:  If true, sub-folders are searched.
     :param prefix: The superordinate path that is joined (prepended) to each element of the output.
+    :param index: If given, the files are looked up in this index of `folder` rather than by walking the folder.
     :return: The list of files discovered.
     '''
+    if index != None:
+        return [file if prefix == None else os.path.join(prefix, file) for file in index.findFiles(pattern, recursive)]
+
     output = []
 
     for item in os.listdir(folder):
@@ -423,7 +692,8 @@ def findFiles(pattern:str, folder:str, recursive:bool=True, prefix=None) -> list
 
     return output
 
-def findSharedObjectGroups(pattern:str, folder:str, recursive:bool=True, prefix=None) -> list:
+def findSharedObjectGroups(pattern:str, folder:str, recursive:bool=True, prefix=None,
+                           index:BuildTreeIndex=None) -> list:
     '''
     Find a set of shared objects from the given folder having the given pattern.
 
@@ -446,10 +716,19 @@ def findSharedObjectGroups(pattern:str, folder:str, recursive:bool=True, prefix=
     :param folder: The folder inside which to search.  Results will be relative to this folder.
     :param recursive:  If true, sub-folders are searched.
     :param prefix: The superordinate path that is joined (prepended) to each element of the output.
+    :param index: If given, the files are looked up in this index of `folder` rather than by walking the folder.
     :return: The list of lists.  Each inner list represents a single set of *.so files.
     '''
     output = []
 
+    if index != None:
+        for relFolder, files in index.findSharedObjects(pattern, recursive).items():
+            if prefix != None:
+                relFolder = os.path.join(prefix, relFolder)
+            for fileGroup in groupSoFiles(files):
+                output.append([os.path.join(relFolder, file) for file in fileGroup])
+        return output
+
     pattern0 = pattern + ".so"
     pattern1 = pattern + ".so.*"
 
@@ -483,6 +762,14 @@ def findSharedObjectGroups(pattern:str, folder:str, recursive:bool=True, prefix=
 
     return output
 
+def gitRepoUrl(packageName:str) -> str:
+    '''
+    Gets the url of the upstream git repo from which a package is built.
+    :param packageName: The name of the conan package (which is also the name of the gstreamer repo).
+    :return: The url.
+    '''
+    return f"https://github.com/gstreamer/{packageName}.git"
+
 def groupSoFiles(sortedList:list) -> list:
     '''
     Groups a list of *.so files into sets.
@@ -524,5 +811,443 @@ def groupSoFiles(sortedList:list) -> list:
 
     return output
 
+def gstConanStateFolder(storageFolder:str=None) -> str:
+    '''
+    Gets the folder where gst-conan keeps its own state (such as build stamps).  It lives inside the conan storage
+    folder so that it is shared with the `--docker` containers, which mount the conan storage folder.
+    :param storageFolder: The conan storage folder.  If None, it is queried from conan.
+    :return: The absolute folder path.
+    '''
+    if storageFolder == None:
+        storageFolder = conanStorageFolder()
+    return os.path.join(os.path.expanduser(storageFolder), ".gst-conan")
+
+def linkFarm(packageFolders:list, destFolder:str, subFolders:list, hardlinks:bool=False) -> int:
+    '''
+    Merges the given sub-folders of several package folders into a single tree of links, e.g. one "lib" folder with the
+    libraries of every package.  Links within the packages (such as "libfoo.so -> libfoo.so.0") are reproduced as they
+    are.  The sub-folders of `destFolder` are replaced.
+
+    Throws if two packages have different files with the same path, with all such paths.
+    :param packageFolders: The package folders.
+    :param destFolder: The folder where the merged sub-folders are created.
+    :param subFolders: The names of the sub-folders to merge, such as "lib".
+    :param hardlinks: If true, files are hardlinked (the package folders must then be on the same file system), and
+    otherwise they are linked with absolute symlinks.
+    :return: The number of files in the farm.
+    '''
+    sourceFolders = odict()
+    errors = []
+    for packageFolder in packageFolders:
+        for subFolder in subFolders:
+            for root, folders, names in os.walk(os.path.join(packageFolder, subFolder)):
+                for name in names:
+                    srcFile = os.path.join(root, name)
+                    relPath = os.path.relpath(srcFile, packageFolder)
+                    previous = sourceFolders.get(relPath)
+                    if previous == None:
+                        sourceFolders[relPath] = srcFile
+                    elif not _sameContent(previous, srcFile):
+                        errors.append(f"{relPath} is in both {previous} and {srcFile}")
+
+    if len(errors) > 0:
+        raise Exception(f"{len(errors)} conflicting file(s):\n    " + "\n    ".join(errors))
+
+    for subFolder in subFolders:
+        shutil.rmtree(os.path.join(destFolder, subFolder), ignore_errors=True)
+
+    for relPath, srcFile in sourceFolders.items():
+        destFile = os.path.join(destFolder, relPath)
+        os.makedirs(os.path.dirname(destFile), exist_ok=True)
+        if os.path.islink(srcFile):
+            os.symlink(os.readlink(srcFile), destFile)
+        elif hardlinks:
+            os.link(srcFile, destFile)
+        else:
+            os.symlink(os.path.abspath(srcFile), destFile)
+
+    return len(sourceFolders)
+
 def mesonBuildTypes() -> list:
-    return ["plain", "debug", "debugoptimized", "release"]
\ No newline at end of file
+    return ["plain", "debug", "debugoptimized", "release"]
+
+def mesonDefinitions(packageInfo:configuration.PackageInfo, profile:str, repoFolder:str) -> odict:
+    '''
+    Gets the meson options (`-Dname=value`) of a package build for an option profile.  The options are taken from the
+    profile in `packageInfo.mesonOptions` (if any).  In addition, the "minimal" profile disables everything which the
+    package step would throw away:  every plugin which is not listed in `packageInfo.plugins`, as well as the tests,
+    examples, benchmarks and docs.  Only options which the repo declares in its "meson_options.txt" are disabled this
+    way, so the same profile works for all revisions.  A plugin option (named after the folder of its plugins) is kept
+    if it is the `mesonOption` of a listed plugin, or if the meson.build files of its folder build the library of a
+    listed plugin, since many options are not named after their plugins (e.g. "v4l2" for "video4linux2").
+    :param packageInfo: The package information.
+    :param profile: The name of the profile.  The "default" profile leaves the upstream defaults alone.
+    :param repoFolder: The repo of the package.
+    :return: The meson options, keyed by option name.
+    '''
+    output = odict()
+
+    if profile == "minimal":
+        declared = readMesonOptions(os.path.join(repoFolder, "meson_options.txt"))
+
+        wanted = set()
+        wantedLibs = set()
+        for pluginName, pluginInfo in packageInfo.plugins.items():
+            wanted.add((pluginInfo or {}).get("mesonOption", pluginName))
+            wantedLibs.add((pluginInfo or {}).get("lib", f"libgst{pluginName}"))
+
+        for name, optionType in declared.items():
+            # Plugin options are named after the folder of the plugin.
+            pluginFolders = [os.path.join(repoFolder, folder, name) for folder in ["gst", "ext", "sys"]
+                             if os.path.isdir(os.path.join(repoFolder, folder, name))]
+            isPlugin = len(pluginFolders) > 0
+            if isPlugin and name not in wanted and any(f"lib{library}" in wantedLibs for folder in pluginFolders
+                                                       for library in _mesonLibraries(folder)):
+                wanted.add(name)
+            isExtra = name in ["benchmarks", "doc", "docs", "examples", "gtk_doc", "tests"]
+            if (isPlugin and name not in wanted) or isExtra:
+                if optionType == "feature":
+                    output[name] = "disabled"
+                elif optionType == "boolean":
+                    output[name] = "false"
+            elif optionType == "boolean" and name.startswith("disable_") and name[len("disable_"):] in \
+                    ["examples", "gtkdoc", "tests"]:
+                output[name] = "true"
+
+    for name, value in packageInfo.mesonOptions.get(profile, {}).items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        output[name] = str(value)
+
+    return output
+
+def pkgConfigFlags(packageFolder:str, pcNames:list, dependencyFolders:list) -> odict:
+    '''
+    Resolves the transitive flags of the pkg-config files of a package (see `PkgConfigResolver`) and saves them as
+    "gst-conan-flags.json" in the package folder, so that consumers do not need to run pkg-config.  Paths within the
+    package folder are saved relative to it.
+
+    The file has the flags of each pkg-config file (under "pkgconfigs"), and under "cppInfo" the flags of all of them
+    merged for `doConanPackageInfo`.  The merged flags leave out the include folders, lib folders and libs of the
+    dependency packages, since conan propagates those from the `cpp_info` of each dependency.
+    :param packageFolder: The package folder, which has the "<name>.pc" files of the package.
+    :param pcNames: The names of the pkg-config files of the package.
+    :param dependencyFolders: The package folders of the conan dependencies (where the other *.pc files are found).
+    :return: The saved data.
+    '''
+    resolver = PkgConfigResolver.fromEnvironment([packageFolder] + dependencyFolders, systemPath=True)
+
+    def isWithin(path:str, folder:str) -> bool:
+        return os.path.abspath(path) == folder or os.path.abspath(path).startswith(folder + os.sep)
+
+    def relative(path:str) -> str:
+        return os.path.relpath(path, packageFolder) if isWithin(path, packageFolder) else path
+
+    def isDependencyPath(path:str) -> bool:
+        return any(isWithin(path, folder) for folder in dependencyFolders)
+
+    def isDependencyLib(lib:str) -> bool:
+        return any(glob.glob(os.path.join(folder, "lib", f"lib{lib}.*")) for folder in dependencyFolders)
+
+    output = odict([("pkgconfigs", odict()), ("cppInfo", odict())])
+    for pcName in pcNames:
+        flags = resolver.structuredFlags([pcName])
+        flags["includeDirs"] = [relative(folder) for folder in flags["includeDirs"]]
+        flags["libDirs"] = [relative(folder) for folder in flags["libDirs"]]
+        flags["requires"] = [os.path.basename(pcFile.filename)[:-len(".pc")]
+                             for pcFile in resolver.requiredFiles([pcName], False)][1:]
+        output["pkgconfigs"][pcName] = flags
+
+        for key in ["includeDirs", "defines", "cflags", "libDirs", "libs", "linkFlags"]:
+            merged = output["cppInfo"].setdefault(key, [])
+            for value in flags[key]:
+                if key in ("includeDirs", "libDirs") and isDependencyPath(value):
+                    continue
+                if key == "libs" and isDependencyLib(value):
+                    continue
+                if value not in merged:
+                    merged.append(value)
+
+    with open(os.path.join(packageFolder, "gst-conan-flags.json"), "w") as writer:
+        json.dump(output, writer, indent=4)
+
+    return output
+
+def readMesonOptions(mesonOptionsFile:str) -> odict:
+    '''
+    Reads the options declared in a "meson_options.txt" file.
+    :param mesonOptionsFile: The file.  If it does not exist, there are no options.
+    :return: The type of each option ("boolean", "feature", "combo", ...), keyed by option name.
+    '''
+    output = odict()
+    if not os.path.isfile(mesonOptionsFile):
+        return output
+
+    with open(mesonOptionsFile, "r") as reader:
+        text = reader.read()
+
+    for match in re.finditer(r"option\s*\(\s*'([^']+)'\s*,\s*type\s*:\s*'([^']+)'", text):
+        output[match.group(1)] = match.group(2)
+
+    return output
+
+def repoFolder(conanfile:'ConanFile') -> str:
+    '''
+    Gets the repo which is built, during the `build` function.  This is the copy of the source folder in the conan build
+    folder, or the repo in the workspace in incremental mode (see `workspaceFolders`).
+    :param conanfile: The conanfile at the time when the `build` function is being called.
+    :return: The absolute folder path.
+    '''
+    folders = workspaceFolders(conanfile)
+    if folders != None:
+        return folders[0]
+    return os.path.join(conanfile.build_folder, conanfile.name)
+
+def runNinjaWithinBudget(conanfile:'ConanFile', buildFolder:str, budget:scheduling.JobBudget, weight:int,
+                         pollSeconds:float=5.0) -> None:
+    '''
+    Runs ninja with a number of jobs taken from the shared job budget.  Ninja cannot change its number of jobs while it
+    runs, so whenever the fair share of this build grows substantially (because other builds have finished), ninja is
+    interrupted and restarted with the larger number of jobs.  Ninja is incremental, so only the jobs which were in
+    flight are repeated.  The jobs are returned to the budget when the build finishes.  The steps of every run are
+    recorded for the build profile (see `profiling.ninjaRun`).
+    :param conanfile: The conanfile at the time when the `build` function is being called.
+    :param buildFolder: The meson build folder.
+    :param budget: The job budget.
+    :param weight: The relative size of this build (see `PackageInfo.buildWeight`).
+    :param pollSeconds: How often the budget is checked for a larger share.
+    :return: Nothing.  Throws if ninja fails.
+    '''
+    from conans import AutoToolsBuildEnvironment, tools
+
+    packageName = conanfile.name
+
+    try:
+        jobs = budget.acquire(packageName, weight)
+        buildStart = profiling.startNinjaBuild(buildFolder)
+
+        with tools.environment_append(AutoToolsBuildEnvironment(conanfile).vars):
+            while True:
+                conanfile.output.info(f"Running ninja with {jobs} jobs (of {budget.capacity()}).")
+                sys.stdout.flush()
+
+                with profiling.ninjaRun(buildFolder, buildStart):
+                    process = subprocess.Popen(["ninja", "-C", buildFolder, f"-j{jobs}"])
+                    interrupted = False
+
+                    while True:
+                        try:
+                            process.wait(timeout=pollSeconds)
+                            break
+                        except subprocess.TimeoutExpired:
+                            pass
+
+                        share = budget.fairShare(packageName)
+                        if not interrupted and share >= jobs + 2 and share * 2 >= jobs * 3:
+                            conanfile.output.info(f"Restarting ninja to grow from {jobs} to {share} jobs.")
+                            interrupted = True
+                            process.send_signal(signal.SIGINT)
+
+                if not interrupted:
+                    if process.returncode != 0:
+                        raise Exception(f"ninja failed with exit code {process.returncode}:  {buildFolder}")
+                    break
+
+                jobs = budget.acquire(packageName, weight)
+    finally:
+        budget.release(packageName)
+
+def splitDebugSymbols(packageFolder:str, debugFolder:str, workers:int=None) -> odict:
+    '''
+    Moves the debug information of every ELF file (executables, shared libs and plugins) of a package folder into a
+    separate ".debug" file, and leaves a GNU debuglink in the stripped file.  The files are processed in parallel.
+
+    The debug files go outside of the package folder, into `debugFolder`, which becomes the companion debug package
+    (see `debugPackageReference`).  They are laid out by build id (".build-id/ab/cdef....debug"), which is where gdb
+    looks for them after `set debug-file-directory <debug package folder>`, wherever the packages are.  Files without a
+    build id are left as they are, since gdb could not find their debug file.
+
+    Since hardlinks share their content with the build folder (or the blob store), a file with more than one link is
+    copied before it is stripped.
+    :param packageFolder: The package folder.
+    :param debugFolder: The folder of the debug files of this package.  It is emptied first.
+    :param workers: The number of files which are processed at the same time.  Defaults to the number of cores.
+    :return: The debug file of each stripped file, relative to `packageFolder` and `debugFolder` respectively (see
+    `PackageManifest.debugFiles`).
+    '''
+    shutil.rmtree(debugFolder, ignore_errors=True)
+
+    files = []
+    for root, folders, names in os.walk(packageFolder):
+        for name in names:
+            file = os.path.join(root, name)
+            if os.path.isfile(file) and not os.path.islink(file):
+                with open(file, "rb") as reader:
+                    if reader.read(4) == b"\x7fELF":
+                        files.append(file)
+
+    def split(file:str) -> str:
+        headers = base.evaluate(f"readelf -S -n --wide {shlex.quote(file)}", verbose=False)
+        buildId = re.search(r"Build ID:\s*([0-9a-f]{3,})", headers)
+        if ".debug_info" not in headers or buildId == None:
+            return None
+
+        buildId = buildId.group(1)
+        debugFile = os.path.join(debugFolder, ".build-id", buildId[:2], buildId[2:] + ".debug")
+        os.makedirs(os.path.dirname(debugFile), exist_ok=True)
+        base.execute(f"objcopy --only-keep-debug {shlex.quote(file)} {shlex.quote(debugFile)}", verbose=False)
+
+        if os.stat(file).st_nlink > 1:
+            temporaryFile = file + ".tmp"
+            shutil.copy2(file, temporaryFile)
+            os.replace(temporaryFile, file)
+
+        # The debuglink records the name and the CRC of the debug file, which gdb checks once it finds the file by id.
+        base.execute(f"objcopy --strip-debug --add-gnu-debuglink={shlex.quote(debugFile)} {shlex.quote(file)}",
+                     verbose=False)
+        return debugFile
+
+    output = odict()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for file, debugFile in zip(files, executor.map(split, files)):
+            if debugFile != None:
+                output[os.path.relpath(file, packageFolder)] = os.path.relpath(debugFile, debugFolder)
+
+    return output
+
+def workspaceFolders(conanfile:'ConanFile') -> tuple:
+    '''
+    Gets the folders of a package in the incremental mode workspace, which is located by the GST_CONAN_WORKSPACE
+    environment variable.  Each package has a repo, shared by all build types, and a meson build folder per build type.
+    :param conanfile: The conanfile.
+    :return: A tuple with the repo folder and the meson build folder, or None if not in incremental mode.
+    '''
+    workspaceFolder = os.getenv("GST_CONAN_WORKSPACE") or None
+    if workspaceFolder == None:
+        return None
+
+    packageFolder = os.path.join(workspaceFolder, conanfile.name)
+    return (os.path.join(packageFolder, "source"),
+            os.path.join(packageFolder, f"build-{str(conanfile.settings.build_type).lower()}"))
+
+def _copyFile(srcFile:str, destFile:str, plan:CopyPlan=None) -> None:
+    if plan != None:
+        plan.add(srcFile, destFile)
+        return
+
+    parentFolder = os.path.dirname(destFile)
+    if parentFolder != None and len(parentFolder) > 0:
+        os.makedirs(parentFolder, exist_ok=True)
+
+    CopyBackend.fromEnvironment().copy(srcFile, destFile)
+
+def _mesonBuild(conanfile:'ConanFile', packageInfo:configuration.PackageInfo, pkgConfigPaths:list=None) -> None:
+    from conans import Meson
+
+    # In incremental mode, meson must record the workspace folders rather than the links in the conan build folder.
+    folders = workspaceFolders(conanfile)
+    buildFolder = folders[1] if folders != None else os.path.join(conanfile.build_folder, "build")
+
+    profile = os.getenv("GST_CONAN_MESON_PROFILE") or "default"
+    defs = mesonDefinitions(packageInfo, profile, repoFolder(conanfile))
+    conanfile.output.info(f"Meson option profile \"{profile}\":  {dict(defs)}")
+
+    # Remember the options and the compilers (which `--ccache` changes), so that a build folder which is reused (see
+    # `workspaceFolders`) can be reconfigured when they change.  Meson only reads the compilers when a build folder is
+    # first configured, so the build folder is wiped when they change.  Likewise when an option which was set before is
+    # no longer set (such as the plugins which the "minimal" profile disables), since `meson configure` cannot reset an
+    # option to its default.
+    configurationFile = os.path.join(buildFolder, "gst-conan-meson-options.json")
+    compilers = odict((var, os.getenv(var)) for var in ["CC", "CXX"])
+    previous = base.loadJsonObject(configurationFile, False) if os.path.isfile(configurationFile) else None
+
+    meson = Meson(conanfile)
+    with profiling.phase(conanfile.name, "configure"):
+        if os.path.isfile(os.path.join(buildFolder, "build.ninja")):
+            if previous == None or previous.get("compilers") != compilers:
+                reason = f"the compilers have changed to {dict(compilers)}"
+            else:
+                droppedOptions = [name for name in previous.get("definitions", {}) if name not in defs]
+                reason = f"{len(droppedOptions)} options are no longer set" if droppedOptions else None
+            if reason != None:
+                conanfile.output.warn(f"The build folder is wiped, since {reason}:  {buildFolder}")
+                shutil.rmtree(buildFolder)
+                os.makedirs(buildFolder)
+
+        if not os.path.isfile(os.path.join(buildFolder, "build.ninja")):
+            meson.configure(source_folder=repoFolder(conanfile), build_folder=buildFolder,
+                            pkg_config_paths=pkgConfigPaths, defs=defs)
+        elif previous.get("definitions") != defs:
+            base.execute(f"meson configure {buildFolder} " +
+                         " ".join(f"-D{name}={value}" for name, value in defs.items()))
+
+    with open(configurationFile, "w") as writer:
+        json.dump(odict([("definitions", defs), ("compilers", compilers)]), writer, indent=4)
+
+    with profiling.phase(conanfile.name, "build"):
+        budgetFile = os.getenv("GST_CONAN_JOB_BUDGET")
+        if budgetFile:
+            runNinjaWithinBudget(conanfile, buildFolder, scheduling.JobBudget(budgetFile), packageInfo.buildWeight())
+        else:
+            with profiling.ninjaRun(buildFolder, profiling.startNinjaBuild(buildFolder)):
+                meson.build(build_dir=buildFolder)
+
+def _mesonLibraries(folder:str) -> set:
+    # The names of the libraries (i.e. the plugins) which the meson.build files of a folder build, such as
+    # "gstvideo4linux2" for the folder "sys/v4l2".  Libraries whose name is not a literal are missed.
+    output = set()
+    for root, folders, names in os.walk(folder):
+        if "meson.build" in names:
+            with open(os.path.join(root, "meson.build"), encoding="utf-8", errors="replace") as reader:
+                output.update(re.findall(r"\b(?:shared_|static_|both_)?library\s*\(\s*['\"](gst[A-Za-z0-9_]+)['\"]",
+                                         reader.read()))
+    return output
+
+def _mtime(file:str) -> int:
+    return os.stat(file).st_mtime_ns if os.path.exists(file) else None
+
+def _probeConan(cmd:str) -> str:
+    # Each conan command takes about a second (conan is a large python program), so their output is cached in memory
+    # and on disk.  It is reused as long as the conan executable (e.g. after an upgrade) and its configuration are the
+    # same.
+    conanExecutable = shutil.which("conan")
+    if conanExecutable == None:
+        return base.evaluate(cmd)
+
+    conanHome = os.path.join(os.path.expanduser(os.getenv("CONAN_USER_HOME") or "~"), ".conan")
+    key = [conanExecutable, _mtime(conanExecutable), conanHome, _mtime(os.path.join(conanHome, "conan.conf")),
+           os.getenv("CONAN_STORAGE_PATH")]
+    if cmd in _conanProbes and _conanProbes[cmd][0] == key:
+        return _conanProbes[cmd][1]
+
+    cacheFile = os.path.join(os.path.expanduser(os.getenv("XDG_CACHE_HOME") or "~/.cache"), "gst-conan",
+                             "conan-probes.json")
+    try:
+        cache = base.loadJsonObject(cacheFile, False) or odict()
+    except ValueError:
+        cache = odict()
+
+    entry = cache.get(cmd)
+    if entry != None and entry.get("key") == key:
+        output = entry["output"]
+    else:
+        output = base.evaluate(cmd)
+        cache[cmd] = odict([("key", key), ("output", output)])
+        try:
+            os.makedirs(os.path.dirname(cacheFile), exist_ok=True)
+            temporaryFile = f"{cacheFile}.{os.getpid()}.tmp"
+            with open(temporaryFile, "w") as writer:
+                json.dump(cache, writer, indent=4)
+            os.replace(temporaryFile, cacheFile)
+        except OSError:
+            pass  # The cache is only an optimization.
+
+    _conanProbes[cmd] = (key, output)
+    return output
+
+def _sameContent(file0:str, file1:str) -> bool:
+    if os.path.islink(file0) or os.path.islink(file1):
+        return os.path.islink(file0) and os.path.islink(file1) and os.readlink(file0) == os.readlink(file1)
+    if os.path.samefile(file0, file1):
+        return True
+    return os.path.getsize(file0) == os.path.getsize(file1) and BlobStore.hashFile(file0) == BlobStore.hashFile(file1)
@@ -0,0 +1,91 @@
+from .. import base
+
+from   collections import OrderedDict as odict
+import datetime
+import json
+import os
+import threading
+
+class Journal:
+    '''
+    A checkpoint journal of a `gst-conan create` run.  It records the progress of every package (started, completed,
+    failed or skipped) together with the inputs hash of the package (see `BuildPlan`), and it is rewritten after every
+    change so that it survives a crash.  A later run can resume from the journal:  packages which were completed with
+    the same inputs hash are not created again (see `BuildPlan.resume`).  A package is only completed once it was
+    created, or found up to date with that inputs hash.  Other skipped packages (e.g. not selected with `--package`)
+    are "skipped".
+
+    Fields:
+    * self.journalFile  The json file.
+    * self.packages  Keyed by package name, where each value has:
+        value.hash = The inputs hash of the package.
+        value.status = "started", "completed", "failed" or "skipped".
+        value.time = When the status was recorded (ISO 8601, UTC).
+        value.error = The error message (only when the status is "failed").
+        value.reason = Why the package was skipped (only when the status is "skipped").
+    '''
+
+    def __init__(self, journalFile:str):
+        self.journalFile = journalFile
+        self.packages = odict()
+        self._lock = threading.Lock()
+
+    def isCompleted(self, packageName:str, inputsHash:str) -> bool:
+        '''
+        Determines whether the package was completed with the given inputs hash.
+        :param packageName: The package.
+        :param inputsHash: The current inputs hash of the package.
+        :return: True if the journal shows the package was completed with the same inputs hash, false otherwise.
+        '''
+        with self._lock:
+            entry = self.packages.get(packageName)
+            return entry != None and entry["status"] == "completed" and entry["hash"] == inputsHash
+
+    @staticmethod
+    def load(journalFile:str, resume:bool) -> 'Journal':
+        '''
+        Opens the journal of a run.
+        :param journalFile: The json file.
+        :param resume: If true, the progress recorded by the previous run is kept.  Otherwise the journal starts empty.
+        :return: The journal.
+        '''
+        output = Journal(journalFile)
+
+        if resume:
+            data = base.loadJsonObject(journalFile, raiseError=False)
+            if data != None:
+                output.packages = data["packages"]
+
+        return output
+
+    def markCompleted(self, packageName:str, inputsHash:str) -> None:
+        self._mark(packageName, inputsHash, "completed")
+
+    def markFailed(self, packageName:str, inputsHash:str, error:str) -> None:
+        self._mark(packageName, inputsHash, "failed", error)
+
+    def markSkipped(self, packageName:str, inputsHash:str, reason:str) -> None:
+        self._mark(packageName, inputsHash, "skipped", reason=reason)
+
+    def markStarted(self, packageName:str, inputsHash:str) -> None:
+        self._mark(packageName, inputsHash, "started")
+
+    def _mark(self, packageName:str, inputsHash:str, status:str, error:str=None, reason:str=None) -> None:
+        entry = odict([("hash", inputsHash), ("status", status),
+                       ("time", datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z")])
+        if error != None:
+            entry["error"] = error
+        if reason != None:
+            entry["reason"] = reason
+
+        with self._lock:
+            self.packages[packageName] = entry
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.journalFile), exist_ok=True)
+
+        tempFile = self.journalFile + ".tmp"
+        with open(tempFile, "w") as writer:
+            json.dump(odict([("packages", self.packages)]), writer, indent=4)
+        os.replace(tempFile, self.journalFile)
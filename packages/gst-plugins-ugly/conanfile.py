@@ -1,4 +1,4 @@
-from conans import ConanFile, Meson
+from conans import ConanFile
 
 import os
 import sys
@@ -9,7 +9,7 @@ if sys.version_info[0] < 3:
 # Import helper methods under gst_conan
 # ----------------
 sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
-import gst_conan
+import gst_conan.build
 
 # ----------------
 # Implement the ConanFile
@@ -48,9 +48,7 @@ class GstPluginsUglyConan(ConanFile):
             self.deps_cpp_info["gst-plugins-base"].rootpath
         ]
 
-        meson = Meson(self)
-        meson.configure(source_folder=self.name, build_folder="build", pkg_config_paths=pcPaths)
-        meson.build()
+        gst_conan.build.doConanBuild(self, self.packageInfo, pcPaths)
 
     def configure(self):
         # Environment variables that only exist when `conan` is called through gst-conan
@@ -76,6 +74,4 @@ class GstPluginsUglyConan(ConanFile):
         self.requires(f"gst-plugins-base/{self.version}@{self.user}/{self.channel}")
 
     def source(self):
-        # This is what actually belongs here.
-        self.run(f"git clone --recurse-submodules https://github.com/gstreamer/{self.name}.git -b {self.gstRevision}")
-        self.run(f"cd {self.name}")
\ No newline at end of file
+        gst_conan.build.doConanSource(self)
\ No newline at end of file
@@ -0,0 +1,31 @@
+class LazyChoices:
+    '''
+    The `choices` of an `argparse` argument, which are only computed when they are needed:  when the argument is given,
+    or when the help of its verb is printed.  Listing the choices (such as the copy methods of `build.CopyBackend`, which
+    would load the whole `build` module) therefore does not slow down the other verbs.  The argument needs a `metavar`,
+    since argparse otherwise lists the choices in the usage as soon as the argument is added.
+
+    Fields:
+    * self.function  The function which returns the list of choices.
+    '''
+
+    def __init__(self, function):
+        self.function = function
+        self._choices = None
+
+    def choices(self) -> list:
+        '''
+        :return: The list of choices, which is computed on the first call.
+        '''
+        if self._choices == None:
+            self._choices = list(self.function())
+        return self._choices
+
+    def __contains__(self, value) -> bool:
+        return value in self.choices()
+
+    def __iter__(self):
+        return iter(self.choices())
+
+    def __len__(self) -> int:
+        return len(self.choices())
@@ -3,13 +3,22 @@ A 'base' layer of utility methods.
 '''
 
 from   collections import OrderedDict as odict
-import ctypes
-import logging
+import contextlib
+import glob
+import hashlib
 import json
 import os
 import shlex
+import signal
 import subprocess
 import sys
+import threading
+import time
+
+from .AsyncRunner import AsyncRunner
+from .CommandResult import CommandResult
+from .LazyChoices import LazyChoices
+from .. import profiling
 
 def basenames(filenames:list) -> list:
     '''
@@ -24,145 +33,123 @@ def basenames(filenames:list) -> list:
 
     return output
 
+def conanBuildTypes() -> list:
+    '''
+    These are the conan build types that we allow.  conan's meson helper passes them on as the meson buildtype, where
+    "RelWithDebInfo" becomes "debugoptimized".
+    :return: The list of types allowed.
+    '''
+    return ["Debug", "Release", "RelWithDebInfo"]
+
 def currentUserIsPrivileged() -> bool:
     '''
     Determines whether the user has root (on linux) or administrative (on windows) privileges.
     :return: [bool]  On Linux, returns true if the effective user ID is 0 (meaning `root`), false otherwise.
     '''
     if isWindows():
+        import ctypes
         return 1 == ctypes.windll.shell32.IsUserAnAdmin()
     else:
         return 0 == os.geteuid()
 
-def evaluate(cmd:str, throwable:bool=True, verbose:bool=True, workingFolder:str=None, fake:bool=False, env:dict=None) -> str:
+def dockerfileChoices() -> list:
+    '''
+    The list of choices for docker containers which can be used to build the conan packages.  This is basically
+    the list of folders under `gst-conan/distros` (where each folder contains a dockerfile).
+    :return:
+    '''
+    distrosFolder = gstConanDistrosFolder()
+
+    output = list(set(glob.glob(distrosFolder + "/*/Dockerfile")))
+    for i, dockerfile in enumerate(output):
+        output[i] = os.path.basename(os.path.dirname(dockerfile))
+
+    output.sort()
+
+    return output
+
+def evaluate(cmd:str, throwable:bool=True, verbose:bool=True, workingFolder:str=None, fake:bool=False, env:dict=None,
+             timeout:float=None) -> str:
     '''
-    Executes the specified shell command and captures the console output.
+    Executes the specified shell command and captures the console output (see `run`).
     :param cmd:  The shell command.
     :param throwable:  If true, an exception is thrown if the command generates an error.
     :param verbose:  If true, the executed command is printed to the console.
     :param workingFolder:  The working folder for command execution.
     :param fake: If true, the command is not actually executed.  A stub message is sent to stdout.
     :param env:  The environment variables.  If None, the default environment variables are used (from os.environ).
+    :param timeout:  The number of seconds after which the command is killed (and considered failed).  No limit if None.
     :return: The captured console output
     '''
 
-    win = isWindows()
-
     if fake:
-        if workingFolder == None:
-            print("Fake command execution:")
-        else:
-            print("Fake command execution from "+workingFolder+":")
-        print("\t" + cmd)
+        run(cmd, cwd=workingFolder, fake=True)
         return 0
 
-    if verbose:
-        if workingFolder == None:
-            print("Executing command:")
-        else:
-            print("Executing command from "+workingFolder+":")
-        print("\t" + cmd)
-
-    sys.stdout.flush()
-
     try:
-        if win:
-            # windows will lex the command
-            cmdLex = cmd
-        else:
-            cmdLex = shlex.split(cmd)
+        result = run(cmd, cwd=workingFolder, env=env, capture=True, timeout=timeout, throwable=throwable,
+                     verbose=verbose)
     except:
         if throwable:
-            raise Exception("Unable to lex the command string:  " + cmd)
+            raise
         return None
 
-    if workingFolder != None:
-        priorWorkingFolder = os.getcwd()
-        os.chdir(workingFolder)
-
-    try:
-        if env is None:
-            output = subprocess.check_output(cmdLex, shell=win)
-        else:
-            output = subprocess.check_output(cmdLex, shell=win, env=env)
-
-        if (sys.version_info[0] >= 3):
-            output = output.decode("utf-8", errors='replace')
+    if not result.succeeded():
+        return None
 
-        if win and len(output) >= 2:
-            output = output[:-2]  # it always ends with "\r\n"
-        elif len(output) >= 1:
-            output = output[:-1]  # it always ends with "\n"
+    output = result.output
+    if isWindows() and len(output) >= 2:
+        output = output[:-2]  # it always ends with "\r\n"
+    elif len(output) >= 1:
+        output = output[:-1]  # it always ends with "\n"
 
-        return output
-    except:
-        if throwable:
-            raise
-        else:
-            return None
-    finally:
-        if workingFolder != None:
-            os.chdir(priorWorkingFolder)
+    return output
 
-def execute(cmd:str, throwable:bool=True, verbose:bool=True, workingFolder:str=None, fake:bool=False, env:dict=None) -> int:
+def execute(cmd:str, throwable:bool=True, verbose:bool=True, workingFolder:str=None, fake:bool=False, env:dict=None,
+            timeout:float=None) -> int:
     '''
-    Executes the specified shell command.
+    Executes the specified shell command (see `run`).
     :param cmd:  The shell command.
     :param throwable:  If true, an exception is thrown if the command generates an error.
     :param verbose:  If true, the executed command is printed to the console.
     :param workingFolder:  The working folder for command execution.
     :param fake: If true, the command is not actually executed.  A stub message is sent to stdout.
     :param env:  The environment variables.  If None, the default environment variables are used (from os.environ).
+    :param timeout:  The number of seconds after which the command is killed (and considered failed).  No limit if None.
     :return: The exit code of the function call.
     '''
 
-    win = isWindows()
-
     if fake:
-        if workingFolder == None:
-            print("Fake command execution:")
-        else:
-            print("Fake command execution from "+workingFolder+":")
-        print("\t" + cmd)
+        run(cmd, cwd=workingFolder, fake=True)
         return 0
 
-    if verbose:
-        if workingFolder == None:
-            print("Executing command:")
-        else:
-            print("Executing command from "+workingFolder+":")
-        print("\t" + cmd)
-
-    sys.stdout.flush()
-
     try:
-        if win:
-            cmdLex = cmd
-        else:
-            cmdLex = shlex.split(cmd)
-    except:
+        result = run(cmd, cwd=workingFolder, env=env, timeout=timeout, throwable=throwable, verbose=verbose)
+    except ValueError:
         if throwable:
-            raise Exception("Unable to lex the command string:  " + cmd)
+            raise
         return 1
 
-    if workingFolder != None:
-        priorWorkingFolder = os.getcwd()
-        os.chdir(workingFolder)
+    return result.exitCode
 
-    try:
-        if throwable:
-            if env is None:
-                return subprocess.check_call(cmdLex, shell=win)
-            else:
-                return subprocess.check_call(cmdLex, shell=win, env=env)
-        else:
-            if env is None:
-                return subprocess.call(cmdLex, shell=win)
-            else:
-                return subprocess.call(cmdLex, shell=win, env=env)
-    finally:
-        if workingFolder != None:
-            os.chdir(priorWorkingFolder)
+@contextlib.contextmanager
+def fileLock(filename:str):
+    '''
+    Holds an exclusive lock on the given file for the duration of a `with` block.  The lock is honored by other threads
+    and by other processes (such as concurrent `conan` processes), so it can guard data which they modify at the same
+    time.  The file (and its parent folder) is created if it does not already exist.
+    :param filename: The lock file.
+    '''
+    import fcntl
+
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+
+    with open(filename, "a") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
 
 def getEnv(name:str) -> str:
     '''
@@ -204,6 +191,30 @@ def gstConanFolder() -> str:
     output = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
     return output
 
+def hashFolder(folder:str) -> str:
+    '''
+    Computes a digest of everything under a folder:  the relative path and contents of every file, and the relative
+    path and target of every symbolic link.  Python caches (`__pycache__` folders) are ignored.
+    :param folder: The folder.
+    :return: The sha256 digest as a hexadecimal string.
+    '''
+    hasher = hashlib.sha256()
+
+    for parentFolder, folders, files in os.walk(folder):
+        folders[:] = sorted(f for f in folders if f != "__pycache__")
+        for file in sorted(files):
+            path = os.path.join(parentFolder, file)
+            hasher.update(os.path.relpath(path, folder).encode("utf-8") + b"\0")
+            if os.path.islink(path):
+                hasher.update(b"link:" + os.readlink(path).encode("utf-8") + b"\0")
+            else:
+                with open(path, "rb") as reader:
+                    for block in iter(lambda: reader.read(1024 * 1024), b""):
+                        hasher.update(block)
+                hasher.update(b"\0")
+
+    return hasher.hexdigest()
+
 def isDarwin() -> bool:
     '''
     Determines whether the platform is Darwin (mac).
@@ -239,6 +250,7 @@ def loadJsonObject(jsonFile:str, raiseError:bool=True) -> odict:
     return output
 
 def raiseError(message:str) -> None:
+    import logging
     logging.error(message)
     print("")
     print("")
@@ -257,4 +269,129 @@ def readNonEmptyLines(filename:str) -> list:
             if len(txt) > 0:
                 output.append(txt)
 
-    return output
\ No newline at end of file
+    return output
+
+def run(cmd, cwd:str=None, env:dict=None, capture:bool=False, timeout:float=None, throwable:bool=True,
+        verbose:bool=True, fake:bool=False) -> CommandResult:
+    '''
+    Executes a command.  The working folder is given to the child process (the current folder of this process is never
+    changed), so commands can be executed from several threads at the same time.
+    :param cmd:  The command, either as a shell command string (which is lexed, except on Windows) or as a list of
+    arguments.
+    :param cwd:  The working folder of the command.  Defaults to the current folder.
+    :param env:  The environment variables.  If None, the default environment variables are used (from os.environ).
+    :param capture:  If true, the standard output is captured (in `CommandResult.output`) rather than printed.
+    :param timeout:  The number of seconds after which the command is killed.  No limit if None.
+    :param throwable:  If true, an exception is thrown if the command fails or times out (see `CommandResult.check`).
+    :param verbose:  If true, the executed command is printed to the console.
+    :param fake:  If true, the command is not actually executed.  A stub message is sent to stdout.
+    :return: The result of the command.
+    '''
+    win = isWindows()
+    cmdText = cmd if isinstance(cmd, str) else subprocess.list2cmdline(cmd)
+
+    if fake or verbose:
+        prefix = "Fake command execution" if fake else "Executing command"
+        print(prefix + (":" if cwd == None else " from " + cwd + ":"))
+        print("\t" + cmdText)
+    if fake:
+        return CommandResult(cmd, cwd)
+
+    sys.stdout.flush()
+
+    if isinstance(cmd, str) and not win:
+        try:
+            cmdLex = shlex.split(cmd)
+        except ValueError:
+            raise ValueError("Unable to lex the command string:  " + cmd)
+    else:
+        # windows will lex the command
+        cmdLex = cmd
+
+    startTime = time.time()
+    start = time.monotonic()
+    process = subprocess.Popen(cmdLex, shell=win, cwd=cwd, env=env, stdout=subprocess.PIPE if capture else None)
+
+    # The output is read by a thread while the process is waited for, so that neither can block the other.
+    outputs = []
+    reader = None
+    if capture:
+        reader = threading.Thread(target=lambda: outputs.append(process.stdout.read()), daemon=True)
+        reader.start()
+
+    try:
+        timedOut, rusage = _wait(process, timeout)
+    finally:
+        if reader != None:
+            reader.join()
+            process.stdout.close()
+
+    output = outputs[0].decode("utf-8", errors="replace") if capture else None
+
+    result = CommandResult(cmd, cwd, process.returncode, time.monotonic() - start, output, timedOut, startTime, rusage)
+
+    packageName, phase = profiling.current()
+    profiling.record(result.profileEntry(_commandName(cmdLex), packageName, phase or "command"))
+
+    if throwable:
+        result.check(timeout)
+
+    return result
+
+def _commandName(cmdLex) -> str:
+    # Such as "git clone" or "meson configure", for the profile.
+    if isinstance(cmdLex, str):
+        cmdLex = cmdLex.split()
+    return " ".join([os.path.basename(cmdLex[0])] + [arg for arg in cmdLex[1:2] if not arg.startswith("-")])
+
+def _kill(process:subprocess.Popen, reaped:threading.Event) -> None:
+    # Kills a process which the waiter thread of `_wait` waits for, and lets that thread reap it.
+    if not reaped.is_set():
+        try:
+            os.kill(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    reaped.wait()
+
+def _wait(process:subprocess.Popen, timeout:float=None) -> tuple:
+    # Waits for the process with `os.wait4` (where it exists), which also gives its resource usage.  Returns whether the
+    # process timed out (and so was killed) and the resource usage (or None).  If the wait is interrupted (such as by
+    # KeyboardInterrupt), the process is killed before the exception is passed on.
+    if not hasattr(os, "wait4"):
+        try:
+            process.wait(timeout)
+            return (False, None)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            return (True, None)
+        except:
+            process.kill()
+            process.wait()
+            raise
+
+    # Only the waiter thread reaps the process:  otherwise the pid could be reaped twice (failing with ECHILD, or losing
+    # the exit code and the resource usage).  The other paths only signal the process and wait for the waiter.  The
+    # waiter is followed with an event rather than `Thread.join`, which can report the thread as stopped once a join
+    # was interrupted.
+    outcome = []
+    reaped = threading.Event()
+    def waitForProcess():
+        try:
+            outcome.append(os.wait4(process.pid, 0))
+        finally:
+            reaped.set()
+    threading.Thread(target=waitForProcess, daemon=True).start()
+    try:
+        timedOut = not reaped.wait(timeout)
+    except:
+        _kill(process, reaped)
+        process.returncode = CommandResult.exitCodeOf(outcome[0][1])
+        raise
+
+    if timedOut:
+        _kill(process, reaped)
+
+    pid, status, rusage = outcome[0]
+    process.returncode = CommandResult.exitCodeOf(status)
+    return (timedOut, rusage)
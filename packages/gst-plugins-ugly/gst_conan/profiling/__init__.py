@@ -0,0 +1,526 @@
+'''
+Where the time of `gst-conan create` goes.
+
+While `gst-conan create` runs, GST_CONAN_PROFILE names a file where the resource usage of the work is appended as json
+lines (so that the concurrent `conan create` processes can all write to it):
+* "create" entries, one per `conan create` (see `base.AsyncRunner`).
+* "source", "configure", "build" and "package" entries, one per phase of each recipe (see `phase`).
+* "command" entries, one per command executed through `base.run` (such as git, meson or objcopy), attributed to the
+  package and phase which executed them.
+
+Each entry has the wall time, the user and system CPU time, and the peak resident memory (see `os.wait4`).  At the end,
+`create` prints a ranked report and writes the entries as json and in the trace event format of Chrome (which can be
+loaded in chrome://tracing or https://ui.perfetto.dev).
+
+Within the build phase, the time of each compile and link step is taken from the log which ninja keeps in the build
+folder, as each run of ninja finishes (see `ninjaRun`).  The steps are summarized (see `ninjaSummary`) and saved in the
+manifest of each package folder.  `buildReport` ranks the steps across
+packages, and `compareBuilds` diffs two runs.
+'''
+
+from   collections import Counter, OrderedDict as odict
+import contextlib
+import functools
+import json
+import os
+import re
+import threading
+import time
+
+# The environment variable which names the profile file.
+ENVIRONMENT_VARIABLE = "GST_CONAN_PROFILE"
+
+# The file of a build folder where `ninjaRun` records the steps of the ninja runs of the last build.
+NINJA_STEPS_FILENAME = "gst-conan-ninja-steps.json"
+
+# The phases of a recipe, in order.
+PHASES = ["source", "configure", "build", "package"]
+
+# The package and phase of the current thread (see `phase`).
+_current = threading.local()
+
+def buildReport(summaries:odict, top:int=20) -> str:
+    '''
+    Formats a human-readable report of the ninja builds of several packages:  the critical path of each package against
+    the total time of its steps, the slowest compile and link steps across packages, and the folders (typically plugins)
+    which took the most time.
+    :param summaries: The summaries (see `ninjaSummary`) keyed by package name.
+    :param top: The number of steps and folders which are listed.
+    :return: The report.
+    '''
+    lines = ["Packages (longest critical path first):",
+             f"  {'':<30} {'wall':>9} {'step time':>10} {'critical':>9} {'parallel':>8} {'steps':>6}"]
+    for packageName, summary in sorted(summaries.items(), key=lambda item: item[1]["criticalPath"], reverse=True):
+        lines.append(f"  {packageName:<30} {summary['wall']:8.1f}s {summary['stepTime']:9.1f}s "
+                     f"{summary['criticalPath']:8.1f}s {summary['parallelism']:7.1f}x {len(summary['steps']):6}")
+
+    steps = [(packageName, step) for packageName, summary in summaries.items() for step in summary["steps"]]
+    for kind in ["compile", "link"]:
+        lines.append(f"Slowest {kind} steps (the {top} slowest):")
+        ranked = sorted((item for item in steps if item[1]["kind"] == kind), key=lambda item: item[1]["duration"],
+                        reverse=True)
+        for packageName, step in ranked[:top]:
+            lines.append(f"  {step['duration']:8.1f}s  {packageName}  {step['output']}")
+
+    lines.append(f"Folders (the {top} with the most step time):")
+    for (packageName, group), seconds in _groupTimes(summaries).most_common(top):
+        lines.append(f"  {seconds:8.1f}s  {packageName}  {group}")
+
+    for packageName, summary in sorted(summaries.items(), key=lambda item: item[1]["criticalPath"], reverse=True)[:1]:
+        lines.append(f"Critical path of {packageName} ({summary['criticalPath']:.1f}s):")
+        for step in summary["criticalSteps"]:
+            lines.append(f"  {step['duration']:8.1f}s  {step['output']}")
+
+    return "\n".join(lines)
+
+def chromeTrace(entries:list) -> odict:
+    '''
+    Converts the entries of a profile to the trace event format of Chrome.  Each package is shown as a thread, with its
+    `conan create`, its phases and its commands as nested slices.
+    :param entries: The entries (see `load`).
+    :return: The trace, which can be saved as json.
+    '''
+    events = []
+    threadIds = odict()
+    for entry in entries:
+        if entry.get("start") == None:
+            continue
+        packageName = entry.get("package") or "gst-conan"
+        if packageName not in threadIds:
+            threadIds[packageName] = len(threadIds) + 1
+            events.append(odict([("name", "thread_name"), ("ph", "M"), ("pid", 1), ("tid", threadIds[packageName]),
+                                 ("args", odict([("name", packageName)]))]))
+
+        name = entry["phase"] if entry.get("name") in (None, entry["phase"]) else entry["name"]
+        args = odict((key, entry.get(key)) for key in ["user", "system", "maxRssKb", "exitCode"]
+                     if entry.get(key) != None)
+        events.append(odict([("name", name), ("cat", entry["phase"]), ("ph", "X"), ("pid", 1),
+                             ("tid", threadIds[packageName]), ("ts", int(entry["start"] * 1000000)),
+                             ("dur", int(entry["wall"] * 1000000)), ("args", args)]))
+
+    return odict([("traceEvents", events), ("displayTimeUnit", "ms")])
+
+def compareBuilds(before:odict, after:odict, top:int=20) -> str:
+    '''
+    Formats a human-readable diff of the ninja builds of two runs.
+    :param before: The summaries (see `ninjaSummary`) of the first run, keyed by package name.
+    :param after: The summaries of the second run, keyed by package name.
+    :param top: The number of folders and steps which are listed.
+    :return: The report.
+    '''
+    def delta(old:float, new:float) -> str:
+        return f"{old:8.1f}s -> {new:8.1f}s ({new - old:+8.1f}s)"
+
+    lines = ["Packages (critical path, step time):"]
+    for packageName in list(before.keys()) + [name for name in after.keys() if name not in before]:
+        old = before.get(packageName)
+        new = after.get(packageName)
+        if old == None or new == None:
+            lines.append(f"  {packageName:<30} {'only after' if old == None else 'only before'}")
+            continue
+        lines.append(f"  {packageName:<30} {delta(old['criticalPath'], new['criticalPath'])}  "
+                     f"{delta(old['stepTime'], new['stepTime'])}")
+
+    lines.append(f"Folders (the {top} largest changes of step time):")
+    oldGroups = _groupTimes(before)
+    newGroups = _groupTimes(after)
+    changes = [(key, oldGroups.get(key, 0), newGroups.get(key, 0)) for key in set(oldGroups) | set(newGroups)]
+    for (packageName, group), old, new in sorted(changes, key=lambda item: abs(item[2] - item[1]), reverse=True)[:top]:
+        lines.append(f"  {delta(old, new)}  {packageName}  {group}")
+
+    lines.append(f"Steps (the {top} largest changes of duration):")
+    oldSteps = _stepTimes(before)
+    newSteps = _stepTimes(after)
+    changes = [(key, oldSteps.get(key, 0), newSteps.get(key, 0)) for key in set(oldSteps) | set(newSteps)]
+    for (packageName, output), old, new in sorted(changes, key=lambda item: abs(item[2] - item[1]), reverse=True)[:top]:
+        lines.append(f"  {delta(old, new)}  {packageName}  {output}")
+
+    return "\n".join(lines)
+
+def current() -> tuple:
+    '''
+    :return: The package and phase which the current thread is executing (see `phase`), or (None, None).
+    '''
+    return (getattr(_current, "packageName", None), getattr(_current, "phase", None))
+
+def load(profileFile:str) -> list:
+    '''
+    Reads the entries of a profile file.
+    :param profileFile: The profile file.
+    :return: The entries, in the order in which they were recorded.  Empty if the file does not exist.
+    '''
+    output = []
+    if os.path.isfile(profileFile):
+        with open(profileFile) as reader:
+            for line in reader:
+                if line.strip():
+                    output.append(json.loads(line, object_pairs_hook=odict))
+    return output
+
+@contextlib.contextmanager
+def ninjaRun(buildFolder:str, buildStart:float):
+    '''
+    Records the steps which a run of ninja (within the block) adds to the ninja log of a build folder, for `ninjaSummary`.
+    A build may take several runs (such as when ninja is restarted with more jobs), and ninja restarts the times of its
+    log with each run, so the times of each run are shifted by the time since the build started.  The steps are
+    recorded even if the run fails.
+    :param buildFolder: The meson build folder.
+    :param buildStart: The start of the build (see `startNinjaBuild`).
+    '''
+    ninjaLog = os.path.join(buildFolder, ".ninja_log")
+    position = _ninjaLogPosition(ninjaLog) or (None, 0)
+    offset = time.monotonic() - buildStart
+    try:
+        yield
+    finally:
+        stepsFile = os.path.join(buildFolder, NINJA_STEPS_FILENAME)
+        with open(stepsFile) as reader:
+            steps = json.load(reader, object_pairs_hook=odict)
+        for step in _ninjaSteps(ninjaLog, position) or []:
+            step["start"] = round(step["start"] + offset, 3)
+            step["end"] = round(step["end"] + offset, 3)
+            steps.append(step)
+        with open(stepsFile, "w") as writer:
+            json.dump(steps, writer)
+
+def ninjaSummary(buildFolder:str) -> odict:
+    '''
+    Summarizes the last ninja build of a build folder, from the steps of each of its ninja runs (see `ninjaRun`), and
+    from its "build.ninja" (the dependencies between the steps).  A build which was not recorded by `ninjaRun` is taken
+    from the last run in the ".ninja_log".  The log lacks the CPU time of the steps, so their wall time is used instead
+    (the "step time", which is what the build would take on one core).
+    :param buildFolder: The meson build folder.
+    :return: The "wall" time of the build, the sum of the durations of its steps ("stepTime"), their average
+    "parallelism", the length of the "criticalPath" (the longest chain of steps which depend on each other, which bounds
+    the build time whatever the number of cores) and its "criticalSteps", and the "steps" (each with its first "output",
+    its "kind" ("compile", "link" or "other"), and its "start" and "duration").  All times are in seconds.  None if
+    the folder has no ninja log.  A build where ninja had nothing to do has no steps.
+    '''
+    stepsFile = os.path.join(buildFolder, NINJA_STEPS_FILENAME)
+    if os.path.isfile(stepsFile):
+        with open(stepsFile) as reader:
+            steps = json.load(reader, object_pairs_hook=odict)
+    else:
+        steps = _ninjaSteps(os.path.join(buildFolder, ".ninja_log"))
+        if steps == None:
+            return None
+
+    buildNinja = os.path.join(buildFolder, "build.ninja")
+    edges = _ninjaEdges(buildNinja) if os.path.isfile(buildNinja) else []
+    criticalPath, criticalSteps = _criticalPath(steps, edges)
+
+    wall = max(step["end"] for step in steps) - min(step["start"] for step in steps) if len(steps) > 0 else 0
+    stepTime = sum(step["end"] - step["start"] for step in steps)
+
+    def describe(step:odict) -> odict:
+        return odict([("output", step["outputs"][0]), ("kind", _stepKind(step["outputs"][0])),
+                      ("start", round(step["start"], 3)), ("duration", round(step["end"] - step["start"], 3))])
+
+    output = odict()
+    output["wall"] = round(wall, 3)
+    output["stepTime"] = round(stepTime, 3)
+    output["parallelism"] = round(stepTime / wall, 2) if wall > 0 else 0
+    output["criticalPath"] = round(criticalPath, 3)
+    output["criticalSteps"] = [describe(step) for step in criticalSteps]
+    output["steps"] = sorted((describe(step) for step in steps), key=lambda step: step["duration"], reverse=True)
+    return output
+
+@contextlib.contextmanager
+def phase(packageName:str, phaseName:str):
+    '''
+    Records the resource usage of a phase of a recipe, such as `with profiling.phase(conanfile.name, "build"): ...`.
+    The CPU time includes the processes which were executed (and waited for) within the phase.  Nothing is recorded
+    unless GST_CONAN_PROFILE is set.
+    :param packageName: The package.
+    :param phaseName: The phase (see `PHASES`).
+    '''
+    previous = current()
+    _current.packageName = packageName
+    _current.phase = phaseName
+
+    startTime = time.time()
+    start = time.monotonic()
+    before = _usage()
+    try:
+        yield
+    finally:
+        after = _usage()
+        _current.packageName, _current.phase = previous
+        record(odict([("package", packageName), ("phase", phaseName), ("name", phaseName), ("start", startTime),
+                      ("wall", time.monotonic() - start), ("user", after[0] - before[0]),
+                      ("system", after[1] - before[1]), ("maxRssKb", after[2]), ("exitCode", None)]))
+
+def recipePhase(phaseName:str):
+    '''
+    Decorates a function whose first argument is a conanfile, so that each call is recorded as a phase of that package
+    (see `phase`).
+    :param phaseName: The phase (see `PHASES`).
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(conanfile, *args, **kwargs):
+            with phase(conanfile.name, phaseName):
+                return function(conanfile, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def record(entry:odict, profileFile:str=None) -> None:
+    '''
+    Appends an entry to the profile file.
+    :param entry: The entry (see `base.CommandResult.profileEntry`).
+    :param profileFile: The profile file.  Defaults to GST_CONAN_PROFILE, and nothing is recorded if it is not set.
+    :return: Nothing.
+    '''
+    profileFile = profileFile or os.getenv(ENVIRONMENT_VARIABLE)
+    if not profileFile:
+        return
+
+    # A single write of a line in append mode does not interleave with the writes of other processes.
+    with open(profileFile, "a") as writer:
+        writer.write(json.dumps(entry) + "\n")
+
+def report(entries:list, top:int=10) -> str:
+    '''
+    Formats a human-readable report of a profile:  the phases of all packages ranked by wall time, the total of each
+    package, and the slowest commands.
+    :param entries: The entries (see `load`).
+    :param top: The number of commands which are listed.
+    :return: The report.
+    '''
+    def line(label:str, entry:odict) -> str:
+        cpu = (entry.get("user") or 0) + (entry.get("system") or 0)
+        rss = f"{entry['maxRssKb'] / 1024:8.0f} MB" if entry.get("maxRssKb") != None else "       ? MB"
+        return f"  {label:<50} {entry['wall']:9.1f}s wall {cpu:9.1f}s cpu {rss} peak"
+
+    phases = [entry for entry in entries if entry["phase"] in PHASES and entry.get("name") == entry["phase"]]
+    creates = [entry for entry in entries if entry["phase"] == "create"]
+    commands = [entry for entry in entries if entry["phase"] not in ("create",) and entry.get("name") != entry["phase"]]
+
+    lines = ["Phases (slowest first):"]
+    for entry in sorted(phases, key=lambda entry: entry["wall"], reverse=True):
+        lines.append(line(f"{entry['package']} {entry['phase']}", entry))
+
+    lines.append("Packages (slowest first):")
+    for entry in sorted(creates, key=lambda entry: entry["wall"], reverse=True):
+        lines.append(line(entry["package"], entry))
+
+    lines.append(f"Commands (the {top} slowest):")
+    for entry in sorted(commands, key=lambda entry: entry["wall"], reverse=True)[:top]:
+        lines.append(line(f"{entry.get('package') or ''} {entry['phase'] or ''} {entry['name']}"[:50], entry))
+
+    return "\n".join(lines)
+
+def startNinjaBuild(buildFolder:str) -> float:
+    '''
+    Starts recording the ninja runs of a build (see `ninjaRun`), which replace those of the previous build of the folder.
+    :param buildFolder: The meson build folder.
+    :return: The start of the build, for `ninjaRun`.
+    '''
+    with open(os.path.join(buildFolder, NINJA_STEPS_FILENAME), "w") as writer:
+        json.dump([], writer)
+    return time.monotonic()
+
+def writeReports(entries:list, folder:str) -> tuple:
+    '''
+    Saves a profile as "profile.json" and "trace.json" (see `chromeTrace`).
+    :param entries: The entries (see `load`).
+    :param folder: The folder where the files are saved.
+    :return: The two files.
+    '''
+    os.makedirs(folder, exist_ok=True)
+    profileFile = os.path.join(folder, "profile.json")
+    traceFile = os.path.join(folder, "trace.json")
+
+    with open(profileFile, "w") as writer:
+        json.dump(entries, writer, indent=4)
+    with open(traceFile, "w") as writer:
+        json.dump(chromeTrace(entries), writer)
+
+    return (profileFile, traceFile)
+
+def _criticalPath(steps:list, edges:list) -> tuple:
+    # The duration of each edge is that of the step which produced its outputs in the last build (0 if the edge was up
+    # to date, or is phony).
+    stepsByOutput = {output: step for step in steps for output in step["outputs"]}
+    producers = {}
+    for i, (outputs, inputs) in enumerate(edges):
+        for output in outputs:
+            producers[output] = i
+
+    def stepOf(i:int) -> odict:
+        for output in edges[i][0]:
+            if output in stepsByOutput:
+                return stepsByOutput[output]
+        return None
+
+    # The longest chain which ends with each edge, computed in dependency order without recursion (the graphs of the
+    # larger packages are deep).
+    finish = {}
+    previous = {}
+    visiting = set()
+    for root in range(len(edges)):
+        stack = [(root, False)]
+        while len(stack) > 0:
+            i, expanded = stack.pop()
+            if i in finish or (not expanded and i in visiting):
+                continue
+            dependencies = [producers[input] for input in edges[i][1] if input in producers]
+            if not expanded:
+                visiting.add(i)
+                stack.append((i, True))
+                stack += [(j, False) for j in dependencies if j not in finish and j not in visiting]
+                continue
+            step = stepOf(i)
+            best = max(dependencies, key=lambda j: finish.get(j, 0), default=None)
+            previous[i] = best
+            finish[i] = (step["end"] - step["start"] if step != None else 0) + (finish.get(best, 0) if best != None
+                                                                                 else 0)
+
+    if len(finish) == 0:
+        longest = max(steps, key=lambda step: step["end"] - step["start"], default=None)
+        return (longest["end"] - longest["start"], [longest]) if longest != None else (0, [])
+
+    i = max(finish, key=finish.get)
+    length = finish[i]
+    path = []
+    while i != None:
+        step = stepOf(i)
+        if step != None and (len(path) == 0 or path[-1] is not step):
+            path.append(step)
+        i = previous.get(i)
+
+    return (length, list(reversed(path)))
+
+def _groupTimes(summaries:odict) -> Counter:
+    output = Counter()
+    for packageName, summary in summaries.items():
+        for step in summary["steps"]:
+            output[(packageName, _stepGroup(step["output"]))] += step["duration"]
+    return output
+
+def _ninjaEdges(buildNinja:str) -> list:
+    # Each "build" statement of build.ninja, as its outputs and its inputs (explicit, implicit and order-only).
+    edges = []
+    with open(buildNinja, encoding="utf-8", errors="replace") as reader:
+        statement = ""
+        for line in reader:
+            line = line.rstrip("\n")
+            trailing = len(line) - len(line.rstrip("$"))
+            if trailing % 2 == 1:
+                statement += line[:-1]
+                continue
+            statement += line
+            if statement.startswith("build "):
+                tokens = _ninjaTokens(statement[len("build "):])
+                if ":" in tokens:
+                    colon = tokens.index(":")
+                    outputs = [token for token in tokens[:colon] if token != "|"]
+                    inputs = []
+                    for token in tokens[colon + 2:]:
+                        if token == "|@":
+                            break
+                        if token not in ("|", "||"):
+                            inputs.append(token)
+                    edges.append((outputs, inputs))
+            statement = ""
+    return edges
+
+def _ninjaLogPosition(ninjaLog:str) -> tuple:
+    # Where the next run of ninja appends to its log:  the inode and the size of the log, or None if there is no log.
+    if not os.path.isfile(ninjaLog):
+        return None
+    stat = os.stat(ninjaLog)
+    return (stat.st_ino, stat.st_size)
+
+def _ninjaSteps(ninjaLog:str, position:tuple=None) -> list:
+    # The steps of a run in a ninja log (format v5 and later:  start, end, mtime, output and command hash, separated by
+    # tabs).  Those are the entries after the given position (see `_ninjaLogPosition`), unless ninja has rewritten
+    # (recompacted) the log since.  Otherwise, since the times restart from 0 with each run, the last run starts after
+    # the last entry which ended later than the entry following it.
+    if not os.path.isfile(ninjaLog):
+        return None
+
+    entries = []
+    with open(ninjaLog, "rb") as reader:
+        header = reader.readline().decode("utf-8", errors="replace")
+        if not header.startswith("# ninja log v") or int(header.strip()[len("# ninja log v"):] or 0) < 5:
+            return None
+
+        stat = os.fstat(reader.fileno())
+        appended = position != None and position[0] in (None, stat.st_ino) and position[1] <= stat.st_size
+        if appended:
+            reader.seek(max(position[1], reader.tell()))
+
+        for line in reader:
+            fields = line.decode("utf-8", errors="replace").rstrip("\n").split("\t")
+            if len(fields) == 5:
+                entries.append((int(fields[0]), int(fields[1]), fields[3], fields[4]))
+
+    first = 0
+    if not appended:
+        for i in range(1, len(entries)):
+            if entries[i][1] < entries[i - 1][1]:
+                first = i
+
+    # The outputs of a step are logged on separate lines, with the same times and command hash.
+    steps = odict()
+    for start, end, output, commandHash in entries[first:]:
+        key = (start, end, commandHash)
+        if key not in steps:
+            steps[key] = odict([("outputs", []), ("start", start / 1000), ("end", end / 1000)])
+        steps[key]["outputs"].append(output)
+
+    return list(steps.values())
+
+def _ninjaTokens(text:str) -> list:
+    # Splits the paths of a build statement on unescaped spaces, with ":", "|", "||" and "|@" as tokens of their own.
+    tokens = []
+    token = ""
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "$" and i + 1 < len(text):
+            token += text[i + 1]
+            i += 2
+            continue
+        if char in " :":
+            if token:
+                tokens.append(token)
+            if char == ":":
+                tokens.append(":")
+            token = ""
+        else:
+            token += char
+        i += 1
+    if token:
+        tokens.append(token)
+    return tokens
+
+def _stepGroup(output:str) -> str:
+    # The folder of a step, which in the build tree of meson is that of the sources (e.g. "ext/vulkan" for a plugin).
+    # The objects of each target are in a "<target>.p" subfolder.
+    parts = output.split("/")[:-1]
+    for i, part in enumerate(parts):
+        if part.endswith(".p"):
+            parts = parts[:i]
+            break
+    return "/".join(parts) or "."
+
+def _stepKind(output:str) -> str:
+    if output.endswith(".o") or output.endswith(".obj"):
+        return "compile"
+    if re.search(r"\.(so(\.\d+)*|a|dll|dylib|exe)$", output) or "." not in os.path.basename(output):
+        return "link"
+    return "other"
+
+def _stepTimes(summaries:odict) -> dict:
+    return {(packageName, step["output"]): step["duration"]
+            for packageName, summary in summaries.items() for step in summary["steps"]}
+
+def _usage() -> tuple:
+    import resource
+
+    this = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (this.ru_utime + children.ru_utime, this.ru_stime + children.ru_stime,
+            max(this.ru_maxrss, children.ru_maxrss))
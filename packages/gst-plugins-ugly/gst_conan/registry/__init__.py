@@ -0,0 +1,138 @@
+'''
+Pre-generated GStreamer plugin registries.
+
+On start, GStreamer loads its registry of plugins (GST_REGISTRY, by default a file in ~/.cache/gstreamer-1.0) and
+has `gst-plugin-scanner` load every plugin which is new or has changed since the registry was written.  A registry
+covers one set of plugin folders, so the default registry is rescanned whenever GST_PLUGIN_PATH changes, which makes
+the first start of every consumer slow.
+
+Here the registry of a set of package folders is generated once, with the packaged `gst-inspect-1.0` and
+`gst-plugin-scanner`, next to a fingerprint of the plugin files.  Consumers then set GST_REGISTRY to that file and
+GST_REGISTRY_UPDATE to "no", so that no plugin is scanned at runtime.  The registry is only generated again when the
+fingerprint changes (a plugin was added, removed or rebuilt).
+'''
+
+from .. import base
+
+from   collections import OrderedDict as odict
+import glob
+import hashlib
+import json
+import os
+
+def environment(packageFolders:list, registryFile:str) -> odict:
+    '''
+    Gets the environment variables which make GStreamer use the plugins of the package folders, and only those.
+    :param packageFolders: The conan package folders of the gstreamer packages.
+    :param registryFile: The registry file (GST_REGISTRY).
+    :return: A dictionary of environment variables.
+    '''
+    env = odict()
+    env["GST_PLUGIN_PATH"] = os.pathsep.join(pluginFolders(packageFolders))
+    env["GST_PLUGIN_SYSTEM_PATH"] = ""
+    env["GST_REGISTRY"] = registryFile
+    env["LD_LIBRARY_PATH"] = os.pathsep.join(folder for folder in [os.path.join(packageFolder, "lib")
+                                                                   for packageFolder in packageFolders]
+                                             if os.path.isdir(folder))
+
+    scanner = _findExecutable(packageFolders, "gst-plugin-scanner")
+    if scanner != None:
+        env["GST_PLUGIN_SCANNER"] = scanner
+
+    return env
+
+def fingerprint(packageFolders:list) -> str:
+    '''
+    Hashes the path, size and modification time of the plugins and of the gstreamer core library (which the registry
+    format depends on).
+    :param packageFolders: The conan package folders of the gstreamer packages.
+    :return: The sha256 (hex digits).
+    '''
+    sha = hashlib.sha256()
+    files = []
+    for folder in pluginFolders(packageFolders):
+        files += glob.glob(os.path.join(folder, "*.so"))
+    for packageFolder in packageFolders:
+        files += glob.glob(os.path.join(packageFolder, "lib", "libgstreamer-1.0.so*"))
+
+    for file in sorted(files):
+        info = os.stat(file)
+        sha.update(f"{file}\n{info.st_size}\n{info.st_mtime_ns}\n".encode("utf-8"))
+
+    return sha.hexdigest()
+
+def generate(packageFolders:list, registryFile:str, force:bool=False) -> bool:
+    '''
+    Generates the registry of the plugins of the package folders, unless it is up to date (see `isCurrent`).  The
+    fingerprint is saved next to the registry file, as "<registry file>.json".
+    :param packageFolders: The conan package folders of the gstreamer packages.  One of them must have `gst-inspect-1.0`
+    and `gst-plugin-scanner` in its "bin" folder.
+    :param registryFile: The registry file.
+    :param force: If true, the registry is generated even if it is up to date.
+    :return: True if the registry was generated, or false if it was up to date.
+    '''
+    if not force and isCurrent(packageFolders, registryFile):
+        return False
+
+    inspect = _findExecutable(packageFolders, "gst-inspect-1.0")
+    if inspect == None:
+        raise Exception("None of the package folders has bin/gst-inspect-1.0:  " + ", ".join(packageFolders))
+
+    os.makedirs(os.path.dirname(os.path.abspath(registryFile)), exist_ok=True)
+
+    # GStreamer writes the registry as it starts.  It is written to a temporary file first, so that a consumer which
+    # starts meanwhile never reads half a registry.
+    temporaryFile = f"{registryFile}.{os.getpid()}.tmp"
+    env = os.environ.copy()
+    env.update(environment(packageFolders, temporaryFile))
+    env["GST_REGISTRY_UPDATE"] = "yes"
+    try:
+        base.evaluate(f"{inspect} --version", verbose=False, env=env)
+        os.replace(temporaryFile, registryFile)
+    finally:
+        if os.path.isfile(temporaryFile):
+            os.remove(temporaryFile)
+
+    with open(registryFile + ".json", "w") as writer:
+        json.dump(odict([("fingerprint", fingerprint(packageFolders)), ("packageFolders", packageFolders)]), writer,
+                  indent=4)
+
+    return True
+
+def isCurrent(packageFolders:list, registryFile:str) -> bool:
+    '''
+    :param packageFolders: The conan package folders of the gstreamer packages.
+    :param registryFile: The registry file.
+    :return: True if the registry was generated (see `generate`) from the same plugin files.
+    '''
+    if not os.path.isfile(registryFile):
+        return False
+
+    info = base.loadJsonObject(registryFile + ".json", False)
+    return info != None and info.get("fingerprint") == fingerprint(packageFolders)
+
+def pluginFolders(packageFolders:list) -> list:
+    '''
+    :param packageFolders: The conan package folders of the gstreamer packages.
+    :return: The "plugins" folders which exist.
+    '''
+    return [folder for folder in [os.path.join(packageFolder, "plugins") for packageFolder in packageFolders]
+            if os.path.isdir(folder)]
+
+def runtimeEnvironment(packageFolders:list, registryFile:str) -> odict:
+    '''
+    Gets the environment variables which make a consumer use a generated registry without scanning any plugin.
+    :param packageFolders: The conan package folders of the gstreamer packages.
+    :param registryFile: The registry file (see `generate`).
+    :return: A dictionary of environment variables.
+    '''
+    env = environment(packageFolders, registryFile)
+    env["GST_REGISTRY_UPDATE"] = "no"
+    return env
+
+def _findExecutable(packageFolders:list, name:str) -> str:
+    for packageFolder in packageFolders:
+        file = os.path.join(packageFolder, "bin", name)
+        if os.path.isfile(file):
+            return file
+    return None
@@ -0,0 +1,139 @@
+from   collections import OrderedDict as odict
+import ast
+import os
+import sys
+
+class DependencyGraph:
+    '''
+    The dependency graph between the conan packages which are built by gst-conan.
+
+    The edges are discovered from the `requirements` and `build_requirements` functions of each package's conanfile.
+    Requirements on packages which are not built by gst-conan (such as ffmpeg) are not part of the graph.
+
+    Fields:
+    * self.packageNames  The names of all packages in the graph, in the order they are listed within `packages.json`.
+    * self.requirements  Keyed by package name, where each value is the list of packages which it requires.
+    '''
+
+    def __init__(self, packageNames:list):
+        self.packageNames = list(packageNames)
+        self.requirements = odict()
+        for packageName in self.packageNames:
+            self.requirements[packageName] = []
+
+    def addRequirement(self, packageName:str, requiredPackageName:str) -> None:
+        '''
+        Adds an edge to the graph.  The edge is ignored if `requiredPackageName` is not part of the graph.
+        :param packageName: The package which has the requirement.
+        :param requiredPackageName: The package which is required.
+        :return: Nothing.
+        '''
+        if requiredPackageName not in self.requirements:
+            return
+
+        if requiredPackageName not in self.requirements[packageName]:
+            self.requirements[packageName].append(requiredPackageName)
+
+    def dependents(self, packageName:str) -> list:
+        '''
+        Gets the packages which directly require the given package.
+        :param packageName: The name of the required package.
+        :return: The list of package names (in the order of `self.packageNames`).
+        '''
+        output = []
+        for name in self.packageNames:
+            if packageName in self.requirements[name]:
+                output.append(name)
+        return output
+
+    @staticmethod
+    def load(packagesFolder:str, packageNames:list) -> 'DependencyGraph':
+        '''
+        Builds the graph by inspecting the conanfile of every package (without executing it).
+        :param packagesFolder: The folder which contains a sub-folder (with a conanfile) for each package.
+        :param packageNames: The names of the packages which are part of the graph.
+        :return: The dependency graph.
+        '''
+        output = DependencyGraph(packageNames)
+
+        for packageName in output.packageNames:
+            conanfile = os.path.join(packagesFolder, packageName, "conanfile.py")
+            for requiredPackageName in DependencyGraph.readRequirements(conanfile):
+                output.addRequirement(packageName, requiredPackageName)
+
+        # Fail early rather than deadlocking the scheduler.
+        output.topologicalOrder()
+
+        return output
+
+    @staticmethod
+    def readRequirements(conanfile:str) -> list:
+        '''
+        Finds the names of the packages passed to `self.requires(...)` or `self.build_requires(...)` within the
+        `requirements` and `build_requirements` functions of a conanfile.  References are expected to look like
+        f"name/{self.version}@{self.user}/{self.channel}" so the name is the literal text before the first '/'.
+        :param conanfile: The path to the `conanfile.py`.
+        :return: The list of package names.
+        '''
+        with open(conanfile, "r") as reader:
+            tree = ast.parse(reader.read(), filename=conanfile)
+
+        output = []
+
+        for function in ast.walk(tree):
+            if not isinstance(function, ast.FunctionDef):
+                continue
+            if function.name not in ("requirements", "build_requirements"):
+                continue
+
+            for node in ast.walk(function):
+                if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+                    continue
+                if node.func.attr not in ("requires", "build_requires") or len(node.args) == 0:
+                    continue
+
+                reference = DependencyGraph._literalPrefix(node.args[0])
+                if reference != None and "/" in reference:
+                    name = reference[:reference.find("/")]
+                    if name not in output:
+                        output.append(name)
+
+        return output
+
+    def topologicalOrder(self) -> list:
+        '''
+        Orders the packages such that every package comes after all of its requirements.  Ties are broken by the order
+        of `self.packageNames`, so the result matches `packages.json` whenever that order is already valid.
+        :return: The list of package names.
+        '''
+        output = []
+        remaining = list(self.packageNames)
+
+        while len(remaining) > 0:
+            for packageName in remaining:
+                if all(r in output for r in self.requirements[packageName]):
+                    output.append(packageName)
+                    remaining.remove(packageName)
+                    break
+            else:
+                raise Exception("The package requirements contain a cycle among:  " + ", ".join(remaining))
+
+        return output
+
+    @staticmethod
+    def _literalPrefix(node) -> str:
+        '''
+        Gets the literal text at the start of a string (or f-string) expression.
+        :return: The literal text, or None if the expression does not start with literal text.
+        '''
+        if isinstance(node, ast.JoinedStr):
+            if len(node.values) == 0:
+                return None
+            node = node.values[0]
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if sys.version_info < (3, 8) and isinstance(node, ast.Str):  # ast.Str was removed in python 3.12
+            return node.s
+
+        return None
@@ -0,0 +1,5 @@
+from .BuildPlan import BuildPlan
+from .DependencyGraph import DependencyGraph
+from .JobBudget import JobBudget
+from .Journal import Journal
+from .Scheduler import Scheduler
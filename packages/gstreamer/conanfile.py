@@ -1,4 +1,4 @@
-from conans import ConanFile, Meson
+from conans import ConanFile
 
 import os
 import shutil
@@ -11,7 +11,7 @@ if sys.version_info[0] < 3:
 # Import helper methods under gst_conan
 # ----------------
 sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
-import gst_conan
+import gst_conan.build
 
 # ----------------
 # Implement the ConanFile
@@ -41,9 +41,7 @@ class GstreamerConan(ConanFile):
     exports = "gst_conan/*", "config/*"
 
     def build(self):
-        meson = Meson(self)
-        meson.configure(source_folder=self.name, build_folder="build")
-        meson.build()
+        gst_conan.build.doConanBuild(self, self.packageInfo)
 
     def configure(self):
         # Environment variables that only exist when `conan` is called through gst-conan
@@ -69,6 +67,4 @@ class GstreamerConan(ConanFile):
         gst_conan.build.doConanPackageInfo(self, self.packageInfo)
 
     def source(self):
-        # This is what actually belongs here.
-        self.run(f"git clone --recurse-submodules https://github.com/gstreamer/{self.name}.git -b {self.gstRevision}")
-        self.run(f"cd {self.name}")
\ No newline at end of file
+        gst_conan.build.doConanSource(self)
\ No newline at end of file
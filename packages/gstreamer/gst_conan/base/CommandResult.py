@@ -0,0 +1,75 @@
+from   collections import OrderedDict as odict
+import os
+import subprocess
+
+class CommandResult:
+    '''
+    The outcome of a command executed by `run`.
+
+    Fields:
+    * self.cmd  The command, as given to `run`.
+    * self.cwd  The working folder of the command (None for the current folder).
+    * self.exitCode  The exit code.  It is negative if the command was killed by a signal (such as after a timeout),
+        and None if the command was not executed (see the `fake` argument of `run`).
+    * self.duration  The wall time of the command, in seconds.
+    * self.output  The captured standard output (decoded as utf-8), or None if the output was not captured.
+    * self.timedOut  True if the command was killed because it exceeded its timeout.
+    * self.startTime  When the command was started (seconds since the epoch).
+    * self.userTime, self.systemTime  The CPU time (in seconds) of the command and of the processes which it waited for,
+        or None where it is not measured (see `os.wait4`).
+    * self.maxRssKb  The peak resident memory (in kilobytes) of the command or of the largest process which it waited
+        for, or None where it is not measured.
+    '''
+
+    def __init__(self, cmd, cwd:str=None, exitCode:int=None, duration:float=0.0, output:str=None,
+                 timedOut:bool=False, startTime:float=None, rusage=None):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.exitCode = exitCode
+        self.duration = duration
+        self.output = output
+        self.timedOut = timedOut
+        self.startTime = startTime
+        self.userTime = rusage.ru_utime if rusage != None else None
+        self.systemTime = rusage.ru_stime if rusage != None else None
+        self.maxRssKb = rusage.ru_maxrss if rusage != None else None
+
+    def check(self, timeout:float=None) -> 'CommandResult':
+        '''
+        Throws like the `subprocess` module does if the command failed:  `subprocess.TimeoutExpired` if it timed out,
+        and `subprocess.CalledProcessError` if its exit code is not 0.
+        :param timeout: The timeout of the command (only used in the exception).
+        :return: This result.
+        '''
+        if self.timedOut:
+            raise subprocess.TimeoutExpired(self.cmd, timeout, output=self.output)
+        if self.exitCode != None and self.exitCode != 0:
+            raise subprocess.CalledProcessError(self.exitCode, self.cmd, output=self.output)
+        return self
+
+    def profileEntry(self, name:str, packageName:str=None, phase:str="command") -> odict:
+        '''
+        :param name: A short name for the command.
+        :param packageName: The package which the command is part of, if any.
+        :param phase: The phase which the command is part of.
+        :return: The resource usage of the command as an entry of the profile (see `gst_conan.profiling`).
+        '''
+        return odict([("package", packageName), ("phase", phase), ("name", name), ("start", self.startTime),
+                      ("wall", self.duration), ("user", self.userTime), ("system", self.systemTime),
+                      ("maxRssKb", self.maxRssKb), ("exitCode", self.exitCode)])
+
+    def succeeded(self) -> bool:
+        '''
+        :return: True if the command exited with code 0 (or was not executed).
+        '''
+        return not self.timedOut and (self.exitCode == None or self.exitCode == 0)
+
+    @staticmethod
+    def exitCodeOf(waitStatus:int) -> int:
+        '''
+        :param waitStatus: A status returned by `os.wait4` (or `os.waitpid`).
+        :return: The exit code, like `subprocess.Popen.returncode`:  negative if the process was killed by a signal.
+        '''
+        if os.WIFSIGNALED(waitStatus):
+            return -os.WTERMSIG(waitStatus)
+        return os.WEXITSTATUS(waitStatus)
@@ -0,0 +1,79 @@
+# The same exact file exists next to each `conanfile.py` within this repo.
+# We are waiting for a Conan bug to get fixed:  https://github.com/conan-io/conan/issues/3591
+
+from .CopyBackend import CopyBackend
+
+from collections import OrderedDict as odict
+
+import concurrent.futures
+import os
+
+class CopyPlan:
+    '''
+    Collects the file copies of the package step (see `doConanPackage`) so that they can be executed together by a
+    bounded pool of threads.  On network storage, each copy is mostly waiting for round-trips, so copying in parallel
+    hides most of that latency.
+
+    Failures (both failed lookups which are reported with `addError` and failed copies) do not stop the plan.  They are
+    collected, and reported together once every copy has been attempted.
+
+    self.copies = The source file of every copy, keyed by destination file.
+
+    self.errors = The list of error messages.
+
+    self.backend = The backend which copies each file (see `CopyBackend`).
+    '''
+
+    def __init__(self, workers:int=16, backend:CopyBackend=None):
+        self.copies = odict()
+        self.errors = []
+        self.workers = workers
+        self.backend = backend if backend != None else CopyBackend.fromEnvironment()
+
+    def add(self, srcFile:str, destFile:str) -> None:
+        '''
+        Adds a copy to the plan.  Links are copied as links.
+        :param srcFile: The source file.
+        :param destFile: The destination file.  Its folder is created as needed.
+        :return: Nothing.
+        '''
+        previous = self.copies.get(destFile)
+        if previous != None and previous != srcFile:
+            self.addError(f"Multiple files would be copied to {destFile}:  {previous} and {srcFile}")
+            return
+
+        self.copies[destFile] = srcFile
+
+    def addError(self, message:str) -> None:
+        '''
+        Records a failure which is reported by `execute`.
+        :param message: A human-readable message.
+        :return: Nothing.
+        '''
+        self.errors.append(message)
+
+    def execute(self) -> None:
+        '''
+        Executes all of the copies.  Throws if any copy failed or if any error was recorded, with all of the messages.
+        :return: Nothing.
+        '''
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = odict()
+            for destFile, srcFile in self.copies.items():
+                futures[destFile] = executor.submit(self._copy, srcFile, destFile)
+
+            for destFile, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    self.addError(f"Failed to copy {self.copies[destFile]} to {destFile}:  {e}")
+
+        if len(self.errors) > 0:
+            raise Exception(f"{len(self.errors)} error(s) in the package step:\n    " + "\n    ".join(self.errors))
+
+    def _copy(self, srcFile:str, destFile:str) -> None:
+        parentFolder = os.path.dirname(destFile)
+        if parentFolder != None and len(parentFolder) > 0:
+            os.makedirs(parentFolder, exist_ok=True)
+
+        self.backend.copy(srcFile, destFile)
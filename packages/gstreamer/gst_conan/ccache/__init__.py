@@ -0,0 +1,154 @@
+'''
+Integration of the ccache compiler cache into the meson builds.
+
+The compilers are wrapped by setting CC and CXX to "ccache <compiler>" before meson configures the build folder, and
+the cache is kept in a folder shared by all packages (and by the `--docker` containers).  The hits and misses of each
+package build are counted from a per-build stats log when ccache supports it (CCACHE_STATSLOG, ccache 4.4 and later).
+Older versions only keep counters for the whole cache, so the counters are compared before and after the build, which
+is approximate when other builds use the cache at the same time.
+'''
+
+from .. import base
+
+from   collections import OrderedDict as odict
+import json
+import os
+import re
+import shlex
+import shutil
+
+# The counters reported by `ccache --print-stats` (ccache 4) and the stats log, and their lines in `ccache -s` (ccache 3).
+HIT_COUNTERS = odict([("direct_cache_hit", "cache hit (direct)"),
+                      ("preprocessed_cache_hit", "cache hit (preprocessed)")])
+MISS_COUNTERS = odict([("cache_miss", "cache miss")])
+
+def environment(ccacheFolder:str, baseFolder:str, statsLog:str=None) -> dict:
+    '''
+    Gets the environment variables which make meson (and then ninja) compile through ccache.
+    :param ccacheFolder: The cache folder (CCACHE_DIR).
+    :param baseFolder: The folder under which absolute paths are rewritten as relative paths (CCACHE_BASEDIR), so that
+    builds in different folders can share cache entries.
+    :param statsLog: The file where ccache logs the result of each compilation (CCACHE_STATSLOG).  Ignored by older
+    versions of ccache.
+    :return: A dictionary of environment variables.
+    '''
+    env = odict()
+    for var, compiler in [("CC", "cc"), ("CXX", "c++")]:
+        current = os.getenv(var) or compiler
+        if shlex.split(current)[0] != "ccache":
+            current = "ccache " + current
+        env[var] = current
+
+    env["CCACHE_DIR"] = ccacheFolder
+    env["CCACHE_BASEDIR"] = baseFolder
+    env["CCACHE_NOHASHDIR"] = "1"
+    if statsLog != None:
+        env["CCACHE_STATSLOG"] = statsLog
+
+    return env
+
+def isInstalled() -> bool:
+    '''
+    :return: True if ccache is found on the PATH.
+    '''
+    return shutil.which("ccache") != None
+
+def printReports(reportsFolder:str) -> None:
+    '''
+    Prints the hits and misses of every package build which wrote a report (see `writeReport`).
+    :param reportsFolder: The folder with the reports.
+    :return: Nothing.
+    '''
+    if not os.path.isdir(reportsFolder):
+        return
+
+    print("Compiler cache:")
+    for item in sorted(os.listdir(reportsFolder)):
+        with open(os.path.join(reportsFolder, item), "r") as reader:
+            report = json.load(reader)
+
+        total = report["hits"] + report["misses"]
+        rate = f"{100.0 * report['hits'] / total:.1f}%" if total > 0 else "-"
+        note = "" if report["exact"] else "  (approximate)"
+        print(f"    {report['package']:<24} {report['hits']:>7} hits {report['misses']:>7} misses {rate:>7}{note}")
+
+def readStats(ccacheFolder:str) -> dict:
+    '''
+    Reads the counters of the whole cache.
+    :param ccacheFolder: The cache folder.
+    :return: A dictionary with "hits" and "misses".
+    '''
+    env = os.environ.copy()
+    env["CCACHE_DIR"] = ccacheFolder
+
+    counters = {}
+    if version() >= (4, 0):
+        spew = base.evaluate("ccache --print-stats", verbose=False, env=env)
+        for line in spew.splitlines():
+            fields = line.split("\t")
+            if len(fields) == 2 and fields[1].strip().isdigit():
+                counters[fields[0].strip()] = int(fields[1])
+    else:
+        # ccache 3 only prints a human readable summary.
+        spew = base.evaluate("ccache -s", verbose=False, env=env)
+        for line in spew.splitlines():
+            for name, label in list(HIT_COUNTERS.items()) + list(MISS_COUNTERS.items()):
+                if line.startswith(label):
+                    value = line[len(label):].split()
+                    if len(value) > 0 and value[0].isdigit():
+                        counters[name] = int(value[0])
+
+    return _summarize(counters)
+
+def readStatsLog(statsLog:str) -> dict:
+    '''
+    Counts the results logged by ccache in a stats log (one counter name per line, with comment lines naming the
+    compiled files).
+    :param statsLog: The stats log.
+    :return: A dictionary with "hits" and "misses".
+    '''
+    counters = {}
+    with open(statsLog, "r") as reader:
+        for line in reader:
+            line = line.strip()
+            if len(line) > 0 and not line.startswith("#"):
+                counters[line] = counters.get(line, 0) + 1
+
+    return _summarize(counters)
+
+def writeReport(reportsFolder:str, packageName:str, before:dict, statsLog:str, ccacheFolder:str) -> None:
+    '''
+    Writes the hits and misses of a package build, to be printed by `printReports`.
+    :param reportsFolder: The folder with the reports.
+    :param packageName: The name of the package.
+    :param before: The counters of the whole cache before the build (see `readStats`).
+    :param statsLog: The stats log of the build.  If ccache did not write it, the counters of the whole cache are
+    compared with `before` instead.
+    :param ccacheFolder: The cache folder.
+    :return: Nothing.
+    '''
+    if os.path.isfile(statsLog):
+        stats = readStatsLog(statsLog)
+        exact = True
+    else:
+        after = readStats(ccacheFolder)
+        stats = {key: after[key] - before[key] for key in ["hits", "misses"]}
+        exact = False
+
+    os.makedirs(reportsFolder, exist_ok=True)
+    with open(os.path.join(reportsFolder, f"{packageName}.json"), "w") as writer:
+        json.dump(odict([("package", packageName), ("hits", stats["hits"]), ("misses", stats["misses"]),
+                         ("exact", exact)]), writer, indent=2)
+
+def version() -> tuple:
+    '''
+    :return: The version of ccache as a tuple of integers, such as (3, 4, 1).
+    '''
+    match = re.search(r"version (\d+(\.\d+)*)", base.evaluate("ccache --version", verbose=False))
+    if match == None:
+        raise Exception("Unable to determine the version of ccache.")
+    return tuple(int(part) for part in match.group(1).split("."))
+
+def _summarize(counters:dict) -> dict:
+    return {"hits": sum(counters.get(name, 0) for name in HIT_COUNTERS.keys()),
+            "misses": sum(counters.get(name, 0) for name in MISS_COUNTERS.keys())}
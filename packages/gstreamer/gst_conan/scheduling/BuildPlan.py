@@ -0,0 +1,153 @@
+from .. import base
+
+from .DependencyGraph import DependencyGraph
+from .Journal import Journal
+
+from   collections import OrderedDict as odict
+import hashlib
+import json
+import os
+import shutil
+
+class BuildPlan:
+    '''
+    Decides which packages need `conan create` and which are already up to date.
+
+    Each package gets an inputs hash which covers its recipe folder (`packages/<name>`, including the copies of the
+    `gst_conan` and `config` folders), the settings of the `gst-conan create` command (revision, build_type, extra conan
+    arguments, ...), and the inputs hashes of the packages which it requires.  After a package is created successfully,
+    a stamp is written for its inputs hash which records the binary package folders in the conan cache.  A package is
+    up to date when the stamp for its current inputs hash exists and those package folders are still in the cache.
+
+    Fields:
+    * self.graph  The dependency graph.
+    * self.findPackageFolders  A callable which receives a package name and returns the list of its binary package
+        folders in the conan cache (see `gst_conan.build.conanPackageFolders`).
+    * self.stampsFolder  The folder where the stamps are stored.
+    * self.entries  Keyed by package name (in topological order), where each value has:
+        value.hash = The inputs hash.
+        value.action = "build" or "skip".
+        value.reason = A human-readable explanation of the action.
+    '''
+
+    def __init__(self, graph:DependencyGraph, stampsFolder:str, findPackageFolders):
+        self.graph = graph
+        self.findPackageFolders = findPackageFolders
+        self.stampsFolder = stampsFolder
+        self.entries = odict()
+
+    def compute(self, packagesFolder:str, settings:odict, packageSettings:dict=None, force:bool=False) -> None:
+        '''
+        Computes the inputs hash and the action of every package.
+        :param packagesFolder: The folder which contains a sub-folder (with a conanfile) for each package.
+        :param settings: Keyed by name, the settings which affect the binaries of every package.  The values must be
+        serializable as json.
+        :param packageSettings: Keyed by package name, additional settings which only affect that package (such as the
+        sha of its upstream revision).  The values must be serializable as json.
+        :param force: If true, every package is built even if it is up to date.
+        :return: Nothing.
+        '''
+        self.entries = odict()
+
+        settingsJson = json.dumps(settings, sort_keys=True)
+
+        for packageName in self.graph.topologicalOrder():
+            hasher = hashlib.sha256()
+            hasher.update(base.hashFolder(os.path.join(packagesFolder, packageName)).encode("utf-8"))
+            hasher.update(settingsJson.encode("utf-8"))
+            if packageSettings and packageName in packageSettings:
+                hasher.update(json.dumps(packageSettings[packageName], sort_keys=True).encode("utf-8"))
+            for requiredPackageName in sorted(self.graph.requirements[packageName]):
+                hasher.update(f"{requiredPackageName}={self.entries[requiredPackageName]['hash']}".encode("utf-8"))
+
+            entry = odict([("hash", hasher.hexdigest()), ("action", "build"), ("reason", "")])
+
+            stamp = base.loadJsonObject(self._stampFile(packageName, entry["hash"]), raiseError=False)
+            if stamp == None:
+                entry["reason"] = "inputs changed"
+            elif not BuildPlan._binariesExist(stamp):
+                entry["reason"] = "binary missing from the conan cache"
+            elif force:
+                entry["reason"] = "forced"
+            else:
+                entry["action"] = "skip"
+                entry["reason"] = "up to date"
+
+            self.entries[packageName] = entry
+
+    def forget(self, packageName:str) -> None:
+        '''
+        Deletes all stamps of a package, so that no future plan considers it up to date.  This is needed when its
+        binaries are replaced by a build which does not follow from the inputs hash (such as an incremental build of a
+        modified workspace).
+        :param packageName: The package.
+        :return: Nothing.
+        '''
+        shutil.rmtree(os.path.join(self.stampsFolder, packageName), ignore_errors=True)
+
+    def isUpToDate(self, packageName:str) -> bool:
+        '''
+        Determines whether the binaries of a package in the conan cache are those of its current inputs hash:  the stamp
+        of the hash exists, and the binary package folders which it records are still in the cache.  Unlike the action,
+        this does not depend on why the package is skipped (e.g. `--package`) or built (e.g. `force`).
+        :param packageName: The package.
+        :return: True if the package is up to date.
+        '''
+        stamp = base.loadJsonObject(self._stampFile(packageName, self.entries[packageName]["hash"]), raiseError=False)
+        return stamp != None and BuildPlan._binariesExist(stamp)
+
+    def markSkipped(self, packageName:str, reason:str) -> None:
+        '''
+        Changes the action of a package to "skip".
+        :param packageName: The package.
+        :param reason: A human-readable explanation.
+        :return: Nothing.
+        '''
+        self.entries[packageName]["action"] = "skip"
+        self.entries[packageName]["reason"] = reason
+
+    def print(self) -> None:
+        '''
+        Prints the plan to the console.
+        :return: Nothing.
+        '''
+        width = max([len(packageName) for packageName in self.entries.keys()] + [0])
+        for packageName, entry in self.entries.items():
+            print(f"    {entry['action']:5}  {packageName:{width}}  {entry['hash'][:12]}  ({entry['reason']})")
+
+    def recordCreated(self, packageName:str) -> None:
+        '''
+        Writes the stamp for a package which has been created successfully.
+        :param packageName: The package.
+        :return: Nothing.
+        '''
+        entry = self.entries[packageName]
+        stampFile = self._stampFile(packageName, entry["hash"])
+        os.makedirs(os.path.dirname(stampFile), exist_ok=True)
+
+        stamp = odict([("packageFolders", self.findPackageFolders(packageName))])
+        with open(stampFile, "w") as writer:
+            json.dump(stamp, writer, indent=4)
+
+    def resume(self, journal:Journal) -> str:
+        '''
+        Skips the packages which the journal of the previous run shows as completed with their current inputs hash, as
+        long as they are still up to date (see `isUpToDate`).
+        :param journal: The journal of the previous run.
+        :return: The first package which is built, or None.
+        '''
+        output = None
+        for packageName, entry in self.entries.items():
+            if journal.isCompleted(packageName, entry["hash"]) and self.isUpToDate(packageName):
+                self.markSkipped(packageName, "completed by the previous run")
+            elif output == None and entry["action"] == "build":
+                output = packageName
+        return output
+
+    @staticmethod
+    def _binariesExist(stamp:dict) -> bool:
+        return len(stamp["packageFolders"]) > 0 \
+            and all(os.path.isfile(os.path.join(folder, "conaninfo.txt")) for folder in stamp["packageFolders"])
+
+    def _stampFile(self, packageName:str, inputsHash:str) -> str:
+        return os.path.join(self.stampsFolder, packageName, inputsHash + ".json")
@@ -0,0 +1,109 @@
+'''
+Checks how the build plan and the journal of `gst_conan.scheduling` resume a `gst-conan create` run (no conan is
+needed:  the binary package folders are plain folders with a "conaninfo.txt").
+
+Run from the root of the repo with `python3 -m unittest discover tests`.
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gst_conan import scheduling
+
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="gst-conan-test-")
+        self.packagesFolder = os.path.join(self.folder, "packages")
+        self.cacheFolder = os.path.join(self.folder, "cache")
+        self.journalFile = os.path.join(self.folder, "journal.json")
+
+        # "good" requires "base", like the gstreamer packages.
+        self.graph = scheduling.DependencyGraph(["base", "good"])
+        self.graph.addRequirement("good", "base")
+        for packageName in self.graph.packageNames:
+            os.makedirs(os.path.join(self.packagesFolder, packageName))
+            with open(os.path.join(self.packagesFolder, packageName, "conanfile.py"), "w") as writer:
+                writer.write(f"# {packageName}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def findPackageFolders(self, packageName:str) -> list:
+        packageFolder = os.path.join(self.cacheFolder, packageName)
+        return [packageFolder] if os.path.isdir(packageFolder) else []
+
+    def plan(self, buildType:str="Release") -> scheduling.BuildPlan:
+        output = scheduling.BuildPlan(self.graph, os.path.join(self.folder, "stamps"), self.findPackageFolders)
+        output.compute(self.packagesFolder, {"build_type": buildType})
+        return output
+
+    def createAll(self, plan:scheduling.BuildPlan, journal:scheduling.Journal, failing:str=None) -> None:
+        # Like `commands.createWithoutDocker`:  conan create is replaced by the creation of the package folder.
+        for packageName, entry in plan.entries.items():
+            if entry["action"] == "skip":
+                if plan.isUpToDate(packageName):
+                    journal.markCompleted(packageName, entry["hash"])
+                else:
+                    journal.markSkipped(packageName, entry["hash"], entry["reason"])
+                continue
+            journal.markStarted(packageName, entry["hash"])
+            if packageName == failing:
+                journal.markFailed(packageName, entry["hash"], "failed")
+                return
+            os.makedirs(os.path.join(self.cacheFolder, packageName), exist_ok=True)
+            with open(os.path.join(self.cacheFolder, packageName, "conaninfo.txt"), "w") as writer:
+                writer.write("")
+            plan.recordCreated(packageName)
+            journal.markCompleted(packageName, entry["hash"])
+
+    def test_resumeAfterFailure(self):
+        plan = self.plan()
+        self.createAll(plan, scheduling.Journal.load(self.journalFile, False), failing="good")
+
+        plan = self.plan()
+        journal = scheduling.Journal.load(self.journalFile, True)
+        self.assertEqual(plan.resume(journal), "good")
+        self.assertEqual(plan.entries["base"]["reason"], "completed by the previous run")
+
+    def test_notSelectedIsNotCompleted(self):
+        # A binary of "base" with another build type is in the cache, but it is not the one of the plan.
+        os.makedirs(os.path.join(self.cacheFolder, "base"))
+        with open(os.path.join(self.cacheFolder, "base", "conaninfo.txt"), "w") as writer:
+            writer.write("")
+
+        plan = self.plan()
+        plan.markSkipped("base", "not selected")
+        self.createAll(plan, scheduling.Journal.load(self.journalFile, False))
+
+        journal = scheduling.Journal.load(self.journalFile, True)
+        self.assertEqual(journal.packages["base"]["status"], "skipped")
+        self.assertEqual(journal.packages["base"]["reason"], "not selected")
+        self.assertEqual(journal.packages["good"]["status"], "completed")
+
+        plan = self.plan()
+        self.assertEqual(plan.resume(journal), "base")
+        self.assertEqual(plan.entries["base"]["action"], "build")
+
+    def test_upToDateIsCompleted(self):
+        self.createAll(self.plan(), scheduling.Journal.load(self.journalFile, False))
+
+        # The packages are up to date, so the next run skips them, and records them as completed.
+        plan = self.plan()
+        self.assertEqual([entry["action"] for entry in plan.entries.values()], ["skip", "skip"])
+        self.createAll(plan, scheduling.Journal.load(self.journalFile, False))
+        journal = scheduling.Journal.load(self.journalFile, True)
+        self.assertTrue(all(journal.isCompleted(name, entry["hash"]) for name, entry in plan.entries.items()))
+
+        # A completed package whose binary was removed from the cache is created again.
+        shutil.rmtree(os.path.join(self.cacheFolder, "good"))
+        plan = self.plan()
+        self.assertEqual(plan.resume(journal), "good")
+
+if __name__ == "__main__":
+    unittest.main()
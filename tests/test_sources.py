@@ -0,0 +1,109 @@
+'''
+Checks the git mirror cache of `gst_conan.sources` against local bare repos (no network access is needed).
+
+Run from the root of the repo with `python3 -m unittest discover tests`.
+'''
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gst_conan import sources
+
+def git(*args, cwd:str=None) -> str:
+    return subprocess.run(["git"] + list(args), cwd=cwd, check=True, stdout=subprocess.PIPE,
+                          universal_newlines=True).stdout.strip()
+
+class MirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="gst-conan-test-")
+        self.mirrorsFolder = os.path.join(self.folder, "mirrors")
+
+        # The "upstream" repo is a bare repo, with a working copy to push commits to it.  Its url is a "file://" url,
+        # since git does not rewrite the urls which are plain paths.
+        self.upstream = os.path.join(self.folder, "upstream.git")
+        self.url = "file://" + self.upstream
+        self.work = os.path.join(self.folder, "work")
+        git("init", "--quiet", "--bare", self.upstream)
+        git("init", "--quiet", self.work)
+        git("config", "user.email", "test@example.com", cwd=self.work)
+        git("config", "user.name", "test", cwd=self.work)
+        git("checkout", "--quiet", "-b", "master", cwd=self.work)
+        self.commit("first")
+        git("tag", "v1", cwd=self.work)
+        git("branch", "old", cwd=self.work)
+        git("push", "--quiet", self.url, "master", "old", "v1", cwd=self.work)
+
+        # Like the pull requests on GitHub, which the mirror must not fetch.
+        git("push", "--quiet", self.url, "HEAD:refs/pull/1/head", cwd=self.work)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def commit(self, message:str) -> str:
+        with open(os.path.join(self.work, "file.txt"), "a") as writer:
+            writer.write(message + "\n")
+        git("add", "file.txt", cwd=self.work)
+        git("commit", "--quiet", "-m", message, cwd=self.work)
+        return git("rev-parse", "HEAD", cwd=self.work)
+
+    def refs(self, repo:str) -> list:
+        return git("--git-dir", repo, "for-each-ref", "--format=%(refname)").splitlines()
+
+    def test_cloneThroughMirror(self):
+        destFolder = os.path.join(self.folder, "clone1")
+        sources.clone(self.url, "master", destFolder, self.mirrorsFolder)
+
+        mirror = sources.mirrorFolder(self.url, self.mirrorsFolder)
+        self.assertEqual(sorted(self.refs(mirror)), ["refs/heads/master", "refs/heads/old", "refs/tags/v1"])
+
+        # The clone keeps the upstream url as its origin.
+        self.assertEqual(git("-C", destFolder, "remote", "get-url", "origin"), self.url)
+
+        # With the upstream repo gone, an offline clone only works if the url is rewritten to the mirror.
+        os.rename(self.upstream, self.upstream + ".moved")
+        destFolder = os.path.join(self.folder, "clone2")
+        sources.clone(self.url, "v1", destFolder, self.mirrorsFolder, offline=True)
+        self.assertEqual(git("-C", destFolder, "remote", "get-url", "origin"), self.url)
+
+    def test_updateMirror(self):
+        mirror = sources.updateMirror(self.url, self.mirrorsFolder)
+
+        sha = self.commit("second")
+        git("push", "--quiet", self.url, "master", cwd=self.work)
+        git("push", "--quiet", self.url, "--delete", "old", cwd=self.work)
+
+        self.assertEqual(sources.updateMirror(self.url, self.mirrorsFolder), mirror)
+        self.assertEqual(git("--git-dir", mirror, "rev-parse", "master"), sha)
+        self.assertNotIn("refs/heads/old", self.refs(mirror))
+
+    def test_mirrorCreatedWithMirrorFlag(self):
+        mirror = sources.mirrorFolder(self.url, self.mirrorsFolder)
+        git("clone", "--quiet", "--mirror", self.url, mirror)
+        self.assertIn("refs/pull/1/head", self.refs(mirror))
+
+        sources.updateMirror(self.url, self.mirrorsFolder)
+        self.assertNotIn("refs/pull/1/head", self.refs(mirror))
+
+    def test_stageExpectedSha(self):
+        stageFolder = sources.stageFolder(os.path.join(self.folder, "staging"), "upstream", "master")
+        first = git("rev-parse", "HEAD", cwd=self.work)
+        sources.stage(self.url, "master", stageFolder, self.mirrorsFolder, expectedSha=first)
+
+        # The branch moves:  the repo which is staged at the previous commit is only kept if no sha is expected.
+        second = self.commit("second")
+        git("push", "--quiet", self.url, "master", cwd=self.work)
+        repoFolder = os.path.join(stageFolder, "repo")
+        sources.stage(self.url, "master", stageFolder, self.mirrorsFolder)
+        self.assertEqual(git("-C", repoFolder, "rev-parse", "HEAD"), first)
+        sources.stage(self.url, "master", stageFolder, self.mirrorsFolder, expectedSha=second)
+        self.assertEqual(git("-C", repoFolder, "rev-parse", "HEAD"), second)
+
+if __name__ == "__main__":
+    unittest.main()